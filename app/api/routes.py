@@ -1,31 +1,47 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from services.chatbot.bot import RuleBasedBot
 from services.rag_engin import RAGChatbot
 from core.logging_config import get_logger
+import json
 import shutil
 import os
-from core.config import DOCS_DIR
+import time
+from core.config import DOCS_DIR, INDEXING_WORKERS, INDEXING_QUEUE_SIZE, REQUEST_DEADLINE, TRANSLATION_TIMEOUT
+from services.job_queue import JobQueue, QueueFullError
 from services.translator import translate_to_english
+from services.answer_router import RULE
+from core.concurrency import run_io
+from core.deadline import Deadline, StageTimeout
+from core.startup import Startup
 
 # Setup logging
 logger = get_logger(__name__)
 
-# Create router
+# Create routers; health probes are mounted without the API prefix
 router = APIRouter()
+health_router = APIRouter()
 
 # Initialize services
 class ChatService:
     def __init__(self):
-        logger.info("Initializing ChatService and dependencies")
-        self.rag_bot = RAGChatbot()
-        self.rule_bot = RuleBasedBot()
+        """Registers the components; nothing is loaded until :meth:`start`."""
+        self.startup = Startup("chat-service")
+        self.rag_bot = RAGChatbot(startup=self.startup)
+        self.startup.add("rules", RuleBasedBot)
+
+    def start(self):
+        logger.info("Initializing ChatService and dependencies in the background")
+        self.startup.start()
+
+    @property
+    def rule_bot(self) -> RuleBasedBot:
+        return self.startup.get("rules")
 
     def get_response(self, text, source_lang):
         """Get response using rule-based bot first, fallback to RAG"""
-        logger.debug("Translating incoming text to English")
-        text = translate_to_english(text, source_lang)
-        logger.debug("Querying rule-based bot for quick response")
-        response = self.rule_bot.get_response(text)
+        text, response = self._translate_and_match(text, source_lang)
 
         if not response:
             logger.info("No rule-based response found, falling back to RAG")
@@ -33,12 +49,70 @@ class ChatService:
 
         return response
 
+    async def aget_response(self, text, source_lang, deadline=None):
+        """Async :meth:`get_response`: blocking stages run on the bounded executor.
+
+        All stages share ``deadline``; degraded stages are recorded on it.
+        """
+        deadline = deadline or Deadline()
+        text, response = await self._atranslate_and_match(text, source_lang, deadline)
+        if not response:
+            logger.info("No rule-based response found, falling back to RAG")
+            response = await self.rag_bot.allmanswer(text, deadline=deadline)
+        return response
+
+    async def astream_response(self, text, source_lang, deadline=None):
+        """Streaming :meth:`aget_response`: yields the answer in pieces as it is generated."""
+        deadline = deadline or Deadline()
+        text, response = await self._atranslate_and_match(text, source_lang, deadline)
+        if response:
+            yield response
+            return
+        logger.info("No rule-based response found, streaming RAG answer")
+        async for delta in self.rag_bot.astream_llmanswer(text, deadline=deadline):
+            yield delta
+
+    def _translate_and_match(self, text, source_lang):
+        start = time.perf_counter()
+        logger.debug("Translating incoming text to English")
+        text = translate_to_english(text, source_lang)
+        return text, self._match_rules(text, start)
+
+    async def _atranslate_and_match(self, text, source_lang, deadline):
+        """Translate within ``TRANSLATION_TIMEOUT``, falling back to the untranslated text."""
+        start = time.perf_counter()
+        logger.debug("Translating incoming text to English")
+        try:
+            text = await deadline.run("translation", run_io(translate_to_english, text, source_lang),
+                                      TRANSLATION_TIMEOUT)
+        except StageTimeout:
+            deadline.degrade("translation", "timeout")
+        return text, self._match_rules(text, start)
+
+    def _match_rules(self, text, start):
+        logger.debug("Querying rule-based bot for quick response")
+        response = self.rule_bot.get_response(text)
+        if response:
+            self.rag_bot.router.record(RULE, time.perf_counter() - start)
+        return response
+
+    def routing_stats(self):
+        return {**self.rag_bot.router.stats(), "llm": self.rag_bot.llm.stats(),
+                "query_embedding": self.rag_bot.embedding_service.batch_stats()}
+
     def clear_data(self):
         logger.info("Clearing chatbot indexed data and cache")
         self.rag_bot.clear_data()
 
-# Initialize service
+# Initialize service; components load once the app starts (see main.py)
 chat_service = ChatService()
+indexing_jobs = JobQueue(workers=INDEXING_WORKERS, max_pending=INDEXING_QUEUE_SIZE, name="indexing")
+
+def _require_ready():
+    """Reject requests that need the models or index while they are still loading (or failed to)."""
+    if not chat_service.startup.ready:
+        detail = "Service failed to start" if chat_service.startup.failed else "Service is starting, please retry shortly"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
 
 @router.post("/respond-audio")
 async def respond_to_text(payload: dict):
@@ -51,13 +125,15 @@ async def respond_to_text(payload: dict):
 
         if not text:
             raise HTTPException(status_code=400, detail="Text field is required")
+        _require_ready()
 
         logger.info("Generating response for user input")
-        # Get response from chat service
-        response = chat_service.get_response(text, source_lang)
+        # Get response from chat service within the request deadline
+        deadline = Deadline(REQUEST_DEADLINE)
+        response = await chat_service.aget_response(text, source_lang, deadline)
 
         logger.debug("Response generated successfully")
-        return {"response": response}
+        return {"response": response, "degraded": deadline.degraded}
     except HTTPException:
         # re-raise explicit HTTP errors without double-logging as error
         raise
@@ -65,10 +141,45 @@ async def respond_to_text(payload: dict):
         logger.exception("Response generation error")
         raise HTTPException(status_code=500, detail=f"Failed to generate response: {str(e)}")
 
+@router.post("/respond-audio/stream")
+async def respond_to_text_stream(payload: dict):
+    """
+    Stream the response to the provided text as Server-Sent Events.
+    Each ``message`` event carries ``{"token": ...}``; a final ``done`` event
+    carries the full ``{"response": ..., "degraded": ...}``, or an ``error`` event ``{"detail": ...}``.
+    """
+    text = payload.get("text", "")
+    source_lang = payload.get("source_lang", "")
+    if not text:
+        raise HTTPException(status_code=400, detail="Text field is required")
+    _require_ready()
+
+    async def events():
+        parts = []
+        deadline = Deadline(REQUEST_DEADLINE)
+        try:
+            async for delta in chat_service.astream_response(text, source_lang, deadline):
+                parts.append(delta)
+                yield _sse({"token": delta})
+            yield _sse({"response": "".join(parts).strip(), "degraded": deadline.degraded}, event="done")
+        except Exception as e:
+            logger.exception("Streaming response generation error")
+            yield _sse({"detail": f"Failed to generate response: {str(e)}"}, event="error")
+
+    logger.info("Streaming response for user input")
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @router.post("/clear-data/")
 async def clear_data():
+    _require_ready()
     try:
-        chat_service.clear_data()
+        # Blocks while an indexing job holds the write lock, so keep it off the event loop
+        await run_in_threadpool(chat_service.clear_data)
         return {"message": "Data cleared"}
     except Exception:
         logger.exception("Failed to clear data")
@@ -76,34 +187,95 @@ async def clear_data():
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
-@router.post("/upload-document/")
+@router.post("/upload-document/", status_code=202)
 async def upload_document(file: UploadFile = File(...)):
+    """
+    Save a document and queue it for indexing; returns a job id immediately.
+    Accepted during startup too; the job starts once the index is loaded.
+    The document is added, or replaced if one with the same name exists.
+    Poll /jobs/{job_id} for parse/embed/persist progress.
+    """
     try:
         os.makedirs(DOCS_DIR, exist_ok=True)
+        filename = os.path.basename(file.filename or "")
+        if not filename:
+            raise HTTPException(status_code=400, detail="File name is required")
 
-        # Clear previous files and reset chat data
-        for filename in os.listdir(DOCS_DIR):
-            file_path = os.path.join(DOCS_DIR, filename)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-
-        logger.info("Previous documents removed. Clearing vector store and cache")
-        chat_service.clear_data()  # Clear cached data before reloading
-
-        # Save new file
-        file_path = os.path.join(DOCS_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        file_path = os.path.join(DOCS_DIR, filename)
+        await run_in_threadpool(_save_upload, file, file_path)
 
-        logger.info("File saved successfully, reloading documents for indexing")
-        chat_service.rag_bot.load_documents()
-        return {"message": f"✅ '{file.filename}' uploaded, previous documents cleared and indexed."}
+        logger.info("File saved successfully, queueing %s for indexing", filename)
+        job = indexing_jobs.submit(
+            f"index:{filename}",
+            lambda progress: chat_service.rag_bot.index_document(filename, progress),
+        )
+        return {"message": f"✅ '{filename}' uploaded and queued for indexing.", "document": filename, "job_id": job.id}
     except HTTPException:
         raise
+    except QueueFullError as e:
+        logger.warning("Rejecting upload: %s", e)
+        raise HTTPException(status_code=429, detail="Indexing queue is full, please retry later.")
     except Exception as e:
         logger.exception("Document upload failed")
         raise HTTPException(status_code=500, detail=f"Failed to upload and process document: {str(e)}")
 
+def _save_upload(file: UploadFile, file_path: str):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+@router.post("/reindex/", status_code=202)
+async def reindex():
+    """
+    Rebuild the whole index in the background and swap it in atomically.
+    Queries keep using the current index until the rebuild is published.
+    """
+    _require_ready()
+    try:
+        job = indexing_jobs.submit("reindex", chat_service.rag_bot.reindex_all)
+        return {"message": "Re-index queued.", "job_id": job.id}
+    except QueueFullError as e:
+        logger.warning("Rejecting re-index: %s", e)
+        raise HTTPException(status_code=429, detail="Indexing queue is full, please retry later.")
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = indexing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+@router.get("/jobs/")
+async def list_jobs():
+    return {"jobs": [job.to_dict() for job in indexing_jobs.list()], "pending": indexing_jobs.pending}
+
+@router.delete("/documents/{filename}")
+async def delete_document(filename: str):
+    """
+    Remove one document and its indexed chunks.
+    """
+    _require_ready()
+    try:
+        filename = os.path.basename(filename)
+        file_path = os.path.join(DOCS_DIR, filename)
+        file_removed = os.path.isfile(file_path)
+        if file_removed:
+            os.remove(file_path)
+        index_removed = await run_in_threadpool(chat_service.rag_bot.remove_document, filename)
+        if not (file_removed or index_removed):
+            raise HTTPException(status_code=404, detail=f"Document '{filename}' not found")
+        return {"message": f"'{filename}' deleted.", "document": filename}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Document delete failed")
+        raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
+
+@router.get("/routing-stats/")
+async def routing_stats():
+    """Per-route answer counts and average latency (rule, cache, extractive, LLM)."""
+    _require_ready()
+    return chat_service.routing_stats()
+
 @router.get("/list-documents/")
 async def list_documents():
     try:
@@ -114,3 +286,17 @@ async def list_documents():
     except Exception as e:
         logger.exception("Failed to list documents")
         raise HTTPException(status_code=500, detail="Failed to retrieve documents.")
+
+@health_router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving, whether or not the models have loaded."""
+    return {"status": "ok"}
+
+@health_router.get("/readyz")
+async def readyz():
+    """Readiness: 200 once the models and the index are loaded (and warmed up), else 503.
+
+    The body reports each component's state and load time in seconds.
+    """
+    status = chat_service.startup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,136 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Hashable, List, Sequence, TypeVar
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched calls of ``fn``.
+
+    Callers block in :meth:`submit`, or await :meth:`asubmit` without
+    holding a thread, while one worker thread collects queued items until ``max_batch`` are waiting or ``max_wait`` seconds have passed
+    since the first one, calls ``fn(items)`` once (identical items are
+    passed once) and hands each caller its own result. Collection also stops
+    as soon as every blocked caller is in the batch, so a lone request never
+    waits for company. If ``fn`` raises, every caller in that batch gets the
+    exception. ``max_batch <= 1`` calls ``fn`` directly on the caller's thread
+    (on the default executor for :meth:`asubmit`).
+
+    Batches can only be as large as the number of callers waiting at once, so
+    request handlers should use :meth:`asubmit`: a blocking :meth:`submit` from
+    a small thread pool caps the batch at the pool size.
+    """
+
+    def __init__(self, fn: Callable[[List[Hashable]], Sequence[T]], max_batch: int = 16,
+                 max_wait: float = 0.003, name: str = "batcher"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._waiting = 0  # callers whose item has not been computed yet
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self._queue_seconds = 0.0
+        self._compute_seconds = 0.0
+
+    def submit(self, item: Hashable) -> T:
+        if self.max_batch <= 1:
+            return self.fn([item])[0]
+        return self._enqueue(item).result()
+
+    async def asubmit(self, item: Hashable) -> T:
+        """Awaitable :meth:`submit`; the event loop is free while the batch is collected and computed.
+
+        Cancelling the await drops the item if its batch has not run yet.
+        """
+        if self.max_batch <= 1:
+            return (await asyncio.get_running_loop().run_in_executor(None, self.fn, [item]))[0]
+        return await asyncio.wrap_future(self._enqueue(item))
+
+    def _enqueue(self, item: Hashable) -> Future:
+        self._ensure_worker()
+        future = Future()
+        with self._stats_lock:
+            self._waiting += 1
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            collect_until = time.perf_counter() + self.max_wait
+            while len(batch) < min(self.max_batch, self._waiting):
+                remaining = collect_until - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._execute(batch)
+
+    def _execute(self, batch) -> None:
+        started = time.perf_counter()
+        cancelled = [entry for entry in batch if entry[1].cancelled()]
+        if cancelled:
+            with self._stats_lock:
+                self._waiting -= len(cancelled)
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                return
+        unique = list(dict.fromkeys(item for item, _, _ in batch))
+        try:
+            results = self.fn(unique)
+        except BaseException as e:
+            logger.exception("%s: batch of %d items failed", self.name, len(unique))
+            with self._stats_lock:
+                self._waiting -= len(batch)
+            for _, future, _ in batch:
+                _resolve(future.set_exception, e)
+            return
+        finished = time.perf_counter()
+        by_item = dict(zip(unique, results))
+        with self._stats_lock:
+            self._waiting -= len(batch)
+            self.batches += 1
+            self.items += len(batch)
+            self._queue_seconds += sum(started - queued_at for _, _, queued_at in batch)
+            self._compute_seconds += finished - started
+        for item, future, _ in batch:
+            _resolve(future.set_result, by_item[item])
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": 1000 * self.max_wait,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "avg_queue_ms": 1000 * self._queue_seconds / self.items if self.items else 0.0,
+                "avg_batch_ms": 1000 * self._compute_seconds / self.batches if self.batches else 0.0,
+                "items_per_compute_second": self.items / self._compute_seconds if self._compute_seconds else 0.0,
+            }
+
+
+def _resolve(setter, value) -> None:
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass  # the caller cancelled while its batch was running
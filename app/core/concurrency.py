@@ -0,0 +1,29 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+from core.config import CPU_WORKERS, IO_WORKERS
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Bounded pool for blocking request stages, separate from Starlette's threadpool
+# so a burst of queries cannot starve file uploads and other sync handlers.
+_executor = ThreadPoolExecutor(max_workers=max(1, CPU_WORKERS), thread_name_prefix="cpu")
+# Blocking network calls get their own pool: a timed-out call keeps its thread until the
+# remote side answers, which must not eat into the CPU pool
+_io_executor = ThreadPoolExecutor(max_workers=max(1, IO_WORKERS), thread_name_prefix="io")
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run ``func(*args, **kwargs)`` on the bounded executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking network call ``func(*args, **kwargs)`` on the I/O executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
@@ -6,9 +6,127 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 # Standardized reusable paths
 MODELS_DIR = os.path.join(PROJECT_ROOT, "models", "model")
 DOCS_DIR = os.path.join(PROJECT_ROOT, "data", "docs")
-INDEX_PATH = os.path.join(PROJECT_ROOT, "vector_store.pkl")
+INDEX_DIR = os.path.join(PROJECT_ROOT, "vector_store")
+# Pre-v1 pickle index; no longer loaded, only reported so it can be deleted
+LEGACY_INDEX_PATH = os.path.join(PROJECT_ROOT, "vector_store.pkl")
+# Persistent chunk embeddings keyed by content hash; survives index clears
+EMBEDDING_CACHE_DIR = os.path.join(PROJECT_ROOT, "embedding_cache")
+# Most chunk embeddings kept per model (0 = unbounded); the least recently used are dropped past it
+EMBEDDING_CACHE_MAX_CHUNKS = int(os.getenv("EMBEDDING_CACHE_MAX_CHUNKS", "200000"))
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your_groq_api_key_here")
 
 # Default Hugging Face model to use when a local model directory is not present or invalid
 # Can be overridden with HF_MODEL_ID environment variable
 DEFAULT_HF_MODEL_ID = os.getenv("HF_MODEL_ID", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Vector search mode: "exact" (brute-force scan) or "ivf" (approximate IVF-flat index)
+INDEX_MODE = os.getenv("INDEX_MODE", "exact").lower()
+# Number of IVF cells; 0 picks ~4*sqrt(N) at training time
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+# Cells scanned per query; higher trades latency for recall
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+# Below this many vectors the exact scan is used even in "ivf" mode
+IVF_MIN_TRAIN_SIZE = int(os.getenv("IVF_MIN_TRAIN_SIZE", "10000"))
+
+# In-memory representation for the coarse scan: "float32" or "int8" (4x less memory, same scan speed).
+# Full-precision vectors stay on disk (memory-mapped) for exact rescoring.
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32").lower()
+# Candidates rescored exactly per requested result when VECTOR_DTYPE is quantized
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", "4"))
+
+# Retrieval: "dense" uses vectors only, "hybrid" (opt-in) also fuses in BM25 keyword matches
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense").lower()
+# Candidates taken from each retriever per requested result, and the reciprocal-rank-fusion constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# BM25 term-frequency saturation and document-length normalization
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Embedding inference backend: "torch" (fp32 reference), "torch-int8" (dynamic int8 quantization) or "onnx"
+# (ONNX Runtime; EMBEDDING_ONNX_FILE picks a file inside the model, e.g. a pre-quantized int8 export).
+# EMBEDDING_THREADS sets intra-op CPU threads; 0 keeps the library default
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE") or None
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+# Query embedding cache (EmbeddingService.embed_single); TTL in seconds, 0 = no expiry
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "0"))
+# Concurrent query embeddings are run as one model batch of up to QUERY_BATCH_MAX texts, collected
+# for at most QUERY_BATCH_WAIT_MS after the first arrives; QUERY_BATCH_MAX=1 disables batching
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "16"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "3"))
+
+# Background indexing: worker threads and maximum queued uploads before rejecting with 429
+INDEXING_WORKERS = int(os.getenv("INDEXING_WORKERS", "1"))
+INDEXING_QUEUE_SIZE = int(os.getenv("INDEXING_QUEUE_SIZE", "16"))
+
+# Processes used to parse documents when bulk-indexing the docs directory; 1 parses serially
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Download NLTK's sentence tokenizer data on first use if it is missing (0 = never touch the network)
+NLTK_DOWNLOAD = bool(int(os.getenv("NLTK_DOWNLOAD", "1")))
+
+# Startup: models and the index load in the background after the server starts; STARTUP_WARMUP runs one
+# embedding, tokenization and search before /readyz reports ready, so the first request is not the slow one
+STARTUP_WARMUP = bool(int(os.getenv("STARTUP_WARMUP", "1")))
+
+# Chunks embedded per model call during indexing, and parsed batches buffered ahead of the embedder
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_PREFETCH = int(os.getenv("EMBED_PREFETCH", "2"))
+
+# LLM HTTP client: request timeout (seconds) and pooled connection limits shared by concurrent requests
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+# Ordered LLM backends tried with failover: "groq:<model>", "local" (offline stand-in) or "package.module:ClassName"
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "groq:llama-3.3-70b-versatile")
+# SDK retries per backend call, and total calls (failovers + hedges) per request
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+# Send a hedged duplicate once a call outlives this latency quantile of its backend (0 disables);
+# LLM_HEDGE_DELAY seconds is used until enough latencies have been observed
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "3"))
+# Circuit breaker per backend: consecutive failures before it opens, seconds before a trial call
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# Per-request deadline in seconds shared by all stages of /respond-audio, and optional caps for the
+# translation and retrieval stages; the LLM gets what is left and falls back to the extractive answer.
+# All off by default (0 = none)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "0"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "0"))
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "0"))
+# Threads running CPU-bound request stages (embedding model calls, search) off the event loop
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "4"))
+# Threads for blocking network calls (translation); a separate pool, so calls abandoned after a timeout
+# cannot starve retrieval
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+
+# Semantic answer cache: reuse an LLM answer for a paraphrased query whose embedding has
+# cosine similarity >= threshold with a cached one. Cleared whenever the index changes.
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "0"))
+
+# LLM prompt context: token budget for retrieved chunks (measured with the model tokenizer),
+# MMR relevance/diversity trade-off (1.0 = relevance only) and candidates fetched per packed chunk
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.5"))
+CONTEXT_FETCH_FACTOR = int(os.getenv("CONTEXT_FETCH_FACTOR", "3"))
+
+# Serve the top chunk without an LLM call when its cosine similarity is >= EXTRACTIVE_CONFIDENCE
+# and it is at most EXTRACTIVE_MAX_TOKENS long (off by default: cosine never exceeds 1), or when
+# LLM_CALLS_PER_MINUTE is used up (0 = unlimited)
+EXTRACTIVE_CONFIDENCE = float(os.getenv("EXTRACTIVE_CONFIDENCE", "1.1"))
+EXTRACTIVE_MAX_TOKENS = int(os.getenv("EXTRACTIVE_MAX_TOKENS", "64"))
+LLM_CALLS_PER_MINUTE = float(os.getenv("LLM_CALLS_PER_MINUTE", "0"))
+
+# Translation engine: "google", "identity" (offline no-op) or "package.module:ClassName"
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+# Cached translations keyed by (text, source, target); TTL in seconds, 0 = no expiry
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "0"))
+
+# Rule-based bot: JSON rule set answered before falling back to RAG
+CHATBOT_RULES_FILE = os.getenv("CHATBOT_RULES_FILE", os.path.join(PROJECT_ROOT, "app", "services", "chatbot", "rules.json"))
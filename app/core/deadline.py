@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Dict, Optional, TypeVar
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class StageTimeout(Exception):
+    """A pipeline stage did not finish within its share of the request deadline."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' exceeded its deadline")
+        self.stage = stage
+
+
+class Deadline:
+    """Time budget for one request, shared by all of its stages.
+
+    Stages run through :meth:`run` (or :meth:`iterate` for streams), which
+    cancels them once the overall deadline or their own ``cap`` is reached.
+    A stage that overruns or fails and falls back to a cheaper result is
+    recorded in ``degraded`` (stage name -> reason) so the response can say
+    what it skipped. ``seconds=None`` never expires.
+
+    Cancelling a stage running on a worker thread (``run_blocking``) only
+    abandons its result; the thread finishes in the background.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.degraded: Dict[str, str] = {}
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def budget(self, cap: Optional[float] = None) -> Optional[float]:
+        """Seconds the next stage may take: the time left, limited to ``cap``."""
+        remaining = self.remaining()
+        if cap is None or cap <= 0:
+            return remaining
+        return cap if remaining is None else min(cap, remaining)
+
+    def degrade(self, stage: str, reason: str) -> None:
+        logger.warning("Request stage '%s' degraded: %s", stage, reason)
+        self.degraded[stage] = reason
+
+    async def run(self, stage: str, awaitable: Awaitable[T], cap: Optional[float] = None) -> T:
+        """Await ``awaitable`` within the budget; raises :class:`StageTimeout` if it overruns."""
+        timeout = self.budget(cap)
+        if timeout is not None and timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise StageTimeout(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeout(stage) from None
+
+    async def iterate(self, stage: str, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+        """Yield from ``stream`` until it ends or the deadline passes (then it is closed and marked degraded)."""
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    item = await self.run(stage, iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+                except StageTimeout:
+                    self.degrade(stage, "timeout")
+                    return
+                yield item
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
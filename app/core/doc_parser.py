@@ -1,22 +1,66 @@
+import hashlib
+import multiprocessing
 import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import fitz  # PyMuPDF
 from docx import Document
 from pathlib import Path
 import nltk
 from nltk.tokenize import sent_tokenize
 from langchain.schema import Document as LangDocument
-from core.config import DOCS_DIR
+from core.config import DOCS_DIR, PARSE_WORKERS, NLTK_DOWNLOAD
 from core.logging_config import get_logger
 
 # Setup logger
 logger = get_logger(__name__)
 
-# Download tokenizer once (safe if already downloaded)
-try:
-    nltk.download('punkt_tab', quiet=True)
-except Exception:
-    # Non-fatal: will fail at tokenize if missing
-    logger.warning("Failed to download NLTK tokenizer 'punkt_tab'. Proceeding anyway.")
+_sentence_tokenizer_lock = threading.Lock()
+_sentence_tokenizer_available = None
+
+def ensure_sentence_tokenizer():
+    """Make sure NLTK's 'punkt_tab' data is available, downloading it on first use if allowed.
+
+    Called during startup and before the first sentence split, never at
+    import, so a missing network cannot stall startup. Checked once per
+    process; parser pool workers get the parent's result instead (see
+    :func:`parse_documents`) and never download. Returns whether the
+    tokenizer is available; without it text is not split into sentences.
+    """
+    global _sentence_tokenizer_available
+    if _sentence_tokenizer_available is not None:
+        return _sentence_tokenizer_available
+    with _sentence_tokenizer_lock:
+        if _sentence_tokenizer_available is None:
+            _sentence_tokenizer_available = _find_sentence_tokenizer()
+            if not _sentence_tokenizer_available and NLTK_DOWNLOAD:
+                try:
+                    nltk.download('punkt_tab', quiet=True)
+                except Exception:
+                    # Non-fatal: text is then kept unsplit
+                    logger.warning("Failed to download NLTK tokenizer 'punkt_tab'. Proceeding anyway.")
+                _sentence_tokenizer_available = _find_sentence_tokenizer()
+            if not _sentence_tokenizer_available:
+                _warn_no_sentence_tokenizer()
+        return _sentence_tokenizer_available
+
+def _warn_no_sentence_tokenizer():
+    logger.warning("NLTK tokenizer 'punkt_tab' is not available; text is chunked without sentence splitting. "
+                   "Install it with: python -m nltk.downloader punkt_tab")
+
+def _init_parse_worker(tokenizer_available):
+    # Runs in each pool process: the parent already fetched the data, so workers only load it
+    global _sentence_tokenizer_available
+    _sentence_tokenizer_available = tokenizer_available
+
+def _find_sentence_tokenizer():
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+        return True
+    except LookupError:
+        return False
 
 def get_available_files():
     docs_dir = DOCS_DIR
@@ -25,71 +69,165 @@ def get_available_files():
     supported_extensions = ('.pdf', '.txt', '.doc', '.docx')
     return [f for f in os.listdir(docs_dir) if Path(f).suffix.lower() in supported_extensions]
 
+def get_file_hash(filename):
+    """sha256 of a file in the docs directory, used as its content identity."""
+    digest = hashlib.sha256()
+    with open(os.path.join(DOCS_DIR, filename), "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+MAX_CHUNK_LENGTH = 500  # Approx. character limit per chunk
+MAX_CHUNK_SENTENCES = 3
+MIN_CHUNK_LENGTH = 20
+TEXT_BLOCK_SIZE = 64 * 1024  # Max characters of a .txt file tokenized at once
+
 def extract_text(filename, content=None):
-    docs_dir = DOCS_DIR
-    text = ""
+    """Parse a document into chunks; see :func:`iter_chunks`."""
+    return list(iter_chunks(filename, content))
+
+def parse_documents(filenames, workers=PARSE_WORKERS):
+    """Yield ``(filename, chunks)`` for each file, in input order, parsing in a process pool.
+
+    ``chunks`` is None when parsing that file failed; other files are not
+    affected. At most ``2 * workers`` parsed files are held at once.
+    """
+    if workers <= 1 or len(filenames) <= 1:
+        for filename in filenames:
+            yield filename, _parse_isolated(filename)
+        return
+
+    # Fetch the tokenizer once here rather than racing downloads into the same data dir from every worker
+    tokenizer_available = ensure_sentence_tokenizer()
+    # spawn, not fork: the parent runs model and job-queue threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_parse_worker,
+                             initargs=(tokenizer_available,)) as pool:
+        names = iter(filenames)
+        in_flight = deque()
+
+        def submit_next():
+            filename = next(names, None)
+            if filename is None:
+                return False
+            try:
+                in_flight.append((filename, pool.submit(extract_text, filename)))
+            except BrokenProcessPool:
+                in_flight.append((filename, None))
+            return True
+
+        while len(in_flight) < 2 * workers and submit_next():
+            pass
+        while in_flight:
+            filename, future = in_flight.popleft()
+            if future is None:
+                # A worker died and took the pool down; finish the remaining files in-process
+                yield filename, _parse_isolated(filename)
+            else:
+                try:
+                    chunks = future.result()
+                except Exception:
+                    logger.exception("Parser process failed on %s", filename)
+                    chunks = None
+                yield filename, chunks
+            submit_next()
 
+def _parse_isolated(filename):
+    try:
+        return extract_text(filename)
+    except Exception:
+        logger.exception("Parser failed on %s", filename)
+        return None
+
+def iter_chunks(filename, content=None):
+    """Yield LangChain Documents of 2-3 sentences, parsing the file incrementally.
+
+    PDFs are read page by page and Word files paragraph by paragraph, so only
+    one page or paragraph plus the pending chunk is held in memory and callers
+    can start embedding before parsing finishes. Each chunk carries ``source``
+    plus ``page`` (PDF, 1-based) or ``paragraph`` (docx/txt) of where it starts.
+    """
     if content is not None:
         # Handle content passed directly (e.g., upload)
-        temp_path = f"temp_{filename}"
-        with open(temp_path, "wb") as f:
+        file_path = f"temp_{filename}"
+        with open(file_path, "wb") as f:
             f.write(content)
-        file_path = temp_path
     else:
         # Load from local folder
-        file_path = os.path.join(docs_dir, filename)
+        file_path = os.path.join(DOCS_DIR, filename)
         if not os.path.exists(file_path):
-            return []
-
-    file_ext = Path(filename).suffix.lower()
+            return
 
+    chunk, chunk_length, location = [], 0, None
+    split = ensure_sentence_tokenizer()  # once per document, not per page or paragraph
     try:
-        if file_ext == '.pdf':
-            doc = fitz.open(file_path)
-            text = "\n".join([page.get_text() for page in doc])
+        try:
+            for section_location, text in _iter_sections(filename, file_path):
+                for sentence in _split_sentences(text, split):
+                    if not chunk:
+                        location = section_location
+                    chunk.append(sentence)
+                    chunk_length += len(sentence)
+                    if chunk_length > MAX_CHUNK_LENGTH or len(chunk) >= MAX_CHUNK_SENTENCES:
+                        yield _make_chunk(filename, chunk, location)
+                        chunk, chunk_length = [], 0
+        except Exception:
+            logger.exception("Error reading document: %s", filename)
+        if chunk:
+            yield _make_chunk(filename, chunk, location)
+    finally:
+        if content is not None:
+            try:
+                os.remove(file_path)
+            except Exception:
+                logger.warning("Failed to remove temporary file: %s", file_path)
+
+def _iter_sections(filename, file_path):
+    """Yield ``({"page": n} | {"paragraph": n}, text)`` pieces of a document in order."""
+    file_ext = Path(filename).suffix.lower()
+    if file_ext == '.pdf':
+        doc = fitz.open(file_path)
+        try:
+            for page_number, page in enumerate(doc, start=1):
+                yield {"page": page_number}, page.get_text()
+        finally:
             doc.close()
-        elif file_ext == '.txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        elif file_ext in ('.doc', '.docx'):
-            doc = Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        else:
-            text = ""
-    except Exception as e:
-        logger.exception("Error reading document: %s", filename)
-        text = ""
+    elif file_ext == '.txt':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            block, size, paragraph = [], 0, 1
+            for line in f:
+                if not line.strip() and not size:
+                    continue
+                block.append(line)
+                size += len(line)
+                # Cut at blank lines (paragraph breaks), or anywhere once a block gets large
+                if not line.strip() or size >= TEXT_BLOCK_SIZE:
+                    yield {"paragraph": paragraph}, "".join(block)
+                    block, size, paragraph = [], 0, paragraph + 1
+            if block:
+                yield {"paragraph": paragraph}, "".join(block)
+    elif file_ext in ('.doc', '.docx'):
+        doc = Document(file_path)
+        for paragraph_number, paragraph in enumerate(doc.paragraphs, start=1):
+            if paragraph.text.strip():
+                yield {"paragraph": paragraph_number}, paragraph.text
 
-    if content is not None:
+def _split_sentences(text, split=True):
+    # Normalize and split into sentences; without the tokenizer the text stays one piece
+    global _sentence_tokenizer_available
+    text = text.replace('\n', ' ')
+    raw_sentences = [text]
+    if split and _sentence_tokenizer_available is not False:
         try:
-            os.remove(file_path)
-        except Exception:
-            logger.warning("Failed to remove temporary file: %s", file_path)
+            raw_sentences = sent_tokenize(text)
+        except LookupError:
+            # Found at startup but gone now: warn once and stop trying for this process
+            with _sentence_tokenizer_lock:
+                if _sentence_tokenizer_available is not False:
+                    _sentence_tokenizer_available = False
+                    _warn_no_sentence_tokenizer()
+    return [s.strip() for s in raw_sentences if len(s.strip()) > MIN_CHUNK_LENGTH]
 
-    # Normalize and split into sentences
-    try:
-        raw_sentences = sent_tokenize(text.replace('\n', ' '))
-    except LookupError:
-        logger.error("NLTK tokenizer not available. Ensure 'punkt' or appropriate model is installed.")
-        raw_sentences = [text]
-    sentences = [s.strip() for s in raw_sentences if len(s.strip()) > 20]
-
-    # Chunking: Group 2–3 sentences together
-    chunks = []
-    chunk = []
-    max_chunk_length = 500  # Approx. character limit per chunk
-
-    for sentence in sentences:
-        chunk.append(sentence)
-        if sum(len(s) for s in chunk) > max_chunk_length or len(chunk) >= 3:
-            chunks.append(" ".join(chunk).strip())
-            chunk = []
-
-    if chunk:
-        chunks.append(" ".join(chunk).strip())
-
-    # Return LangChain Document format with metadata
-    return [
-        LangDocument(page_content=chunk, metadata={"source": filename})
-        for chunk in chunks if len(chunk.strip()) > 20
-    ]
\ No newline at end of file
+def _make_chunk(filename, sentences, location):
+    # LangChain Document format with metadata
+    return LangDocument(page_content=" ".join(sentences).strip(), metadata={"source": filename, **location})
@@ -0,0 +1,61 @@
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def prefetch_batches(items: Iterable[T], batch_size: int, depth: int = 2) -> Iterator[List[T]]:
+    """Group ``items`` into lists of ``batch_size``, produced on a background thread.
+
+    The producer (e.g. a streaming document parser) runs ahead of the consumer
+    (e.g. the embedding model) by at most ``depth`` batches, so the two overlap
+    while memory stays bounded. An exception raised by the producer is
+    re-raised in the consumer. Closing the returned generator early stops the
+    producer at its next batch.
+    """
+    batches = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def offer(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        batch = []
+        try:
+            for item in items:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not offer(batch):
+                        return
+                    batch = []
+            if batch and not offer(batch):
+                return
+            offer(_DONE)
+        except BaseException as e:
+            offer(e)
+
+    producer = threading.Thread(target=produce, name="batch-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is _DONE:
+                return
+            if isinstance(batch, BaseException):
+                raise batch
+            yield batch
+    finally:
+        stop.set()
+        producer.join(timeout=5)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+import numpy as np
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CircuitBreaker:
+    """Stops sending requests to a dependency that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    :meth:`allow` returns False for ``reset_timeout`` seconds. Then one trial
+    request is let through (half-open): success closes the breaker, failure
+    opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit for %s closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a half-open trial whose request was cancelled before it finished."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies (seconds) with quantile lookup."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The ``q`` quantile of the window, or None until ``min_samples`` were recorded."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            return float(np.quantile(np.fromiter(self._samples, dtype=np.float64), q))
+
+    def __len__(self) -> int:
+        return len(self._samples)
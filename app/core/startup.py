@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterable, Optional
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ComponentUnavailable(Exception):
+    """A component was requested that failed to start (or is still starting, with a timeout)."""
+
+
+class _Component:
+    def __init__(self, name: str, factory: Callable[[], Any], after: Iterable[str], required: bool):
+        self.name = name
+        self.factory = factory
+        self.after = tuple(after)
+        self.required = required
+        self.future = Future()
+        self.state = "pending"  # pending -> starting -> ready | failed
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class Startup:
+    """Builds named components in the background, concurrently where their dependencies allow.
+
+    Components are registered with :meth:`add` (``after`` names the
+    components whose results they need) and built once :meth:`start` is
+    called; nothing is loaded before that. :meth:`get` blocks until a
+    component is built, so code that uses one does not need to know whether
+    startup has finished. Build time is recorded per component. The service
+    is ``ready`` when every required component is built; optional ones
+    (e.g. background document sync) may still be running or have failed.
+    """
+
+    def __init__(self, name: str = "startup"):
+        self.name = name
+        self._components: Dict[str, _Component] = {}
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._remaining = 0
+
+    def add(self, name: str, factory: Callable[[], Any], after: Iterable[str] = (), required: bool = True) -> None:
+        with self._lock:
+            if self._started_at is not None:
+                raise RuntimeError(f"{self.name}: cannot add '{name}' after start")
+            self._components[name] = _Component(name, factory, after, required)
+
+    def start(self) -> None:
+        """Start building every component; returns immediately. Calling it again does nothing."""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.perf_counter()
+            for component in self._components.values():
+                missing = [dep for dep in component.after if dep not in self._components]
+                if missing:
+                    raise ValueError(f"{self.name}: '{component.name}' depends on unknown {missing}")
+            # One thread per component, so waiting on a dependency never starves the pool
+            self._executor = ThreadPoolExecutor(max_workers=max(1, len(self._components)),
+                                                thread_name_prefix=self.name)
+            components = list(self._components.values())
+            self._remaining = len(components)
+        logger.info("%s: starting %d components", self.name, len(components))
+        for component in components:
+            self._executor.submit(self._build, component)
+        self._executor.shutdown(wait=False)
+
+    def _build(self, component: _Component) -> None:
+        try:
+            dependencies = [self._components[dep].future for dep in component.after]
+            for dep, future in zip(component.after, dependencies):
+                if future.exception() is not None:
+                    raise ComponentUnavailable(f"dependency '{dep}' failed")
+            component.state = "starting"
+            component.started_at = time.perf_counter()
+            result = component.factory()
+        except BaseException as e:
+            component.state = "failed"
+            component.error = str(e) or type(e).__name__
+            if component.started_at is not None:
+                component.seconds = time.perf_counter() - component.started_at
+            logger.exception("%s: component '%s' failed", self.name, component.name)
+            component.future.set_exception(e)
+        else:
+            component.seconds = time.perf_counter() - component.started_at
+            component.state = "ready"
+            logger.info("%s: component '%s' ready in %.2fs", self.name, component.name, component.seconds)
+            component.future.set_result(result)
+        with self._lock:
+            self._remaining -= 1
+            finished = self._remaining == 0
+        if finished:
+            logger.info("%s: all components done in %.2fs", self.name, time.perf_counter() - self._started_at)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """The built component, waiting up to ``timeout`` seconds (None = forever) for it."""
+        component = self._components[name]
+        if self._started_at is None:
+            raise ComponentUnavailable(f"{self.name}: '{name}' requested before start()")
+        try:
+            return component.future.result(timeout)
+        except FutureTimeout:
+            raise ComponentUnavailable(f"'{name}' is still starting") from None
+        except Exception as e:
+            raise ComponentUnavailable(f"'{name}' failed to start: {component.error}") from e
+
+    def is_ready(self, name: str) -> bool:
+        return self._components[name].state == "ready"
+
+    @property
+    def started(self) -> bool:
+        return self._started_at is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.started and all(c.state == "ready" for c in self._components.values() if c.required)
+
+    @property
+    def failed(self) -> bool:
+        return any(c.state == "failed" for c in self._components.values() if c.required)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "components": {
+                c.name: {"state": c.state, "required": c.required,
+                         "seconds": round(c.seconds, 3) if c.seconds is not None else None,
+                         **({"error": c.error} if c.error else {})}
+                for c in self._components.values()
+            },
+        }
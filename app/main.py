@@ -1,8 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 # from app.core.config import settings
-from api.routes import router as audio_router
+from api.routes import router as audio_router, health_router, chat_service
 from core.logging_config import get_logger, setup_logging
 import os
 
@@ -10,10 +11,17 @@ import os
 setup_logging()
 logger = get_logger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models and the index load in the background; /readyz reports when they are done
+    chat_service.start()
+    yield
+
 app = FastAPI(
     title="Speech-to-Text API",
     description="API for transcribing speech to text",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -38,6 +46,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(audio_router, prefix="/api/v1", tags=["audio"])
+app.include_router(health_router, tags=["health"])
 logger.info("Routers registered under /api/v1")
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import copy
+import os
+import numpy as np
+from typing import Optional, Tuple
+from core.logging_config import get_logger
+from services.vector_matrix import masked_top_k, top_k_indices
+
+logger = get_logger(__name__)
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    """Index of the best centroid (max inner product) for every row, in bounded-memory batches."""
+    assignments = np.empty(data.shape[0], dtype=np.int32)
+    for start in range(0, data.shape[0], batch_size):
+        block = np.asarray(data[start:start + batch_size], dtype=np.float32)
+        assignments[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def _normalize(rows: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return rows / norms
+
+
+def spherical_kmeans(data: np.ndarray, n_clusters: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """Train unit-norm centroids for cosine/inner-product clustering."""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    centroids = data[rng.choice(data.shape[0], n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = _assign(data, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        non_empty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+        sums = np.add.reduceat(data[order], starts, axis=0)
+
+        new_centroids = centroids.copy()
+        new_centroids[non_empty] = _normalize(sums)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            # Re-seed empty clusters with random points so every list stays useful
+            new_centroids[empty] = data[rng.choice(data.shape[0], empty.size, replace=False)]
+        centroids = new_centroids
+
+    return centroids
+
+
+class IVFFlatIndex:
+    """Inverted-file index with full-precision (flat) rescoring.
+
+    A spherical k-means coarse quantizer splits the vectors into ``nlist``
+    cells. A query scores only the rows in its ``nprobe`` closest cells, read
+    straight from the caller's vector matrix. Cell membership is kept as a
+    compact int32 assignment array plus a lazily rebuilt CSR layout.
+    """
+
+    # Retrain once the corpus has grown this much past the training size
+    RETRAIN_GROWTH_FACTOR = 8
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._order = None
+        self._offsets = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def ntotal(self) -> int:
+        return self._assignments.shape[0]
+
+    def should_retrain(self, n: int) -> bool:
+        return not self.is_trained or n > self.trained_size * self.RETRAIN_GROWTH_FACTOR
+
+    def fit(self, vectors: np.ndarray, max_training_points: int = 64) -> None:
+        """Train the coarse quantizer on ``vectors`` and index all of them."""
+        n = vectors.shape[0]
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(n, nlist * max_training_points)
+        sample = vectors[np.sort(rng.choice(n, sample_size, replace=False))] if sample_size < n else vectors
+
+        logger.info("Training IVF index: %d vectors, %d lists, %d training points", n, nlist, sample_size)
+        self.centroids = spherical_kmeans(sample, nlist, seed=self.seed)
+        self.trained_size = n
+        self._assignments = np.empty(0, dtype=np.int32)
+        self.add(vectors)
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Assign new rows (continuing the id sequence) to their cells."""
+        if not self.is_trained:
+            raise RuntimeError("IVF index must be trained before adding vectors")
+        if vectors.shape[0] == 0:
+            return
+        self._assignments = np.concatenate([self._assignments, _assign(vectors, self.centroids)])
+        self._order = None
+
+    def _build_lists(self) -> None:
+        counts = np.bincount(self._assignments, minlength=self.centroids.shape[0])
+        self._offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._order = np.argsort(self._assignments, kind="stable").astype(np.int64)
+
+    def frozen(self) -> "IVFFlatIndex":
+        """Read-only copy for a published snapshot; later add/fit calls do not affect it."""
+        if self._order is None:
+            self._build_lists()
+        return copy.copy(self)
+
+    def search(self, vectors: np.ndarray, query_vec: np.ndarray, k: int, nprobe: Optional[int] = None,
+               exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(ids, scores)`` of the approximate top-k rows of ``vectors``."""
+        if self._order is None:
+            self._build_lists()
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        probes = top_k_indices(self.centroids @ query_vec, nprobe or self.nprobe)
+        candidates = np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in probes])
+        if candidates.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        candidates.sort()  # sequential access into the (possibly memory-mapped) matrix
+        scores = np.asarray(vectors[candidates], dtype=np.float32) @ query_vec
+        best = masked_top_k(scores, k, None if exclude is None else exclude[candidates])
+        return candidates[best], scores[best]
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, assignments=self._assignments,
+                     trained_size=np.int64(self.trained_size))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            self.centroids = data["centroids"]
+            self._assignments = data["assignments"]
+            self.trained_size = int(data["trained_size"])
+        self._order = None
+
+    def reset(self) -> None:
+        self.centroids = None
+        self.trained_size = 0
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._order = None
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+import numpy as np
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SemanticAnswerCache:
+    """Bounded LRU cache of answers looked up by query-embedding similarity.
+
+    A lookup returns the answer of the most similar cached query whose cosine
+    similarity is at least ``threshold``, so paraphrases of a question share
+    one LLM call. Entries are tied to an index ``version`` (see
+    ``IndexSnapshot.version``): the first lookup or insert with a newer
+    version drops everything, since answers depend on what was retrieved,
+    and answers computed against an older version are not stored.
+    ``ttl`` is in seconds; ``None`` or ``0`` disables expiry.
+    """
+
+    def __init__(self, maxsize: int = 512, threshold: float = 0.92, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl or None
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._vectors: Optional[np.ndarray] = None  # (maxsize, dim) unit vectors, one row per slot
+        self._entries = OrderedDict()  # slot -> (answer, scope, expires_at), least recently used first
+        self._free = list(range(maxsize - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def get(self, query_vec: np.ndarray, version: int, scope: Hashable = None) -> Optional[str]:
+        """Return the cached answer for a near-duplicate query, or None.
+
+        ``scope`` must also match (e.g. the ``k`` used for retrieval).
+        """
+        with self._lock:
+            self._sync_version(version)
+            if self._entries:
+                slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+                scores = self._vectors[slots] @ np.asarray(query_vec, dtype=np.float32)
+                now = time.monotonic()
+                for i in np.argsort(-scores):
+                    if scores[i] < self.threshold:
+                        break
+                    slot = int(slots[i])
+                    answer, entry_scope, expires_at = self._entries[slot]
+                    if expires_at is not None and expires_at <= now:
+                        self._release(slot)
+                        continue
+                    if entry_scope != scope:
+                        continue
+                    self._entries.move_to_end(slot)
+                    self.hits += 1
+                    logger.debug("Semantic answer cache hit (similarity %.3f)", scores[i])
+                    return answer
+            self.misses += 1
+            return None
+
+    def put(self, query_vec: np.ndarray, answer: str, version: int, scope: Hashable = None) -> None:
+        if self.maxsize <= 0:
+            return
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        with self._lock:
+            if self.version is not None and version < self.version:
+                return  # computed against an index that has since changed
+            self._sync_version(version)
+            if self._vectors is None or self._vectors.shape[1] != query_vec.shape[0]:
+                self._vectors = np.zeros((self.maxsize, query_vec.shape[0]), dtype=np.float32)
+                self._entries.clear()
+                self._free = list(range(self.maxsize - 1, -1, -1))
+            if not self._free:
+                self._release(next(iter(self._entries)))
+            slot = self._free.pop()
+            self._vectors[slot] = query_vec
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[slot] = (answer, scope, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "version": self.version,
+            }
+
+    def _sync_version(self, version: int) -> None:
+        if version != self.version:
+            if self._entries:
+                logger.info("Index changed; dropping %d cached answers", len(self._entries))
+            self._clear()
+            self.version = version
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._free = list(range(self.maxsize - 1, -1, -1))
+
+    def _release(self, slot: int) -> None:
+        del self._entries[slot]
+        self._free.append(slot)
@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Dict
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RULE = "rule"
+CACHE = "cache"
+NO_RESULTS = "no_results"
+EXTRACTIVE_CONFIDENT = "extractive_confident"
+EXTRACTIVE_OVER_BUDGET = "extractive_over_budget"
+EXTRACTIVE_FALLBACK = "extractive_fallback"  # the LLM overran the request deadline or failed
+TIMEOUT = "timeout"  # nothing was retrieved before the deadline
+LLM = "llm"
+ROUTES = (RULE, CACHE, NO_RESULTS, EXTRACTIVE_CONFIDENT, EXTRACTIVE_OVER_BUDGET, EXTRACTIVE_FALLBACK, TIMEOUT, LLM)
+
+
+class AnswerRouter:
+    """Decides whether a question needs an LLM call or can be answered extractively.
+
+    The top retrieved chunk is served as-is when its cosine similarity is at
+    least ``confidence_threshold`` and it is at most ``max_extractive_tokens``
+    long, or when the LLM call budget is spent. The budget is a token bucket
+    of ``llm_calls_per_minute`` calls (``0`` means unlimited). Every answered
+    question is counted per route with its latency, for tuning the threshold.
+    A threshold above 1 (the default) never matches, since cosine similarity
+    cannot exceed it.
+    """
+
+    def __init__(self, confidence_threshold: float = 1.1, max_extractive_tokens: int = 64,
+                 llm_calls_per_minute: float = 0):
+        self.confidence_threshold = confidence_threshold
+        self.max_extractive_tokens = max_extractive_tokens
+        self.llm_calls_per_minute = llm_calls_per_minute
+        self._allowance = float(llm_calls_per_minute)
+        self._refilled_at = time.monotonic()
+        self._counts: Dict[str, int] = {route: 0 for route in ROUTES}
+        self._seconds: Dict[str, float] = {route: 0.0 for route in ROUTES}
+        self._lock = threading.Lock()
+
+    def choose(self, top_score: float, top_tokens: int) -> str:
+        """Route for a question whose best chunk has ``top_score`` and ``top_tokens``.
+
+        Returns ``LLM`` only after reserving one call from the budget.
+        """
+        if top_score >= self.confidence_threshold and top_tokens <= self.max_extractive_tokens:
+            return EXTRACTIVE_CONFIDENT
+        if not self._take_llm_call():
+            logger.warning("LLM call budget of %s/min exhausted; serving extractive answer", self.llm_calls_per_minute)
+            return EXTRACTIVE_OVER_BUDGET
+        return LLM
+
+    def record(self, route: str, seconds: float) -> None:
+        with self._lock:
+            self._counts[route] += 1
+            self._seconds[route] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self._counts.values())
+            routes = {
+                route: {
+                    "count": count,
+                    "share": count / total if total else 0.0,
+                    "avg_latency_ms": 1000 * self._seconds[route] / count if count else 0.0,
+                }
+                for route, count in self._counts.items()
+            }
+        return {
+            "total": total,
+            "confidence_threshold": self.confidence_threshold,
+            "max_extractive_tokens": self.max_extractive_tokens,
+            "llm_calls_per_minute": self.llm_calls_per_minute,
+            "routes": routes,
+        }
+
+    def _take_llm_call(self) -> bool:
+        if self.llm_calls_per_minute <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(float(self.llm_calls_per_minute),
+                                  self._allowance + (now - self._refilled_at) * self.llm_calls_per_minute / 60.0)
+            self._refilled_at = now
+            if self._allowance < 1.0:
+                return False
+            self._allowance -= 1.0
+            return True
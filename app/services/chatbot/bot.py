@@ -1,20 +1,35 @@
 # services/chatbot/bot.py
 
-import re
+import os
+from services.chatbot.engine import RuleEngine, load_rules
 from services.chatbot.rules import get_rules, default_response
+from core.config import CHATBOT_RULES_FILE
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 class RuleBasedBot:
-    def __init__(self):
-        self.rules = get_rules()
-        logger.info("RuleBasedBot initialized with %d rules", len(self.rules))
+    def __init__(self, rules_file=CHATBOT_RULES_FILE):
+        rules = get_rules()
+        if rules_file and os.path.exists(rules_file):
+            try:
+                rules += load_rules(rules_file)
+            except Exception:
+                logger.exception("Failed to load chatbot rules from %s", rules_file)
+        else:
+            logger.warning("Chatbot rules file not found: %s", rules_file)
+        try:
+            self.engine = RuleEngine(rules)
+        except Exception:
+            # A bad rules file must not keep the service from starting
+            logger.exception("Failed to compile chatbot rules from %s; using built-in rules only", rules_file)
+            self.engine = RuleEngine(get_rules())
+        logger.info("RuleBasedBot initialized with %d rules", len(self.engine))
 
     def get_response(self, user_input):
-        for pattern, func in self.rules:
-            if re.search(pattern, user_input, re.IGNORECASE):
-                logger.debug("Rule matched: %s", pattern)
-                return func(user_input)
+        rule = self.engine.match(user_input)
+        if rule is not None:
+            logger.debug("Rule matched: %s", rule.name)
+            return rule.respond(user_input)
         logger.debug("No rule matched; using default response")
         return default_response(user_input)
@@ -0,0 +1,166 @@
+# services/chatbot/engine.py
+
+import json
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class Rule:
+    """One response rule: keyword phrases and/or a regex, with a priority.
+
+    Higher ``priority`` wins; rules with equal priority keep their load order.
+    """
+
+    def __init__(self, name: str, respond: Callable[[str], str], keywords: Sequence[str] = (),
+                 pattern: Optional[str] = None, priority: int = 0):
+        if not keywords and not pattern:
+            raise ValueError(f"Rule '{name}' needs keywords or a pattern")
+        self.name = name
+        self.respond = respond
+        self.keywords = [normalize(k) for k in keywords if normalize(k)]
+        self.pattern = pattern
+        self.priority = priority
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, priority={self.priority})"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Load rules from a JSON list of ``{"id", "response", "keywords"?, "pattern"?, "priority"?}``."""
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    rules = []
+    for i, record in enumerate(records):
+        response = record["response"]
+        rules.append(Rule(
+            name=str(record.get("id", i)),
+            respond=lambda _, response=response: response,
+            keywords=record.get("keywords", ()),
+            pattern=record.get("pattern"),
+            priority=int(record.get("priority", 0)),
+        ))
+    return rules
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex alternation of ``phrases`` factored into a character trie.
+
+    ``re`` then walks shared prefixes once instead of trying every
+    alternative at every position, which keeps thousands of phrases cheap.
+    Longer continuations are tried first, so the longest phrase wins at a
+    given position.
+    """
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+
+# A global inline flag group such as "(?i)" or "(?x)"; scoped "(?i:...)" groups combine fine
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _combinable(pattern: "re.Pattern") -> bool:
+    """Whether ``pattern`` keeps its meaning inside a combined ``(?:p1)|(?:p2)`` alternation.
+
+    Groups get renumbered (breaking backreferences) and named groups can
+    clash, and global inline flags are only allowed at the very start.
+    """
+    return pattern.groups == 0 and not _GLOBAL_FLAGS.search(pattern.pattern)
+
+
+class RuleEngine:
+    """Resolves the highest-priority matching rule with one scan of the input.
+
+    All keyword phrases compile into a single trie-factored alternation
+    matched on word boundaries; one ``finditer`` pass collects every rule hit,
+    including overlapping phrases.
+    Each regex is compiled and validated on its own; a rule whose pattern does
+    not compile is logged and skipped. Patterns that are safe to combine (no
+    groups, backreferences or global inline flags) also compile into one
+    alternation that gates them: they are only tried when it matches. Other
+    patterns are always tried. Patterns are checked in priority order, and
+    only while they could still outrank the best keyword hit.
+    """
+
+    def __init__(self, rules: Sequence[Rule]):
+        compiled = {}
+        valid = []
+        for rule in rules:
+            if rule.pattern:
+                try:
+                    compiled[id(rule)] = re.compile(rule.pattern, re.IGNORECASE)
+                except re.error as e:
+                    logger.error("Skipping rule '%s': invalid pattern %r (%s)", rule.name, rule.pattern, e)
+                    continue
+            valid.append(rule)
+        # Stable sort: priority descending, then load order
+        self.rules = sorted(valid, key=lambda r: -r.priority)
+        rank = {id(rule): i for i, rule in enumerate(self.rules)}
+
+        self._keyword_rules: Dict[str, int] = {}
+        for rule in self.rules:
+            for keyword in rule.keywords:
+                self._keyword_rules.setdefault(keyword, rank[id(rule)])
+        # The scan reports the longest phrase starting at each position; fold in
+        # shorter phrases that are word-prefixes of it ("good" within "good morning")
+        for keyword in sorted(self._keyword_rules, key=len):
+            for j, ch in enumerate(keyword):
+                if not (ch.isalnum() or ch == "_") and keyword[:j] in self._keyword_rules:
+                    self._keyword_rules[keyword] = min(self._keyword_rules[keyword], self._keyword_rules[keyword[:j]])
+        self._keyword_re = None
+        if self._keyword_rules:
+            # Zero-width lookahead so overlapping occurrences at every position are seen
+            self._keyword_re = re.compile(r"(?<!\w)(?=(" + _trie_pattern(self._keyword_rules) + r")(?!\w))")
+
+        self._pattern_rules = [(rank[id(rule)], compiled[id(rule)]) for rule in self.rules if rule.pattern]
+        # Patterns the combined gate does not cover are tried even when it misses
+        self._ungated_rules = [(r, p) for r, p in self._pattern_rules if not _combinable(p)]
+        gated = [p.pattern for _, p in self._pattern_rules if _combinable(p)]
+        self._pattern_gate = None
+        if gated:
+            try:
+                self._pattern_gate = re.compile("|".join(f"(?:{p})" for p in gated), re.IGNORECASE)
+            except re.error:
+                logger.exception("Could not combine rule patterns; trying each pattern separately")
+                self._ungated_rules = self._pattern_rules
+        logger.info("Compiled %d rules (%d keyword phrases, %d patterns)",
+                    len(self.rules), len(self._keyword_rules), len(self._pattern_rules))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, text: str) -> Optional[Rule]:
+        best = len(self.rules)
+        if self._keyword_re is not None:
+            for m in self._keyword_re.finditer(normalize(text)):
+                best = min(best, self._keyword_rules[m.group(1)])
+        candidates = self._ungated_rules
+        if self._pattern_gate is not None and self._pattern_gate.search(text):
+            candidates = self._pattern_rules
+        for rank, pattern in candidates:
+            if rank >= best:
+                break
+            if pattern.search(text):
+                best = rank
+                break
+        return self.rules[best] if best < len(self.rules) else None
@@ -1,19 +1,16 @@
 # services/chatbot/rules.py
 
-import re
+from services.chatbot.engine import Rule
 
 
 def get_rules():
-    return [
-        (r"\b(hi|hello|hey|good morning|good evening)\b", respond_greeting),
-        (r"\b(bye|goodbye|see you)\b", respond_farewell),
-    ]
+    """Rules that need code to build their response.
 
-
-def respond_greeting(_): return "Hello! How can I assist you today?"
-
-
-def respond_farewell(_): return "Goodbye! Have a great day."
+    Static FAQ rules live in the rules data file (``CHATBOT_RULES_FILE``);
+    add a ``Rule(name, respond, keywords=..., pattern=..., priority=...)``
+    here only when the response depends on the input.
+    """
+    return []
 
 
 def default_response(_): return ""
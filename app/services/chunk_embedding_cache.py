@@ -0,0 +1,171 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DIGEST_SIZE = 32  # sha256
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+
+
+def content_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class ChunkEmbeddingCache:
+    """Persistent chunk-embedding cache keyed by (model id, sha256 of chunk text).
+
+    Lives outside the vector index so it survives ``clear_index``. Each model
+    gets its own directory holding an append-only float32 vector block and a
+    parallel file of 32-byte digests; vectors are written before their keys, so
+    a row is only visible once both are on disk.
+
+    At most ``max_entries`` rows are kept (0 = unbounded): past that the
+    least recently used rows are dropped down to ``SHRINK_RATIO`` of the limit.
+    Nothing is pruned before that, so a deleted document that is uploaded
+    again only pays for its new chunks. Recency is tracked in memory and
+    persisted as the row order of each rewrite, oldest first.
+    """
+
+    # Fraction of max_entries kept when the cap is hit, so compaction is not repeated on every batch
+    SHRINK_RATIO = 0.75
+
+    def __init__(self, cache_dir: str, model_id: str, max_entries: int = 0):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(cache_dir, hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16])
+        self.keys_path = os.path.join(self.cache_dir, KEYS_FILE)
+        self.vectors_path = os.path.join(self.cache_dir, VECTORS_FILE)
+        self.meta_path = os.path.join(self.cache_dir, META_FILE)
+        self.dim: Optional[int] = None
+        self._rows: Optional[Dict[bytes, int]] = None
+        self._used: Dict[bytes, int] = {}  # digest -> tick of its last lookup or insert
+        self._clock = itertools.count()
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._rows)
+
+    def _ensure_loaded(self) -> None:
+        if self._rows is not None:
+            return
+        with self._lock:
+            if self._rows is not None:
+                return
+            rows = {}
+            try:
+                if os.path.exists(self.meta_path):
+                    with open(self.meta_path, "r", encoding="utf-8") as f:
+                        self.dim = json.load(f)["dim"]
+                    with open(self.keys_path, "rb") as f:
+                        keys = f.read()
+                    row_bytes = self.dim * 4
+                    count = min(len(keys) // DIGEST_SIZE, os.path.getsize(self.vectors_path) // row_bytes)
+                    rows = {keys[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]: i for i in range(count)}
+                    logger.info("Loaded %d cached chunk embeddings from %s", count, self.cache_dir)
+            except Exception:
+                logger.exception("Failed to load chunk embedding cache from %s; starting empty", self.cache_dir)
+                rows = {}
+            self._rows = rows
+            self._vectors = None
+            self._reset_recency()
+
+    def _reset_recency(self) -> None:
+        # Row order is insertion (or last rewrite) order, the best recency known after a load
+        self._used = dict(self._rows)
+        self._clock = itertools.count(len(self._rows))
+
+    def _vector_block(self) -> np.ndarray:
+        if self._vectors is None or self._vectors.shape[0] < len(self._rows):
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim))
+        return self._vectors
+
+    def get_many(self, digests: List[bytes]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """Return ``({position: vector} for hits, [positions of misses])``."""
+        self._ensure_loaded()
+        with self._lock:
+            hits, misses = {}, []
+            positions = [(i, self._rows.get(d)) for i, d in enumerate(digests)]
+            if any(row is not None for _, row in positions):
+                block = self._vector_block()
+            for i, row in positions:
+                if row is None:
+                    misses.append(i)
+                else:
+                    hits[i] = np.array(block[row])
+                    self._used[digests[i]] = next(self._clock)
+            return hits, misses
+
+    def put_many(self, digests: List[bytes], vectors: np.ndarray) -> None:
+        self._ensure_loaded()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            new = [(d, v) for d, v in zip(digests, vectors) if d not in self._rows]
+            if not new:
+                return
+            seen, unique = set(), []
+            for d, v in new:
+                if d not in seen:
+                    seen.add(d)
+                    unique.append((d, v))
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_id": self.model_id, "dim": self.dim}, f)
+
+            start = len(self._rows)
+            row_bytes = self.dim * 4
+            # fsync'd so each indexing batch is a durable checkpoint an interrupted run resumes from
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(start * row_bytes)
+                f.write(np.stack([v for _, v in unique]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, "ab") as f:
+                f.truncate(start * DIGEST_SIZE)
+                f.write(b"".join(d for d, _ in unique))
+                f.flush()
+                os.fsync(f.fileno())
+            for offset, (d, _) in enumerate(unique):
+                self._rows[d] = start + offset
+                self._used[d] = next(self._clock)
+            if self.max_entries and len(self._rows) > self.max_entries:
+                keep = int(self.max_entries * self.SHRINK_RATIO)
+                logger.info("Chunk embedding cache over %d entries; keeping the %d most recently used",
+                            self.max_entries, keep)
+                self._rewrite(sorted(self._rows, key=self._used.get)[-keep:] if keep else [])
+
+    def _rewrite(self, keep: List[bytes]) -> None:
+        """Rewrite the files holding only ``keep`` (in order). Caller holds ``_lock``.
+
+        The keys file is emptied first, so a crash at any point leaves either
+        an empty cache or the new one, never keys pointing at the wrong rows.
+        """
+        block = self._vector_block() if keep else None
+        vectors = np.ascontiguousarray(block[[self._rows[d] for d in keep]]) if keep else np.empty((0, 0), np.float32)
+        tmp_vectors, tmp_keys = self.vectors_path + ".tmp", self.keys_path + ".tmp"
+        for path, data in ((tmp_vectors, vectors.tobytes()), (tmp_keys, b"".join(keep))):
+            with open(path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        self._vectors = None  # drop the mapping of the old file before replacing it
+        with open(self.keys_path, "r+b") as f:
+            f.truncate(0)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
+        self._rows = {d: i for i, d in enumerate(keep)}
+        self._reset_recency()
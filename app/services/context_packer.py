@@ -0,0 +1,75 @@
+from typing import Callable, Iterator, List, Optional, Sequence
+import numpy as np
+from langchain.schema import Document
+from core.cache import LRUCache
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def mmr_order(query_vec: np.ndarray, vectors: np.ndarray, mmr_lambda: float = 0.5) -> Iterator[int]:
+    """Yield row indices of ``vectors`` in maximal-marginal-relevance order.
+
+    Each step picks the row maximizing ``lambda * sim(query, row) -
+    (1 - lambda) * max sim(row, already picked)``, so near-duplicates of an
+    earlier pick sink to the end. Vectors are expected to be unit length.
+    """
+    n = vectors.shape[0]
+    if not n:
+        return
+    relevance = vectors @ np.asarray(query_vec, dtype=vectors.dtype)
+    redundancy = np.zeros(n, dtype=np.float32)
+    remaining = np.ones(n, dtype=bool)
+    for _ in range(n):
+        score = np.where(remaining, mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(score))
+        remaining[best] = False
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+        yield best
+
+
+class ContextPacker:
+    """Selects the retrieved chunks that go into the LLM prompt.
+
+    Candidates are taken in MMR order (see :func:`mmr_order`) and added while
+    they fit in ``token_budget`` tokens as measured by ``count_tokens``; a
+    chunk that does not fit is skipped in favour of smaller later ones. If not
+    even the best chunk fits, it is cut to the budget with ``truncate`` so the
+    prompt is never empty. Token counts are cached per chunk text.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int = 1024, mmr_lambda: float = 0.5,
+                 truncate: Optional[Callable[[str, int], str]] = None, cache_size: int = 4096):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+        self.truncate = truncate
+        self._token_counts = LRUCache(maxsize=cache_size)
+
+    def pack(self, query_vec: np.ndarray, docs: Sequence[Document], vectors: np.ndarray, k: int) -> List[Document]:
+        """Return at most ``k`` of ``docs`` (whose embeddings are ``vectors``) within the token budget."""
+        packed, used = [], 0
+        for i in mmr_order(query_vec, np.asarray(vectors, dtype=np.float32), self.mmr_lambda):
+            if len(packed) >= k or used >= self.token_budget:
+                break
+            tokens = self.token_count(docs[i].page_content.strip())
+            if used + tokens <= self.token_budget:
+                packed.append(docs[i])
+                used += tokens
+        if not packed and len(docs):
+            best = docs[int(np.argmax(np.asarray(vectors, dtype=np.float32) @ np.asarray(query_vec, dtype=np.float32)))]
+            text = best.page_content.strip()
+            if self.truncate is not None:
+                text = self.truncate(text, self.token_budget)
+            packed.append(Document(page_content=text, metadata=best.metadata))
+            used = self.token_count(text)
+        logger.debug("Packed %d of %d retrieved chunks into %d/%d context tokens",
+                     len(packed), len(docs), used, self.token_budget)
+        return packed
+
+    def token_count(self, text: str) -> int:
+        count = self._token_counts.get(text)
+        if count is None:
+            count = self.count_tokens(text)
+            self._token_counts.put(text, count)
+        return count
@@ -0,0 +1,74 @@
+from typing import Optional
+import numpy as np
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# "torch": stock fp32 PyTorch (the reference); "torch-int8": Linear layers dynamically quantized to int8;
+# "onnx": ONNX Runtime, optionally from a pre-quantized ONNX file shipped with the model
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def load_sentence_transformer(model_path: str, backend: str = "torch", threads: int = 0,
+                              onnx_file: Optional[str] = None):
+    """Load ``model_path`` as a SentenceTransformer running on the given CPU inference backend.
+
+    ``threads > 0`` sets the intra-op thread count (torch process-wide, or the
+    ONNX Runtime session). The ``onnx`` backend needs ``sentence-transformers[onnx]``
+    and exports the model on first load if it has no ONNX file; ``onnx_file``
+    selects a specific file inside the model, e.g. ``onnx/model_qint8_avx512_vnni.onnx``.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (expected one of {EMBEDDING_BACKENDS})")
+
+    if backend == "onnx":
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if onnx_file:
+            model_kwargs["file_name"] = onnx_file
+        if threads > 0:
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = session_options
+        return SentenceTransformer(model_path, backend="onnx", model_kwargs=model_kwargs)
+
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+    if backend == "torch":
+        return SentenceTransformer(model_path)
+
+    import torch
+    model = SentenceTransformer(model_path, device="cpu")
+    model.eval()
+    torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def parity_report(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> dict:
+    """Compare unit-norm embeddings of the same texts from a reference and a candidate backend.
+
+    Reports the per-text cosine similarity between the two versions and how
+    many of each text's top-k nearest neighbours (within the set) the
+    candidate recovers, the quantity retrieval quality depends on.
+    """
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    cosine = np.sum(reference * candidate, axis=1)
+    k = min(k, reference.shape[0] - 1)
+    recall = 1.0
+    if k > 0:
+        def neighbours(x):
+            scores = x @ x.T
+            np.fill_diagonal(scores, -np.inf)
+            return np.argpartition(-scores, k, axis=1)[:, :k]
+        ref_nn, cand_nn = neighbours(reference), neighbours(candidate)
+        recall = float(np.mean([len(np.intersect1d(a, b)) / k for a, b in zip(ref_nn, cand_nn)]))
+    return {
+        "texts": int(reference.shape[0]),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        f"neighbour_recall@{k}": recall,
+    }
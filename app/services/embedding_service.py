@@ -1,17 +1,32 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
+from core.batching import MicroBatcher
+from core.cache import LRUCache
+from core.config import (EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL, EMBEDDING_CACHE_DIR, QUERY_BATCH_MAX,
+                         QUERY_BATCH_WAIT_MS, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE, EMBEDDING_THREADS,
+                         EMBEDDING_CACHE_MAX_CHUNKS)
 from core.logging_config import get_logger
+from services.chunk_embedding_cache import ChunkEmbeddingCache, content_hash
+from services.embedding_backends import load_sentence_transformer
 
 logger = get_logger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_path: str):
-        logger.info("Loading SentenceTransformer model from %s", model_path)
+    def __init__(self, model_path: str, backend: str = EMBEDDING_BACKEND):
+        logger.info("Loading SentenceTransformer model from %s (%s backend)", model_path, backend)
         try:
-            self.model = SentenceTransformer(model_path)
+            self.model = load_sentence_transformer(model_path, backend, EMBEDDING_THREADS, EMBEDDING_ONNX_FILE)
         except Exception:
             logger.exception("Failed to load SentenceTransformer model")
             raise
+        self.backend = backend
+        # Optimized backends give slightly different vectors, so their cached embeddings are kept apart
+        self.model_id = model_path if backend == "torch" else f"{model_path}@{backend}"
+        if backend == "onnx" and EMBEDDING_ONNX_FILE:
+            self.model_id += f":{EMBEDDING_ONNX_FILE}"
+        self.query_cache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+        self.chunk_cache = ChunkEmbeddingCache(EMBEDDING_CACHE_DIR, self.model_id, EMBEDDING_CACHE_MAX_CHUNKS)
+        # Cache misses from concurrent requests share one forward pass
+        self.query_batcher = MicroBatcher(self.embed, QUERY_BATCH_MAX, QUERY_BATCH_WAIT_MS / 1000, name="query-embed")
 
     def embed(self, texts: list[str]) -> np.ndarray:
         try:
@@ -20,17 +35,96 @@ class EmbeddingService:
             logger.exception("Embedding generation failed for batch of size %d", len(texts) if hasattr(texts, '__len__') else -1)
             raise
 
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        """Embed document chunks, reusing persisted embeddings of unchanged chunk text.
+
+        Only chunks whose (model id, sha256) is not in the chunk cache go through the model.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        digests = [content_hash(t) for t in texts]
+        try:
+            hits, misses = self.chunk_cache.get_many(digests)
+        except Exception:
+            logger.exception("Chunk embedding cache lookup failed; embedding all chunks")
+            hits, misses = {}, list(range(len(texts)))
+        logger.info("Chunk embedding cache: %d hits, %d to embed", len(hits), len(misses))
+
+        if misses:
+            fresh = np.asarray(self.embed([texts[i] for i in misses]), dtype=np.float32)
+            try:
+                self.chunk_cache.put_many([digests[i] for i in misses], fresh)
+            except Exception:
+                logger.exception("Failed to persist chunk embeddings")
+            if not hits:
+                return fresh
+            dim = fresh.shape[1]
+        else:
+            dim = next(iter(hits.values())).shape[0]
+
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for i, vector in hits.items():
+            embeddings[i] = vector
+        if misses:
+            embeddings[misses] = fresh
+        return embeddings
+
     def embed_single(self, text: str) -> np.ndarray:
         """Generate embedding for a single text
 
+        Repeated queries are served from an LRU cache keyed on the model id and
+        the whitespace/case-normalized text, skipping the transformer entirely.
+        Misses go through the micro-batcher, which embeds queries arriving
+        from concurrent requests together.
+
         Args:
             text: Text to embed
 
         Returns:
-            Embedding vector as numpy array
+            Embedding vector as numpy array (read-only when cached)
+        """
+        key = (self.model_id, self._normalize(text))
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            vector = self.query_batcher.submit(text)
+        except Exception:
+            logger.exception("Embedding generation failed for single text")
+            raise
+        return self._remember(key, vector)
+
+    async def aembed_single(self, text: str) -> np.ndarray:
+        """Async :meth:`embed_single` for the request path.
+
+        Waiting for the batch does not hold a worker thread, so batches can
+        grow past the size of the CPU executor (up to ``QUERY_BATCH_MAX``).
         """
+        key = (self.model_id, self._normalize(text))
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            return self.embed([text])[0]
+            vector = await self.query_batcher.asubmit(text)
         except Exception:
             logger.exception("Embedding generation failed for single text")
-            raise
\ No newline at end of file
+            raise
+        return self._remember(key, vector)
+
+    def _remember(self, key, vector: np.ndarray) -> np.ndarray:
+        vector = vector.copy()
+        vector.setflags(write=False)  # shared between callers via the cache
+        self.query_cache.put(key, vector)
+        return vector
+
+    def cache_stats(self) -> dict:
+        return self.query_cache.stats()
+
+    def batch_stats(self) -> dict:
+        return self.query_batcher.stats()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.split()).casefold()
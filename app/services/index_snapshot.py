@@ -0,0 +1,125 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from core.logging_config import get_logger
+from services.lexical_index import reciprocal_rank_fusion
+from services.vector_matrix import masked_top_k
+
+logger = get_logger(__name__)
+
+
+class Generation:
+    """Reader refcount for one on-disk index generation.
+
+    Once retired (a newer generation was published) its directory is removed
+    as soon as the last in-flight query using it finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._readers = 0
+        self._on_idle: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._readers += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._readers -= 1
+            cleanup = self._on_idle if self._readers == 0 else None
+            if cleanup:
+                self._on_idle = None
+        if cleanup:
+            self._cleanup(cleanup)
+
+    def retire(self, cleanup: Callable[[], None]) -> None:
+        with self._lock:
+            if self._readers:
+                logger.debug("Generation %s retired with %d in-flight readers", self.name, self._readers)
+                self._on_idle = cleanup
+                return
+        self._cleanup(cleanup)
+
+    def _cleanup(self, cleanup: Callable[[], None]) -> None:
+        try:
+            cleanup()
+            logger.info("Garbage-collected index generation %s", self.name)
+        except Exception:
+            logger.exception("Failed to garbage-collect index generation %s", self.name)
+
+
+class IndexSnapshot:
+    """Immutable, self-consistent view of the index that queries run against.
+
+    Writers never mutate a published snapshot: appends land past the end of the
+    views it holds and every other change builds new arrays, after which the
+    service swaps in a fresh snapshot with a single reference assignment.
+    """
+
+    def __init__(self, generation: Generation, vectors: np.ndarray, documents: List[Document],
+                 deleted: np.ndarray, codes: Optional[np.ndarray] = None, quantizer=None,
+                 ann_index=None, rescore_factor: int = 4, lexical_index=None, hybrid_candidates: int = 4,
+                 rrf_k: int = 60, version: int = 0):
+        self.generation = generation
+        # Increases with every publish; caches derived from search results key on it
+        self.version = version
+        self.vectors = vectors
+        self.count = vectors.shape[0] if vectors.size else 0
+        self.documents = documents  # shared, append-only; only the first ``count`` entries belong to this snapshot
+        self.deleted = deleted
+        self.codes = codes
+        self.quantizer = quantizer
+        self.ann_index = ann_index
+        self.rescore_factor = rescore_factor
+        self.lexical_index = lexical_index
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.live_count = self.count - int(deleted[:self.count].sum())
+
+    @contextmanager
+    def reading(self):
+        """Pin this snapshot's on-disk generation for the duration of a query."""
+        self.generation.acquire()
+        try:
+            yield self
+        finally:
+            self.generation.release()
+
+    def search(self, query_vec: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(row ids, scores)`` of the top-k live rows."""
+        if not self.live_count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        exclude = self.deleted if self.deleted.any() else None
+        if self.ann_index is not None:
+            return self.ann_index.search(self.vectors, query_vec, k, exclude=exclude)
+        if self.quantizer is not None:
+            return self.quantizer.search(self.codes, self.vectors, query_vec, k, self.rescore_factor, exclude=exclude)
+        scores = self.vectors @ np.asarray(query_vec, dtype=self.vectors.dtype)
+        indices = masked_top_k(scores, k, exclude)
+        return indices, scores[indices]
+
+    def hybrid_search(self, query_vec: np.ndarray, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Fuse the dense and BM25 rankings of ``query`` with reciprocal-rank fusion.
+
+        Each retriever contributes ``k * hybrid_candidates`` candidates. Rows
+        come back in fused order with their cosine similarity, so scores mean
+        the same as for :meth:`search`. Without a lexical index this is
+        :meth:`search`.
+        """
+        if self.lexical_index is None or not query or not self.live_count:
+            return self.search(query_vec, k)
+        n_candidates = max(k, k * self.hybrid_candidates)
+        dense_ids, dense_scores = self.search(query_vec, n_candidates)
+        exclude = self.deleted if self.deleted.any() else None
+        lexical_ids, _ = self.lexical_index.search(query, n_candidates, exclude=exclude)
+        if not len(lexical_ids):
+            return dense_ids[:k], dense_scores[:k]
+        # Exact keyword hits win ties: they are what the embedding tends to miss
+        indices = reciprocal_rank_fusion([lexical_ids, dense_ids], k, self.rrf_k)
+        rows = np.sort(indices)  # sequential access into the (possibly memory-mapped) matrix
+        scores = np.asarray(self.vectors[rows], dtype=np.float32) @ np.asarray(query_vec, dtype=np.float32)
+        return indices, scores[np.searchsorted(rows, indices)]
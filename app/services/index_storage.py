@@ -0,0 +1,259 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from typing import List, Optional, Tuple
+from langchain.schema import Document
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f32"
+DOCUMENTS_FILE = "documents.jsonl"
+ANN_FILE = "ivf.npz"
+QUANTIZER_FILE = "quantizer.npz"
+CODES_FILE = "codes.bin"
+LEXICAL_FILE = "bm25.npz"
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+
+class IndexStorage:
+    """Versioned on-disk layout for the vector index.
+
+    The index directory holds:
+
+    - ``vectors.f32``: raw row-major float32 vectors, opened with ``np.memmap``
+    - ``documents.jsonl``: one JSON object per chunk (page_content + metadata), append-only
+    - ``manifest.json``: format version, dimension, committed row/byte counts and
+      tombstoned (deleted) row ranges
+    - ``ivf.npz``: optional ANN index state (centroids + cell assignments)
+    - ``quantizer.npz`` / ``codes.bin``: optional compact codes used for the coarse scan
+    - ``bm25.npz``: optional BM25 posting lists for hybrid (lexical + dense) retrieval
+
+    The manifest is the commit point. Data files are appended first and the
+    manifest is replaced atomically afterwards, so a crash mid-write leaves
+    uncommitted bytes at the tail which are truncated on the next append.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        self.vectors_path = os.path.join(index_dir, VECTORS_FILE)
+        self.documents_path = os.path.join(index_dir, DOCUMENTS_FILE)
+        self.ann_path = os.path.join(index_dir, ANN_FILE)
+        self.quantizer_path = os.path.join(index_dir, QUANTIZER_FILE)
+        self.codes_path = os.path.join(index_dir, CODES_FILE)
+        self.lexical_path = os.path.join(index_dir, LEXICAL_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def read_manifest(self) -> Optional[dict]:
+        if not self.exists():
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        version = manifest.get("format_version")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format version {version} (expected {FORMAT_VERSION})")
+        return manifest
+
+    def load(self) -> Tuple[np.ndarray, List[Document]]:
+        """Return a read-only memory map of the vectors and the committed documents."""
+        vectors, documents = self.load_vectors(), self.load_documents()
+        if len(documents) != vectors.shape[0]:
+            raise ValueError(f"Index is inconsistent: {vectors.shape[0]} vectors but {len(documents)} documents")
+        return vectors, documents
+
+    def load_vectors(self) -> np.ndarray:
+        manifest = self.read_manifest()
+        if not manifest or manifest["count"] == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.dtype(manifest["dtype"]), mode="r",
+                         shape=(manifest["count"], manifest["dim"]))
+
+    def load_documents(self) -> List[Document]:
+        manifest = self.read_manifest()
+        if not manifest or manifest["count"] == 0:
+            return []
+        documents = []
+        with open(self.documents_path, "rb") as f:
+            for line in f.read(manifest["documents_bytes"]).splitlines():
+                record = json.loads(line)
+                documents.append(Document(page_content=record["page_content"], metadata=record.get("metadata", {})))
+        return documents
+
+    def load_codes(self, dtype: np.dtype, dim: int, max_rows: int) -> np.ndarray:
+        """Memory-map the persisted codes, up to ``max_rows`` committed rows."""
+        row_bytes = dim * np.dtype(dtype).itemsize
+        if not os.path.exists(self.codes_path) or max_rows == 0:
+            return np.empty((0, dim), dtype=dtype)
+        rows = min(os.path.getsize(self.codes_path) // row_bytes, max_rows)
+        if rows == 0:
+            return np.empty((0, dim), dtype=dtype)
+        return np.memmap(self.codes_path, dtype=dtype, mode="r", shape=(rows, dim))
+
+    def append_codes(self, codes: np.ndarray, start_row: int) -> None:
+        """Write code rows starting at ``start_row``, dropping anything stored past it."""
+        codes = np.ascontiguousarray(codes)
+        os.makedirs(self.index_dir, exist_ok=True)
+        if start_row == 0:
+            # Full rewrite goes through a rename so existing memory maps keep the old inode
+            tmp_path = self.codes_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(codes.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.codes_path)
+            return
+        self._append_bytes(self.codes_path, start_row * codes.shape[1] * codes.dtype.itemsize, codes.tobytes())
+
+    def append(self, vectors: np.ndarray, documents: List[Document], hidden: bool = False) -> None:
+        """Append rows to the data files and commit them in the manifest.
+
+        ``hidden`` rows are committed already tombstoned, so they stay
+        invisible on load until :meth:`mark_deleted` restores their range.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape[0] != len(documents):
+            raise ValueError("Number of vectors and documents must match")
+        if not documents:
+            return
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest = self.read_manifest() or {
+            "format_version": FORMAT_VERSION,
+            "dtype": "float32",
+            "dim": int(vectors.shape[1]),
+            "count": 0,
+            "documents_bytes": 0,
+            "deleted": [],
+        }
+        if vectors.shape[1] != manifest["dim"]:
+            raise ValueError(f"Vector dimension mismatch: index has {manifest['dim']}, got {vectors.shape[1]}")
+
+        row_bytes = manifest["dim"] * np.dtype(manifest["dtype"]).itemsize
+        lines = b"".join(
+            json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False).encode("utf-8") + b"\n"
+            for doc in documents
+        )
+        self._append_bytes(self.vectors_path, manifest["count"] * row_bytes, vectors.tobytes())
+        self._append_bytes(self.documents_path, manifest["documents_bytes"], lines)
+
+        if hidden:
+            manifest.setdefault("deleted", []).append([manifest["count"], manifest["count"] + len(documents)])
+        manifest["count"] += len(documents)
+        manifest["documents_bytes"] += len(lines)
+        self._write_manifest(manifest)
+
+    def load_deleted(self) -> List[List[int]]:
+        """Return the tombstoned ``[start, end)`` row ranges."""
+        manifest = self.read_manifest()
+        return manifest.get("deleted", []) if manifest else []
+
+    def mark_deleted(self, ranges: List[Tuple[int, int]], restore: List[Tuple[int, int]] = ()) -> None:
+        """Tombstone row ranges; the rows stay in the data files until the next rewrite.
+
+        ``restore`` names ranges appended ``hidden`` to make visible in the same
+        manifest write, so replacing rows is a single commit.
+        """
+        manifest = self.read_manifest()
+        if not manifest or not (ranges or restore):
+            return
+        restored = {(int(start), int(end)) for start, end in restore}
+        deleted = [entry for entry in manifest.get("deleted", []) if tuple(entry) not in restored]
+        manifest["deleted"] = deleted + [[int(start), int(end)] for start, end in ranges]
+        self._write_manifest(manifest)
+
+    def reset(self) -> None:
+        if os.path.isdir(self.index_dir):
+            shutil.rmtree(self.index_dir)
+
+    def _append_bytes(self, path: str, committed_size: int, payload: bytes) -> None:
+        # Open without truncating, drop any uncommitted tail, then append
+        with open(path, "ab") as f:
+            f.truncate(committed_size)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+
+class IndexDirectory:
+    """Root directory holding one sub-directory per index generation.
+
+    ``CURRENT`` names the live generation. A rebuilt or compacted index is
+    written to a fresh generation and published by atomically replacing
+    ``CURRENT``, so a crash or a concurrent reader never sees a partial index.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.current_path = os.path.join(root, CURRENT_FILE)
+
+    def current_name(self) -> Optional[str]:
+        if not os.path.exists(self.current_path):
+            return None
+        with open(self.current_path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+
+    def current(self) -> Optional[IndexStorage]:
+        name = self.current_name()
+        if name is None and os.path.exists(os.path.join(self.root, MANIFEST_FILE)):
+            name = self._migrate_flat_layout()
+        return IndexStorage(os.path.join(self.root, name)) if name else None
+
+    def create(self) -> IndexStorage:
+        """Storage for a new, unpublished generation."""
+        name = f"{GENERATION_PREFIX}{time.time_ns()}"
+        return IndexStorage(os.path.join(self.root, name))
+
+    def publish(self, storage: IndexStorage) -> None:
+        os.makedirs(storage.index_dir, exist_ok=True)
+        tmp_path = self.current_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(storage.index_dir))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+        logger.info("Published index generation %s", storage.index_dir)
+
+    def is_current(self, storage: IndexStorage) -> bool:
+        return self.current_name() == os.path.basename(storage.index_dir)
+
+    def remove(self, storage: IndexStorage) -> None:
+        if os.path.dirname(os.path.abspath(storage.index_dir)) == os.path.abspath(self.root):
+            storage.reset()
+
+    def remove_stale(self) -> None:
+        """Delete generations left behind by interrupted rebuilds or crashes."""
+        if not os.path.isdir(self.root):
+            return
+        current = self.current_name()
+        for name in os.listdir(self.root):
+            if name.startswith(GENERATION_PREFIX) and name != current:
+                logger.info("Removing stale index generation %s", name)
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def _migrate_flat_layout(self) -> str:
+        # Indexes written before generations existed keep their files directly in the root
+        storage = self.create()
+        os.makedirs(storage.index_dir)
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isfile(path):
+                os.replace(path, os.path.join(storage.index_dir, name))
+        self.publish(storage)
+        logger.info("Migrated flat index layout into generation %s", storage.index_dir)
+        return os.path.basename(storage.index_dir)
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity; callers should retry later."""
+
+
+class Job:
+    """State of one background job. Mutated only by the worker running it."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued"  # queued -> running -> done | failed
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update(self, stage: str, progress: Optional[float] = None) -> None:
+        """Progress callback handed to the job function."""
+        self.stage = stage
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """In-process job queue served by a fixed pool of worker threads.
+
+    ``max_pending`` bounds the backlog: ``submit`` raises ``QueueFullError``
+    instead of accepting unbounded work. Finished jobs are kept (up to
+    ``history``) so their status can still be queried.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 16, history: int = 256, name: str = "jobs"):
+        self.name = name
+        self.history = history
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        for i in range(max(1, workers)):
+            worker = threading.Thread(target=self._run, name=f"{name}-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info("Started job queue '%s' with %d workers, max %d pending", name, len(self._workers), max_pending)
+
+    def submit(self, name: str, func: Callable[[Callable[..., None]], object]) -> Job:
+        """Queue ``func(progress)``; ``progress(stage, fraction=None)`` reports status."""
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+            try:
+                self._queue.put_nowait((job, func))
+            except queue.Full:
+                del self._jobs[job.id]
+                raise QueueFullError(f"Job queue '{self.name}' is full ({self._queue.maxsize} pending)")
+            self._trim()
+        logger.info("Queued job %s (%s)", job.id, name)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self) -> None:
+        while True:
+            job, func = self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = func(job.update)
+                job.status = "done"
+                job.update("done", 1.0)
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.id, job.name)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+                logger.info("Job %s (%s) %s in %.2fs", job.id, job.name, job.status, job.finished_at - job.started_at)
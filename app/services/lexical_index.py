@@ -0,0 +1,210 @@
+import copy
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from core.logging_config import get_logger
+from services.vector_matrix import masked_top_k
+
+logger = get_logger(__name__)
+
+# Words joined by -, ., / or _ stay together ("AB-1234", "v2.1") and are indexed as parts too
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+_PART_RE = re.compile(r"[^\W_]+")
+MAX_TOKEN_LENGTH = 64
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was what when "
+    "where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Casefolded terms of ``text``; compound codes also yield their alphanumeric parts."""
+    terms = []
+    for token in _TOKEN_RE.findall(text.casefold()):
+        if len(token) > MAX_TOKEN_LENGTH:
+            continue
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1 or parts and parts[0] != token:
+            terms.append(token)
+        terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], k: int, rrf_k: int = 60) -> np.ndarray:
+    """Fuse ranked id lists by summing ``1 / (rrf_k + rank)``; returns the fused top-k ids.
+
+    Ties go to the id that appears first when the rankings are read in order,
+    so list the ranking to favour first.
+    """
+    rankings = [np.asarray(r, dtype=np.int64) for r in rankings if len(r)]
+    if not rankings:
+        return np.empty(0, dtype=np.int64)
+    ids = np.concatenate(rankings)
+    weights = np.concatenate([1.0 / (rrf_k + np.arange(1, len(r) + 1)) for r in rankings])
+    unique, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=weights)
+    first_seen = np.full(unique.shape[0], ids.shape[0], dtype=np.int64)
+    np.minimum.at(first_seen, inverse, np.arange(ids.shape[0]))
+    return unique[np.lexsort((first_seen, -fused))[:k]]
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over the rows of the vector store.
+
+    Each term maps to a pair of compact posting arrays (int32 row ids in
+    ascending order, uint16 term frequencies). Candidates come from the
+    postings of the query's selective terms only; terms found in more than
+    ``COMMON_TERM_RATIO`` of the rows just add their score to those
+    candidates by binary search, so a query never walks a near-corpus-sized
+    posting list unless all of its terms are common.
+
+    Postings live in two tiers: a large base and a small delta holding the
+    rows added since the last :meth:`merge`. ``add`` only rebuilds the delta,
+    so an upload costs time proportional to the recent rows, not the corpus;
+    the owner merges once :attr:`merge_due` (the delta reached
+    ``MERGE_RATIO`` of the base). Neither tier is modified in place, so a
+    :meth:`frozen` copy held by a published snapshot is unaffected.
+    """
+
+    # Terms in a larger share of rows score candidates but do not generate them
+    COMMON_TERM_RATIO = 0.05
+    # The delta is folded into the base once it holds this share of the base rows (and MIN_MERGE_ROWS)
+    MERGE_RATIO = 0.1
+    MIN_MERGE_ROWS = 1024
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.reset()
+
+    @property
+    def ntotal(self) -> int:
+        return self._doc_lens.shape[0]
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._base) + sum(1 for term in self._delta if term not in self._base)
+
+    @property
+    def merge_due(self) -> bool:
+        pending = self.ntotal - self._base_rows
+        return pending >= max(self.MIN_MERGE_ROWS, self.MERGE_RATIO * self._base_rows)
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Index ``texts`` as the next rows (continuing the row id sequence)."""
+        start = self.ntotal
+        new: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = []
+        for offset, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                ids, tfs = new.setdefault(term, ([], []))
+                ids.append(start + offset)
+                tfs.append(min(tf, np.iinfo(np.uint16).max))
+        if not lengths:
+            return
+
+        delta = dict(self._delta)
+        for term, (ids, tfs) in new.items():
+            ids, tfs = np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.uint16)
+            if term in delta:
+                old_ids, old_tfs = delta[term]
+                ids, tfs = np.concatenate([old_ids, ids]), np.concatenate([old_tfs, tfs])
+            delta[term] = (ids, tfs)
+        self._delta = delta
+        self._append_lengths(np.asarray(lengths, dtype=np.float32))
+
+    def _append_lengths(self, lengths: np.ndarray) -> None:
+        # Rows are written past the end of every published view, so frozen copies never see them
+        n = self.ntotal
+        if n + lengths.shape[0] > self._lens_buffer.shape[0]:
+            grown = np.empty(max(2 * self._lens_buffer.shape[0], n + lengths.shape[0], 1024), dtype=np.float32)
+            grown[:n] = self._doc_lens
+            self._lens_buffer = grown
+        self._lens_buffer[n:n + lengths.shape[0]] = lengths
+        self._doc_lens = self._lens_buffer[:n + lengths.shape[0]]
+        self._total_len += float(lengths.sum())
+
+    def merge(self) -> None:
+        """Fold the delta postings into the base."""
+        if not self._delta:
+            self._base_rows = self.ntotal
+            return
+        base = dict(self._base)
+        for term, (ids, tfs) in self._delta.items():
+            if term in base:
+                old_ids, old_tfs = base[term]
+                ids, tfs = np.concatenate([old_ids, ids]), np.concatenate([old_tfs, tfs])
+            base[term] = (ids, tfs)
+        self._base, self._delta, self._base_rows = base, {}, self.ntotal
+
+    def frozen(self) -> "BM25Index":
+        """Read-only copy for a published snapshot; later add/merge/reset calls do not affect it."""
+        return copy.copy(self)
+
+    def _segments(self, term: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Posting segments of ``term``, base first; row ids ascend across them."""
+        return [tier[term] for tier in (self._base, self._delta) if term in tier]
+
+    def search(self, query: str, k: int, exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(row ids, BM25 scores)`` of the top-k rows sharing a term with ``query``."""
+        postings = {term: self._segments(term) for term in set(tokenize(query))}
+        postings = {term: segments for term, segments in postings.items() if segments}
+        if not postings or not self.ntotal:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        n = self.ntotal
+        avg_len = self._total_len / n if self._total_len else 1.0
+        dfs = {term: sum(ids.shape[0] for ids, _ in segments) for term, segments in postings.items()}
+        selective = [term for term in postings if dfs[term] <= self.COMMON_TERM_RATIO * n]
+        candidates = np.unique(np.concatenate([ids for term in selective or postings for ids, _ in postings[term]]))
+        scores = np.zeros(candidates.shape[0], dtype=np.float32)
+        for term, segments in postings.items():
+            df = dfs[term]
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            for ids, tfs in segments:
+                positions = np.minimum(np.searchsorted(ids, candidates), ids.shape[0] - 1)
+                found = ids[positions] == candidates
+                tf = tfs[positions[found]].astype(np.float32)
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lens[candidates[found]] / avg_len)
+                scores[found] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        best = masked_top_k(scores, k, None if exclude is None else exclude[candidates])
+        return candidates[best].astype(np.int64), scores[best]
+
+    def save(self, path: str) -> None:
+        """Write the whole index (both tiers) to ``path``; fsync'd before it replaces the old file."""
+        terms = sorted(set(self._base) | set(self._delta))
+        segments = [self._segments(t) for t in terms]
+        lengths = [sum(ids.shape[0] for ids, _ in segs) for segs in segments]
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))).astype(np.int64)
+        ids = np.concatenate([i for segs in segments for i, _ in segs]) if terms else np.empty(0, dtype=np.int32)
+        tfs = np.concatenate([f for segs in segments for _, f in segs]) if terms else np.empty(0, dtype=np.uint16)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, terms=np.asarray(terms, dtype=np.str_), offsets=offsets, ids=ids, tfs=tfs,
+                     doc_lens=self._doc_lens)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            terms, offsets = data["terms"], data["offsets"]
+            ids, tfs = data["ids"], data["tfs"]
+            doc_lens = data["doc_lens"]
+        self.reset()
+        self._base = {str(term): (ids[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]])
+                      for i, term in enumerate(terms)}
+        self._append_lengths(doc_lens.astype(np.float32))
+        self._base_rows = self.ntotal
+
+    def reset(self) -> None:
+        self._base: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._base_rows = 0
+        self._lens_buffer = np.empty(0, dtype=np.float32)
+        self._doc_lens = self._lens_buffer
+        self._total_len = 0.0
@@ -1,55 +1,425 @@
-import os
+import asyncio
+import importlib
+import random
+import re
 import time
-from groq import Groq, GroqError
-from  core.config import GROQ_API_KEY
+from typing import AsyncIterator, List, Optional
+from core.config import (GROQ_API_KEY, LLM_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE, LLM_BACKENDS,
+                         LLM_MAX_RETRIES, LLM_MAX_ATTEMPTS, LLM_HEDGE_QUANTILE, LLM_HEDGE_DELAY,
+                         LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
 from core.logging_config import get_logger
+from core.resilience import CircuitBreaker, LatencyTracker
 
-logger = get_logger(__name__)
 logger = get_logger(__name__)
 
-class GroqClient:
-    def __init__(self, model="llama-3.3-70b-versatile", max_retries=3):
-        # Initialize the Groq client
-        # The client handles retries and timeouts automatically
-        self.client = Groq(
-            api_key=GROQ_API_KEY,
-            max_retries=max_retries,
-            timeout=30.0  # Set timeout to 30 seconds, matching original code
-        )
-        self.model = model
-        # max_retries is handled by the client, but we can store it if needed
-        self.max_retries = max_retries 
-        logger.info("Initialized GroqClient with model %s and max_retries=%d", model, max_retries)
+SYSTEM_PROMPT = "You are a helpful assistant try to answer in a one sentence."
 
-    def generate_answer(self, context: str, question: str) -> str:
-        try:
-            prompt = f"""You are a helpful assistant. Answer the question based only on the following context:
+
+class LLMUnavailableError(Exception):
+    """No LLM backend could be tried: every circuit breaker is open."""
+
+
+def build_messages(context: str, question: str) -> list:
+    prompt = f"""You are a helpful assistant. Answer the question based only on the following context:
 
             Context:
             {context}
 
             Question: {question}
             Answer:"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class LLMBackend:
+    """Interface for answer generators; every method may raise on failure."""
+
+    name = "base"
+
+    def generate(self, context: str, question: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, context: str, question: str) -> str:
+        raise NotImplementedError
+
+    async def astream(self, context: str, question: str) -> AsyncIterator[str]:
+        yield await self.agenerate(context, question)
+
+
+class GroqBackend(LLMBackend):
+    """Groq chat completions for one model."""
+
+    name = "groq"
+
+    def __init__(self, model="llama-3.3-70b-versatile", max_retries=LLM_MAX_RETRIES):
+        import httpx
+        from groq import Groq, GroqError
+        self._error_cls = GroqError
+        # Both clients reuse pooled keep-alive connections capped at LLM_MAX_CONNECTIONS.
+        # Retries stay low: LLMClient fails over to the next backend instead
+        self.limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+        self.client = Groq(
+            api_key=GROQ_API_KEY,
+            max_retries=max_retries,
+            timeout=LLM_TIMEOUT,
+            http_client=httpx.Client(limits=self.limits, timeout=LLM_TIMEOUT),
+        )
+        self._async_client = None
+        self.model = model
+        self.max_retries = max_retries
+        logger.info("Initialized Groq backend with model %s and max_retries=%d", model, max_retries)
+
+    @property
+    def async_client(self):
+        # Created on first use so the connection pool belongs to the serving event loop
+        if self._async_client is None:
+            import httpx
+            from groq import AsyncGroq
+            self._async_client = AsyncGroq(
+                api_key=GROQ_API_KEY,
+                max_retries=self.max_retries,
+                timeout=LLM_TIMEOUT,
+                http_client=httpx.AsyncClient(limits=self.limits, timeout=LLM_TIMEOUT),
+            )
+        return self._async_client
 
-            logger.debug("Calling Groq API (retries managed by client)")
-            
-            # Use the Groq client to create the chat completion
+    def generate(self, context: str, question: str) -> str:
+        try:
+            logger.debug("Calling Groq API (model %s)", self.model)
             chat_completion = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant try to answer in a one sentence."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=build_messages(context, question),
                 temperature=1.0
             )
-            
             answer = chat_completion.choices[0].message.content.strip()
             logger.debug("Groq API call succeeded")
             return answer
 
-        except GroqError as e:
-            logger.error("Groq API call failed after %d retries: %s", self.max_retries, str(e))
+        except self._error_cls as e:
+            logger.error("Groq API call to %s failed after %d retries: %s", self.model, self.max_retries, str(e))
             raise  # Re-raise the exception after logging
         except Exception as e:
             logger.error("An unexpected error occurred during Groq API call: %s", str(e))
             raise # Re-raise other unexpected errors
+
+    async def agenerate(self, context: str, question: str) -> str:
+        try:
+            logger.debug("Calling Groq API asynchronously (model %s)", self.model)
+            chat_completion = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=build_messages(context, question),
+                temperature=1.0
+            )
+            answer = chat_completion.choices[0].message.content.strip()
+            logger.debug("Groq API call succeeded")
+            return answer
+
+        except self._error_cls as e:
+            logger.error("Groq API call to %s failed after %d retries: %s", self.model, self.max_retries, str(e))
+            raise
+        except Exception as e:
+            logger.error("An unexpected error occurred during Groq API call: %s", str(e))
+            raise
+
+    async def astream(self, context: str, question: str) -> AsyncIterator[str]:
+        try:
+            logger.debug("Calling Groq API with streaming (model %s)", self.model)
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=build_messages(context, question),
+                temperature=1.0,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+            logger.debug("Groq API stream finished")
+
+        except self._error_cls as e:
+            logger.error("Groq API streaming call to %s failed after %d retries: %s", self.model, self.max_retries, str(e))
+            raise
+        except Exception as e:
+            logger.error("An unexpected error occurred during Groq API streaming call: %s", str(e))
+            raise
+
+
+class LocalBackend(LLMBackend):
+    """Offline stand-in that answers with the first sentence of the context.
+
+    For tests and benchmarks: ``latency`` seconds per call, plus a
+    ``slow_share`` of calls taking ``slow_latency`` and a ``failure_rate``
+    of calls raising, to reproduce tail latency and outages.
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = 0.0, slow_share: float = 0.0, slow_latency: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = float(latency)
+        self.slow_share = slow_share
+        self.slow_latency = slow_latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def _draw(self) -> float:
+        self.calls += 1
+        if self._rng.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM backend failure")
+        return self.slow_latency if self._rng.random() < self.slow_share else self.latency
+
+    @staticmethod
+    def _answer(context: str) -> str:
+        return re.split(r"(?<=[.!?])\s+", context.strip(), maxsplit=1)[0]
+
+    def generate(self, context: str, question: str) -> str:
+        time.sleep(self._draw())
+        return self._answer(context)
+
+    async def agenerate(self, context: str, question: str) -> str:
+        await asyncio.sleep(self._draw())
+        return self._answer(context)
+
+
+BACKENDS = {
+    GroqBackend.name: GroqBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def load_backend(spec: str) -> LLMBackend:
+    """Build a backend from ``"name"``, ``"name:argument"`` (e.g. ``"groq:llama-3.1-8b-instant"``)
+    or a ``"package.module:ClassName"`` path."""
+    name, _, argument = spec.strip().partition(":")
+    if name in BACKENDS:
+        return BACKENDS[name](argument) if argument else BACKENDS[name]()
+    if not argument:
+        raise ValueError(f"Unknown LLM backend '{spec}' (expected one of {sorted(BACKENDS)} or 'module:Class')")
+    return getattr(importlib.import_module(name), argument)()
+
+
+class _BackendState:
+    def __init__(self, backend: LLMBackend, index: int):
+        self.backend = backend
+        self.label = f"{index}:{backend.name}:{getattr(backend, 'model', '')}".rstrip(":")
+        self.breaker = CircuitBreaker(self.label, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
+        self.latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.successes = 0
+        self.failures = 0
+
+
+class LLMClient:
+    """Answers through an ordered list of backends with failover, hedging and circuit breakers.
+
+    A request goes to the first backend whose circuit is closed. If it fails,
+    the next one is tried at once. If it is still running after the
+    backend's ``hedge_quantile`` latency (``hedge_delay`` until enough samples
+    exist), a duplicate is sent to the next backend, or to the same one when
+    it is the only backend, and the first answer wins. At most
+    ``max_attempts`` calls are made per request. Hedging at p95 duplicates
+    only the slowest ~5% of requests, so tail latency drops while average
+    cost barely moves. Streams hedge on time to first token and cannot fail
+    over once text has been yielded. The sync path fails over but does not hedge.
+    """
+
+    def __init__(self, backends: Optional[List[LLMBackend]] = None, max_attempts: int = LLM_MAX_ATTEMPTS,
+                 hedge_quantile: float = LLM_HEDGE_QUANTILE, hedge_delay: float = LLM_HEDGE_DELAY):
+        backends = backends or [load_backend(spec) for spec in LLM_BACKENDS.split(",") if spec.strip()]
+        self.states = [_BackendState(backend, i) for i, backend in enumerate(backends)]
+        self.max_attempts = max(1, max_attempts)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.hedges = 0
+        logger.info("LLM backends: %s", ", ".join(state.label for state in self.states))
+
+    def _attempts(self):
+        """Backends to try in order, cycling through the list, skipping open circuits."""
+        launched = 0
+        while launched < self.max_attempts:
+            progressed = False
+            for state in self.states:
+                if launched >= self.max_attempts:
+                    return
+                if state.breaker.allow():
+                    launched += 1
+                    progressed = True
+                    yield state
+            if not progressed:
+                return
+
+    def _hedge_after(self, state: _BackendState, tracker: LatencyTracker) -> Optional[float]:
+        if self.hedge_quantile <= 0:
+            return None
+        delay = tracker.quantile(self.hedge_quantile)
+        return self.hedge_delay if delay is None else delay
+
+    def _succeeded(self, state: _BackendState, tracker: LatencyTracker, seconds: float) -> None:
+        state.breaker.record_success()
+        state.successes += 1
+        tracker.record(seconds)
+
+    def _failed(self, state: _BackendState, error: Exception) -> None:
+        logger.warning("LLM backend %s failed: %s", state.label, error)
+        state.breaker.record_failure()
+        state.failures += 1
+
+    def generate_answer(self, context: str, question: str) -> str:
+        last_error = None
+        for state in self._attempts():
+            start = time.perf_counter()
+            try:
+                answer = state.backend.generate(context, question)
+            except Exception as e:
+                self._failed(state, e)
+                last_error = e
+                continue
+            self._succeeded(state, state.latency, time.perf_counter() - start)
+            return answer
+        raise last_error or LLMUnavailableError("All LLM backends are unavailable")
+
+    async def agenerate_answer(self, context: str, question: str) -> str:
+        """Async variant of :meth:`generate_answer` with hedged requests."""
+        attempts = self._attempts()
+        pending = {}  # task -> (state, started)
+        last_error = None
+        hedge_at = None
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            state = next(attempts, None)
+            if state is None:
+                hedge_at = None
+                return False
+            started = time.perf_counter()
+            pending[asyncio.ensure_future(state.backend.agenerate(context, question))] = (state, started)
+            delay = self._hedge_after(state, state.latency)
+            hedge_at = None if delay is None else started + delay
+            return True
+
+        if not launch():
+            raise LLMUnavailableError("All LLM backends are unavailable")
+        try:
+            while pending:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        self.hedges += 1
+                        logger.info("LLM request slower than p%d; sent a hedged request", round(100 * self.hedge_quantile))
+                    continue
+                for task in done:
+                    state, started = pending.pop(task)
+                    try:
+                        answer = task.result()
+                    except Exception as e:
+                        self._failed(state, e)
+                        last_error = e
+                        if not pending:
+                            launch()
+                        continue
+                    self._succeeded(state, state.latency, time.perf_counter() - started)
+                    return answer
+            raise last_error or LLMUnavailableError("All LLM backends are unavailable")
+        finally:
+            for task, (state, _) in pending.items():
+                task.cancel()
+                state.breaker.release()
+
+    async def astream_answer(self, context: str, question: str) -> AsyncIterator[str]:
+        """Yield answer text deltas, hedging and failing over until the first delta arrives."""
+        attempts = self._attempts()
+        pending = {}  # first-delta task -> (state, stream, started)
+        last_error = None
+        hedge_at = None
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            state = next(attempts, None)
+            if state is None:
+                hedge_at = None
+                return False
+            stream = state.backend.astream(context, question)
+            started = time.perf_counter()
+            pending[asyncio.ensure_future(stream.__anext__())] = (state, stream, started)
+            delay = self._hedge_after(state, state.first_token_latency)
+            hedge_at = None if delay is None else started + delay
+            return True
+
+        if not launch():
+            raise LLMUnavailableError("All LLM backends are unavailable")
+        winner = None
+        try:
+            while pending and winner is None:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.perf_counter())
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch():
+                        self.hedges += 1
+                        logger.info("LLM stream slow to start; sent a hedged request")
+                    continue
+                for task in done:
+                    state, stream, started = pending.pop(task)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        self._succeeded(state, state.first_token_latency, time.perf_counter() - started)
+                        return
+                    except Exception as e:
+                        self._failed(state, e)
+                        last_error = e
+                        if not pending:
+                            launch()
+                        continue
+                    self._succeeded(state, state.first_token_latency, time.perf_counter() - started)
+                    winner = (state, stream, first)
+                    break
+            if winner is None:
+                raise last_error or LLMUnavailableError("All LLM backends are unavailable")
+        finally:
+            for task, (state, stream, _) in pending.items():
+                await self._discard(task, stream)
+                state.breaker.release()
+
+        state, stream, first = winner
+        yield first
+        try:
+            async for delta in stream:
+                yield delta
+        except Exception:
+            state.breaker.record_failure()
+            raise
+        finally:
+            await stream.aclose()
+
+    @staticmethod
+    async def _discard(task: asyncio.Future, stream) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        try:
+            await stream.aclose()
+        except Exception:
+            logger.debug("Error closing abandoned LLM stream", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "hedged_requests": self.hedges,
+            "backends": [
+                {
+                    "backend": state.label,
+                    "circuit": state.breaker.state,
+                    "successes": state.successes,
+                    "failures": state.failures,
+                    "p95_latency_ms": _ms(state.latency.quantile(0.95)),
+                    "p95_first_token_ms": _ms(state.first_token_latency.quantile(0.95)),
+                }
+                for state in self.states
+            ],
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else 1000 * seconds
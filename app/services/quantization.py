@@ -0,0 +1,109 @@
+import os
+import numpy as np
+from typing import Optional, Tuple
+from core.logging_config import get_logger
+from services.vector_matrix import masked_top_k, top_k_indices
+
+logger = get_logger(__name__)
+
+SUPPORTED_KINDS = ("int8",)
+
+
+class ScalarQuantizer:
+    """Compact vector codes for a coarse scan, followed by exact rescoring.
+
+    ``int8`` maps every dimension onto 256 levels between its observed min and
+    max (per-dimension scale and offset), so the resident index is 4x smaller
+    while the full-precision rows stay memory-mapped on disk. This saves
+    memory, not time: numpy has no fast int8 matrix product, so the scan
+    widens cache-sized blocks of codes to float32 and is no faster than the
+    float32 scan it replaces. (float16 codes were dropped: widening them
+    made the scan ~10x slower.)
+    """
+
+    # Refit the int8 ranges once the corpus has grown this much past the training size
+    RETRAIN_GROWTH_FACTOR = 8
+
+    def __init__(self, kind: str = "int8", block_rows: int = 512):
+        if kind not in SUPPORTED_KINDS:
+            raise ValueError(f"Unsupported quantization '{kind}', expected one of {SUPPORTED_KINDS}")
+        self.kind = kind
+        self.block_rows = block_rows
+        self.offset = None
+        self.scale = None
+        self.trained_size = 0
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        return np.dtype(np.int8)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.trained_size > 0
+
+    def should_retrain(self, n: int) -> bool:
+        return not self.is_trained or n > self.trained_size * self.RETRAIN_GROWTH_FACTOR
+
+    def train(self, vectors: np.ndarray, margin: float = 0.05) -> None:
+        """Fit per-dimension ranges; ``margin`` leaves headroom for rows added later."""
+        self.trained_size = vectors.shape[0]
+        lo = vectors.min(axis=0).astype(np.float32)
+        hi = vectors.max(axis=0).astype(np.float32)
+        pad = (hi - lo) * margin
+        lo, hi = lo - pad, hi + pad
+        scale = (hi - lo) / 255.0
+        scale[scale == 0] = 1.0
+        self.offset, self.scale = lo, scale
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty(vectors.shape, dtype=self.code_dtype)
+        for start in range(0, vectors.shape[0], self.block_rows):
+            block = np.asarray(vectors[start:start + self.block_rows], dtype=np.float32)
+            block = np.clip(np.rint((block - self.offset) / self.scale) - 128, -128, 127)
+            codes[start:start + self.block_rows] = block
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return (codes.astype(np.float32) + 128) * self.scale + self.offset
+
+    def scores(self, codes: np.ndarray, query_vec: np.ndarray) -> np.ndarray:
+        """Approximate dot product of every code row with ``query_vec``."""
+        query_vec = np.asarray(query_vec, dtype=np.float32)
+        # x = offset + scale * (c + 128)  =>  x.q = c.(scale*q) + (offset + 128*scale).q
+        weights = self.scale * query_vec
+        bias = np.float32((self.offset + 128 * self.scale) @ query_vec)
+
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], self.block_rows):
+            block = codes[start:start + self.block_rows].astype(np.float32)
+            out[start:start + self.block_rows] = block @ weights
+        return out + bias
+
+    def search(self, codes: np.ndarray, vectors: np.ndarray, query_vec: np.ndarray, k: int,
+               rescore_factor: int = 4, exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Coarse top ``k * rescore_factor`` on codes, then exact top-k on full-precision rows."""
+        shortlist = masked_top_k(self.scores(codes, query_vec), k * max(1, rescore_factor), exclude)
+        shortlist.sort()  # sequential access into the (possibly memory-mapped) full vectors
+        exact = np.asarray(vectors[shortlist], dtype=np.float32) @ np.asarray(query_vec, dtype=np.float32)
+        best = top_k_indices(exact, k)
+        return shortlist[best], exact[best]
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, kind=np.array(self.kind), trained_size=np.int64(self.trained_size),
+                     offset=self.offset, scale=self.scale)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            kind = str(data["kind"])
+            if kind != self.kind:
+                raise ValueError(f"Stored quantizer is '{kind}', configured '{self.kind}'")
+            self.trained_size = int(data["trained_size"])
+            self.offset, self.scale = data["offset"], data["scale"]
+
+    def reset(self) -> None:
+        self.offset = None
+        self.scale = None
+        self.trained_size = 0
@@ -1,17 +1,39 @@
 import os
+import time
+import numpy as np
+from typing import Optional
 from langchain.schema import Document
 from transformers import AutoTokenizer
-from core.doc_parser import extract_text, get_available_files
+from core.doc_parser import (get_available_files, get_file_hash, iter_chunks, parse_documents,
+                             ensure_sentence_tokenizer)
 from services.embedding_service import EmbeddingService
 from services.vector_store_service import VectorStoreService
-from core.config import MODELS_DIR, DEFAULT_HF_MODEL_ID
-from services.llm_service import GroqClient
+from services.answer_cache import SemanticAnswerCache
+from services.context_packer import ContextPacker
+from services.answer_router import AnswerRouter, CACHE, EXTRACTIVE_FALLBACK, LLM, NO_RESULTS, TIMEOUT
+from core.config import (MODELS_DIR, DEFAULT_HF_MODEL_ID, ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL,
+                         CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA, CONTEXT_FETCH_FACTOR,
+                         EXTRACTIVE_CONFIDENCE, EXTRACTIVE_MAX_TOKENS, LLM_CALLS_PER_MINUTE, RETRIEVAL_TIMEOUT,
+                         STARTUP_WARMUP)
+from core.concurrency import run_blocking
+from core.deadline import Deadline, StageTimeout
+from core.startup import Startup
+from services.llm_service import LLMClient
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+NO_ANSWER_IN_TIME = "Sorry, I could not find an answer in time. Please try again."
+
 class RAGChatbot:
-    def __init__(self, model_path=MODELS_DIR, max_tokens=500):
+    def __init__(self, model_path=MODELS_DIR, max_tokens=500, startup: Optional[Startup] = None):
+        """Register the chatbot's components with ``startup``, which builds them concurrently.
+
+        Without a ``startup`` the chatbot creates and starts its own. The
+        tokenizer, models, LLM client and index are loaded in the background;
+        the attributes below block until theirs is ready. The docs directory
+        is synced after the index is loaded, without holding up readiness.
+        """
         self.model_path = model_path
         self.max_tokens = max_tokens
 
@@ -19,74 +41,328 @@ class RAGChatbot:
         effective_model = self._resolve_model_source(self.model_path)
         logger.info("Initializing RAGChatbot with model source: %s", effective_model)
 
-        # Initialize tokenizer and embedding service
-        self.tokenizer = AutoTokenizer.from_pretrained(effective_model)
-        self.embedding_service = EmbeddingService(effective_model)
-        self.vectorstore_service = VectorStoreService(self.embedding_service)
-        self.llm = GroqClient()  # <- Initialize Groq client
-        self.load_documents()
+        self.answer_cache = SemanticAnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL)
+        self.context_packer = ContextPacker(self._count_tokens, CONTEXT_TOKEN_BUDGET, CONTEXT_MMR_LAMBDA,
+                                            truncate=self._truncate_tokens)
+        self.router = AnswerRouter(EXTRACTIVE_CONFIDENCE, EXTRACTIVE_MAX_TOKENS, LLM_CALLS_PER_MINUTE)
 
-    def load_documents(self):
-        logger.info("Checking for existing index...")
-        self.vectorstore_service.load_index()
+        own_startup = startup is None
+        self.startup = startup or Startup("rag")
+        self.startup.add("tokenizer", lambda: AutoTokenizer.from_pretrained(effective_model))
+        self.startup.add("embedding", lambda: EmbeddingService(effective_model))
+        self.startup.add("index", self._open_index, after=("embedding",))
+        self.startup.add("llm", LLMClient)  # Groq (by default) with failover and hedged requests
+        # Sentence-splitter data may need a download; fetched once here, before any document is parsed
+        self.startup.add("sentence_tokenizer", ensure_sentence_tokenizer, required=False)
+        self.startup.add("documents", self.load_documents, after=("index", "sentence_tokenizer"), required=False)
+        if STARTUP_WARMUP:
+            self.startup.add("warmup", self.warm_up, after=("tokenizer", "embedding", "index"))
+        if own_startup:
+            self.startup.start()
+
+    @property
+    def tokenizer(self):
+        return self.startup.get("tokenizer")
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        return self.startup.get("embedding")
+
+    @property
+    def vectorstore_service(self) -> VectorStoreService:
+        return self.startup.get("index")
+
+    @property
+    def llm(self) -> LLMClient:
+        return self.startup.get("llm")
 
-        if self.vectorstore_service.documents:
-            return  # Skip indexing again if already loaded
+    def _open_index(self) -> VectorStoreService:
+        vectorstore_service = VectorStoreService(self.embedding_service)
+        vectorstore_service.load_index()
+        return vectorstore_service
 
-        logger.info("Indexing documents...")
+    def warm_up(self) -> None:
+        """Run each request-path component once so the first real request does not pay for lazy setup."""
+        query = "warm-up"
+        self._count_tokens(query)
+        # Straight to the model: warm-up must not land in the query cache or the batching stats
+        query_vec = self.embedding_service.embed([query])[0]
+        if self.vectorstore_service.live_count:
+            self.vectorstore_service.similarity_search_with_vectors(query_vec, 1, query=query)
+
+    def load_documents(self):
+        """Bring the loaded index in sync with the docs directory.
+
+        New or modified files are (re-)indexed and files that disappeared are
+        removed; unchanged documents are left untouched.
+        """
         filenames = get_available_files()
-        if not filenames:
+        if not filenames and not self.vectorstore_service.sources:
             logger.warning("No valid documents found in docs directory.")
             return
 
-        all_docs = []
+        for source in list(self.vectorstore_service.sources):
+            if source not in filenames:
+                logger.info("Document %s no longer present; removing from index", source)
+                self.vectorstore_service.delete_document(source)
+
+        changed = []
         for filename in filenames:
             try:
-                docs = extract_text(filename)
-                all_docs.extend(docs)
-            except Exception as e:
+                content_hash = get_file_hash(filename)
+            except Exception:
+                logger.exception("Error reading document during indexing: %s", filename)
+                continue
+            if self.vectorstore_service.document_hash(filename) != content_hash:
+                changed.append((filename, content_hash))
+
+        # Parse changed files in a process pool (input order is kept), then embed and store each
+        hashes = dict(changed)
+        for filename, docs in parse_documents([filename for filename, _ in changed]):
+            if docs is None:
+                continue
+            try:
+                self._store_document(filename, hashes[filename], docs)
+            except Exception:
                 logger.exception("Error processing document during indexing: %s", filename)
 
-        if all_docs:
-            self.vectorstore_service.add_documents(all_docs)
-            logger.info("Indexed %d chunks.", len(all_docs))
-        else:
-            logger.warning("No content extracted from available documents.")
+        logger.info("Index holds %d chunks from %d documents.",
+                    self.vectorstore_service.live_count, len(self.vectorstore_service.sources))
+
+    def index_document(self, filename: str, progress=None) -> str:
+        """Add or replace one document from the docs directory.
+
+        ``progress(stage, fraction)`` is called as parsing, embedding and
+        persisting start. Returns ``"added"``, ``"replaced"``, ``"unchanged"``
+        or ``"empty"``.
+        """
+        content_hash = get_file_hash(filename)
+        if self.vectorstore_service.document_hash(filename) == content_hash:
+            return "unchanged"
+
+        logger.info("Indexing document %s", filename)
+        if progress:
+            progress("parsing", 0.05)
+        # Chunks stream out of the parser page by page and are embedded as they arrive
+        return self._store_document(filename, content_hash, iter_chunks(filename), progress)
+
+    def _store_document(self, filename: str, content_hash: str, docs, progress=None) -> str:
+        status = self.vectorstore_service.upsert_document(filename, content_hash, docs, progress)
+        chunks = len(self.vectorstore_service.sources.get(filename, {}).get("rows", ()))
+        if not chunks:
+            logger.warning("No content extracted from %s", filename)
+            self.vectorstore_service.delete_document(filename)
+            return "empty"
+        logger.info("Document %s %s with %d chunks.", filename, status, chunks)
+        return status
+
+    def reindex_all(self, progress=None) -> int:
+        """Re-index every document into a fresh index and swap it in atomically.
+
+        Queries keep being served from the current index until the rebuild is
+        published. Returns the number of indexed chunks.
+        """
+        filenames = get_available_files()
+
+        def build(staging):
+            for i, (filename, docs) in enumerate(parse_documents(filenames)):
+                if progress:
+                    progress(f"indexing {filename}", i / max(1, len(filenames)))
+                if docs:
+                    staging.upsert_document(filename, get_file_hash(filename), docs)
+
+        self.vectorstore_service.rebuild(build)
+        return self.vectorstore_service.live_count
+
+    def remove_document(self, filename: str) -> bool:
+        return self.vectorstore_service.delete_document(filename)
 
     def clear_data(self):
         self.vectorstore_service.clear_index()
         return True
 
     def answer(self, query: str, k: int = 5) -> str:
-        results = self.vectorstore_service.similarity_search(query, k)
+        results = self.vectorstore_service.similarity_search_with_score(query, k)
         if not results:
             return "No relevant information found."
+        top_doc, score = results[0]
+        logger.debug("Extractive answer from top hit with similarity %.3f", score)
+        return self._truncate_tokens(top_doc.page_content.strip(), self.max_tokens)
 
-        top_response = results[0].page_content.strip()
-        tokens = self.tokenizer.tokenize(top_response)
+    def llmanswer(self, query: str, k: int = 5) -> str:
+        start, route = time.perf_counter(), CACHE
+        try:
+            query_vec, version, cached = self._lookup_answer(query, k)
+            if cached is not None:
+                return cached
+            route, text, _ = self._route(query, query_vec, k)
+            if route != LLM:
+                return text
+
+            # Generate response using Groq LLaMA over the packed context
+            try:
+                response = self.llm.generate_answer(text, query)
+            except Exception:
+                logger.exception("LLM generation failed")
+                return "An error occurred while generating the answer."
+            self.answer_cache.put(query_vec, response, version, k)
+            return response
+        finally:
+            self.router.record(route, time.perf_counter() - start)
 
-        if len(tokens) > self.max_tokens:
-            tokens = tokens[:self.max_tokens]
-            top_response = self.tokenizer.convert_tokens_to_string(tokens)
+    async def allmanswer(self, query: str, k: int = 5, deadline: Optional[Deadline] = None) -> str:
+        """Async variant of :meth:`llmanswer` for the request path.
 
-        return top_response
+        The query embedding is awaited from the micro-batcher, search runs on
+        the bounded CPU executor and the LLM call is awaited, so concurrent requests overlap instead of queueing on the
+        event loop. With a ``deadline``, retrieval is capped at
+        ``RETRIEVAL_TIMEOUT`` and the LLM gets the remaining time; if it
+        overruns or fails, the extractive answer is returned instead and the
+        stage is recorded in ``deadline.degraded``.
+        """
+        deadline = deadline or Deadline()
+        start, route = time.perf_counter(), CACHE
+        try:
+            try:
+                query_vec, version, cached, routed = await deadline.run(
+                    "retrieval", self._aretrieve(query, k), RETRIEVAL_TIMEOUT)
+                if cached is not None:
+                    return cached
+                route, text, extractive = routed
+            except StageTimeout:
+                route = TIMEOUT
+                deadline.degrade("retrieval", "timeout")
+                return NO_ANSWER_IN_TIME
+            if route != LLM:
+                return text
 
-    def llmanswer(self, query: str, k: int = 5) -> str:
-        results = self.vectorstore_service.similarity_search(query, k)
-        logger.debug("Top-%d retrieved documents: %s", k, [len(r.page_content) for r in results])
-        if not results:
-            return "No relevant information found."
+            try:
+                response = await deadline.run("llm", self.llm.agenerate_answer(text, query))
+            except StageTimeout:
+                route = EXTRACTIVE_FALLBACK
+                deadline.degrade("llm", "timeout")
+                return extractive
+            except Exception:
+                logger.exception("LLM generation failed; serving the extractive answer")
+                route = EXTRACTIVE_FALLBACK
+                deadline.degrade("llm", "error")
+                return extractive
+            self.answer_cache.put(query_vec, response, version, k)
+            return response
+        finally:
+            self.router.record(route, time.perf_counter() - start)
 
-        # Combine top-k chunks into a single context string
-        context = "\n\n".join([doc.page_content.strip() for doc in results])
+    async def astream_llmanswer(self, query: str, k: int = 5, deadline: Optional[Deadline] = None):
+        """Streaming :meth:`allmanswer`: yields answer text as the LLM produces it.
 
-        # Generate response using Groq LLaMA
+        When the deadline passes mid-stream the answer ends where it is; if
+        nothing was streamed yet, the extractive answer is yielded instead.
+        """
+        deadline = deadline or Deadline()
+        start, route = time.perf_counter(), CACHE
         try:
-            response = self.llm.generate_answer(context, query)
-            return response
-        except Exception:
-            logger.exception("LLM generation failed")
-            return "An error occurred while generating the answer."
+            try:
+                query_vec, version, cached, routed = await deadline.run(
+                    "retrieval", self._aretrieve(query, k), RETRIEVAL_TIMEOUT)
+                if cached is not None:
+                    yield cached
+                    return
+                route, text, extractive = routed
+            except StageTimeout:
+                route = TIMEOUT
+                deadline.degrade("retrieval", "timeout")
+                yield NO_ANSWER_IN_TIME
+                return
+            if route != LLM:
+                yield text
+                return
+
+            parts = []
+            try:
+                async for delta in deadline.iterate("llm", self.llm.astream_answer(text, query)):
+                    parts.append(delta)
+                    yield delta
+            except Exception:
+                logger.exception("LLM streaming generation failed")
+                deadline.degrade("llm", "error")
+            if "llm" in deadline.degraded:
+                if not parts:
+                    route = EXTRACTIVE_FALLBACK
+                    yield extractive
+                return  # incomplete answers are not cached
+            self.answer_cache.put(query_vec, "".join(parts).strip(), version, k)
+        finally:
+            self.router.record(route, time.perf_counter() - start)
+
+    def _lookup_answer(self, query: str, k: int):
+        """Embed ``query`` once and check the semantic answer cache for a paraphrase.
+
+        Returns ``(query_vec, index_version, cached_answer_or_None)``; the same
+        vector is then reused for retrieval.
+        """
+        query_vec = self.embedding_service.embed_single(query)
+        version = self.vectorstore_service.snapshot.version
+        return query_vec, version, self.answer_cache.get(query_vec, version, k)
+
+    async def _alookup_answer(self, query: str, k: int):
+        """Async :meth:`_lookup_answer`: the embedding is awaited from the micro-batcher.
+
+        Only the model call runs off the event loop, so a query waiting for
+        its batch does not hold one of the ``CPU_WORKERS`` threads.
+        """
+        query_vec = await self.embedding_service.aembed_single(query)
+        version = self.vectorstore_service.snapshot.version
+        return query_vec, version, self.answer_cache.get(query_vec, version, k)
+
+    async def _aretrieve(self, query: str, k: int):
+        """Answer-cache lookup and, on a miss, :meth:`_route`, as one retrieval stage.
+
+        Returns ``(query_vec, index_version, cached_answer, routed)`` where
+        ``routed`` is the ``(route, text, extractive)`` of :meth:`_route`, or
+        None on a cache hit. Callers run it under a single ``RETRIEVAL_TIMEOUT``.
+        """
+        query_vec, version, cached = await self._alookup_answer(query, k)
+        if cached is not None:
+            return query_vec, version, cached, None
+        return query_vec, version, None, await run_blocking(self._route, query, query_vec, k)
+
+    def _route(self, query: str, query_vec, k: int):
+        """Retrieve candidates and decide how to answer.
+
+        Returns ``(route, text, extractive_answer)``: for ``LLM`` the text is
+        the prompt context, up to ``k`` diverse chunks within
+        ``CONTEXT_TOKEN_BUDGET`` picked from ``k * CONTEXT_FETCH_FACTOR``
+        candidates so overlapping neighbouring chunks can be skipped; for the
+        other routes it is the answer itself. The extractive answer is the
+        fallback if the LLM call does not complete.
+        """
+        docs, scores, vectors = self.vectorstore_service.similarity_search_with_vectors(
+            query_vec, k * CONTEXT_FETCH_FACTOR, query)
+        if not docs:
+            return NO_RESULTS, "No relevant information found.", "No relevant information found."
+
+        # Hybrid results come in fused order, where a keyword-only hit can rank first;
+        # confidence and the extractive answer come from the closest chunk by cosine
+        best = int(np.argmax(scores))
+        top_response = docs[best].page_content.strip()
+        extractive = self._truncate_tokens(top_response, self.max_tokens)
+        route = self.router.choose(float(scores[best]), self.context_packer.token_count(top_response))
+        if route != LLM:
+            logger.info("Answering extractively (%s, similarity %.3f)", route, scores[best])
+            return route, extractive, extractive
+
+        packed = self.context_packer.pack(query_vec, docs, vectors, k)
+        logger.debug("Top-%d packed documents: %s", k, [len(doc.page_content) for doc in packed])
+        return LLM, "\n\n".join(doc.page_content.strip() for doc in packed), extractive
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        tokens = self.tokenizer.tokenize(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.tokenizer.convert_tokens_to_string(tokens[:max_tokens])
 
     def _resolve_model_source(self, local_path: str) -> str:
         """Return a valid model source for Transformers and SentenceTransformers.
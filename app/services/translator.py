@@ -1,19 +1,133 @@
-from deep_translator import GoogleTranslator
+import importlib
+import threading
+from core.cache import LRUCache
+from core.config import TRANSLATION_BACKEND, TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+
+def normalize_lang(code: str) -> str:
+    """``"ta-IN"`` -> ``"ta"``; empty codes mean auto-detect.
+
+    Only the ``-IN`` region the UI adds is stripped: other regions can name a
+    different target (``"zh-CN"`` vs ``"zh-TW"``) and are kept as given.
+    """
+    code = (code or "").strip()
+    if not code:
+        return "auto"
+    return code[:-len("-IN")] if code.endswith("-IN") else code
+
+
+class TranslationBackend:
+    """Interface for translation engines; ``translate`` may raise on failure."""
+
+    name = "base"
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        raise NotImplementedError
+
+
+class GoogleTranslationBackend(TranslationBackend):
+    """Google Translate via deep-translator, reusing one client per language pair."""
+
+    name = "google"
+
+    def __init__(self):
+        from deep_translator import GoogleTranslator
+        self._client_cls = GoogleTranslator
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        with self._lock:
+            client = self._clients.get((source, target))
+            if client is None:
+                client = self._clients[(source, target)] = self._client_cls(source=source, target=target)
+        return client.translate(text)
+
+
+class IdentityTranslationBackend(TranslationBackend):
+    """Offline stand-in that returns the text unchanged (tests, benchmarks, air-gapped runs)."""
+
+    name = "identity"
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return text
+
+
+BACKENDS = {
+    GoogleTranslationBackend.name: GoogleTranslationBackend,
+    IdentityTranslationBackend.name: IdentityTranslationBackend,
+}
+
+
+def load_backend(spec: str) -> TranslationBackend:
+    """Build a backend from a registered name or a ``"package.module:ClassName"`` path."""
+    if spec in BACKENDS:
+        return BACKENDS[spec]()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown translation backend '{spec}' (expected one of {sorted(BACKENDS)} or 'module:Class')")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class TranslationService:
+    """Translation with a same-language short-circuit and a bounded LRU cache.
+
+    Results are cached by ``(text, source, target)``; failed translations fall
+    back to the original text and are not cached.
+    """
+
+    def __init__(self, backend: TranslationBackend, cache_size: int = 1024, ttl: float = 0):
+        self.backend = backend
+        self.cache = LRUCache(maxsize=cache_size, ttl=ttl)
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        source, target = normalize_lang(source_lang), normalize_lang(target_lang)
+        if not text or not text.strip() or source == target:
+            return text
+        key = (text, source, target)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            translated = self.backend.translate(text, source, target)
+        except Exception:
+            logger.exception("Translation error from %s to %s", source, target)
+            return text  # fallback to original text
+        if translated is None:
+            return text
+        self.cache.put(key, translated)
+        return translated
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_translation_service() -> TranslationService:
+    """Process-wide service built from ``TRANSLATION_BACKEND`` on first use."""
+    global _default_service
+    if _default_service is None:
+        with _default_lock:
+            if _default_service is None:
+                backend = load_backend(TRANSLATION_BACKEND)
+                logger.info("Using translation backend %s", TRANSLATION_BACKEND)
+                _default_service = TranslationService(backend, TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL)
+    return _default_service
+
+
 def translate_to_english(text: str, source_lang: str) -> str:
     """
-    Translate text from any supported Indian language to English using deep-translator (Google Translate backend).
+    Translate text from any supported Indian language to English using the configured backend
+    (Google Translate via deep-translator by default).
 
     :param text: Text in source language (e.g., Tamil, Malayalam, etc.)
     :param source_lang: Source language code (e.g., 'ta' for Tamil, 'ml' for Malayalam)
-    :return: Translated English text
+    :return: Translated English text; the input itself for English or on failure
     """
-    try:
-        translated = GoogleTranslator(source=source_lang.replace("-IN", ""), target='en').translate(text)
-        return translated
-    except Exception as e:
-        logger.exception("Translation error from %s to en", source_lang)
-        return text  # fallback to original text
+    return get_translation_service().translate(text, source_lang, "en")
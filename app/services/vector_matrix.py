@@ -0,0 +1,129 @@
+import numpy as np
+from typing import Optional, Tuple
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the k highest scores, best first.
+
+    Uses argpartition so only the k winners are sorted instead of the whole array.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def masked_top_k(scores: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """``top_k_indices`` that skips rows flagged in the boolean ``exclude`` mask.
+
+    ``scores`` is modified in place for excluded rows.
+    """
+    if exclude is None or not exclude.any():
+        return top_k_indices(scores, k)
+    scores[exclude[:scores.shape[0]]] = -np.inf
+    indices = top_k_indices(scores, k)
+    return indices[np.isfinite(scores[indices])]
+
+
+class VectorMatrix:
+    """Preallocated, growable float32 matrix of row vectors.
+
+    Rows live in one contiguous buffer that doubles in capacity when full, so
+    appends are amortized O(1) per row and a query is a single matrix-vector
+    product over a view of the filled rows (no per-query copy).
+    """
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self._initial_capacity = max(1, int(capacity))
+        self._size = 0
+        self._data = None if dim is None else np.empty((self._initial_capacity, dim), dtype=self.dtype)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, dtype=np.float32) -> "VectorMatrix":
+        """Wrap an existing 2-D array (e.g. a memory map) without copying it."""
+        matrix = cls(dtype=dtype)
+        array = np.asarray(array)
+        if array.size == 0:
+            return matrix
+        if array.ndim != 2:
+            raise ValueError(f"Expected a 2-D array of vectors, got shape {array.shape}")
+        if array.dtype != matrix.dtype:
+            array = array.astype(matrix.dtype)
+        matrix._data = array
+        matrix._size = array.shape[0]
+        return matrix
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._data is None else self._data.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._data is None else self._data.shape[0]
+
+    @property
+    def array(self) -> np.ndarray:
+        """View of the filled rows (shape ``(len(self), dim)``)."""
+        if self._data is None:
+            return np.empty((0, 0), dtype=self.dtype)
+        return self._data[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    def append(self, vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=self.dtype)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if vectors.shape[0] == 0:
+            return
+        if self._data is None:
+            self._data = np.empty((max(self._initial_capacity, vectors.shape[0]), vectors.shape[1]), dtype=self.dtype)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Vector dimension mismatch: expected {self.dim}, got {vectors.shape[1]}")
+
+        required = self._size + vectors.shape[0]
+        if required > self.capacity or not self._data.flags.writeable:
+            self._grow(required)
+        self._data[self._size:required] = vectors
+        self._size = required
+
+    def _grow(self, required: int) -> None:
+        new_capacity = max(self._initial_capacity, self.capacity)
+        while new_capacity < required:
+            new_capacity *= 2
+        logger.debug("Growing vector matrix capacity %d -> %d", self.capacity, new_capacity)
+        data = np.empty((new_capacity, self.dim), dtype=self.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def clear(self) -> None:
+        self._data = None
+        self._size = 0
+
+    def scores(self, query_vec: np.ndarray) -> np.ndarray:
+        """Dot-product score of every row against ``query_vec``."""
+        return self.array @ np.asarray(query_vec, dtype=self.dtype)
+
+    def top_k(self, query_vec: np.ndarray, k: int,
+              exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(indices, scores)`` of the k best-scoring rows, best first.
+
+        Rows flagged in the boolean ``exclude`` mask (e.g. deleted rows) are skipped.
+        """
+        if self._size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=self.dtype)
+        scores = self.scores(query_vec)
+        indices = masked_top_k(scores, k, exclude)
+        return indices, scores[indices]
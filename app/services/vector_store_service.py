@@ -1,69 +1,645 @@
+import copy
+import itertools
 import numpy as np
 import os
-import pickle
-from typing import List
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from langchain.schema import Document
-from core.config import INDEX_PATH
+from core.config import (INDEX_DIR, LEGACY_INDEX_PATH, INDEX_MODE, IVF_NLIST, IVF_NPROBE, IVF_MIN_TRAIN_SIZE,
+                         VECTOR_DTYPE, RESCORE_FACTOR, EMBED_BATCH_SIZE, EMBED_PREFETCH, RETRIEVAL_MODE,
+                         HYBRID_CANDIDATES, RRF_K, BM25_K1, BM25_B)
 from core.logging_config import get_logger
+from core.pipeline import prefetch_batches
+from services.ann_index import IVFFlatIndex
+from services.index_snapshot import Generation, IndexSnapshot
+from services.index_storage import IndexDirectory, IndexStorage
+from services.lexical_index import BM25Index
+from services.quantization import SUPPORTED_KINDS, ScalarQuantizer
+from services.vector_matrix import VectorMatrix
 
 logger = get_logger(__name__)
 
 class VectorStoreService:
-    def __init__(self, embedding_service):
+    """Vector index whose queries run against atomically published snapshots.
+
+    Writers are serialized by ``_write_lock`` and finish every mutation by
+    swapping in a new :class:`IndexSnapshot`; readers take ``self.snapshot``
+    once and never block on, or observe, a half-applied change. Full rewrites
+    (compaction, rebuilds, clears) go to a fresh on-disk generation.
+    """
+
+    # Rewrite the index once this fraction of rows is tombstoned
+    COMPACT_DELETED_RATIO = 0.25
+
+    def __init__(self, embedding_service, index_root: str = INDEX_DIR, storage: Optional[IndexStorage] = None):
         self.embedding_service = embedding_service
-        self.vectors = []
+        self.index_dir = IndexDirectory(index_root)
+        # An explicit storage is a staging generation that the caller publishes (see rebuild)
+        self._staging = storage is not None
+        self.storage = storage or self.index_dir.current() or self.index_dir.create()
+        self.generation = Generation(os.path.basename(self.storage.index_dir))
+        self.vectors = VectorMatrix()
         self.documents = []
-        self.index_path = INDEX_PATH
+        self.deleted = np.zeros(0, dtype=bool)
+        # source -> {"hash": content hash, "rows": live row ids}
+        self.sources: Dict[str, dict] = {}
+        # Serializes index mutations (background indexing jobs, clears, reloads)
+        self._write_lock = threading.RLock()
+        # One rebuild at a time; while it builds, the sources written to meanwhile are noted here
+        # (None = everything, after a clear) and copied into the rebuilt index before it is swapped in
+        self._rebuild_lock = threading.Lock()
+        self._rebuilding = False
+        self._rebuild_touched = set()
+        # Uploads whose rows are appended but not yet made visible; rewrites that renumber rows
+        # (compaction, rebuild swaps, clears, reloads) wait for them, and new uploads wait for those
+        self._uploads = 0
+        self._rewrites_waiting = 0
+        self._uploads_changed = threading.Condition(self._write_lock)
+        self.ann_index = IVFFlatIndex(nlist=IVF_NLIST, nprobe=IVF_NPROBE) if INDEX_MODE == "ivf" else None
+        if VECTOR_DTYPE not in ("float32",) + SUPPORTED_KINDS:
+            logger.warning("VECTOR_DTYPE=%s is not supported (expected float32 or %s); using float32",
+                           VECTOR_DTYPE, ", ".join(SUPPORTED_KINDS))
+        self.quantizer = ScalarQuantizer(VECTOR_DTYPE) if VECTOR_DTYPE in SUPPORTED_KINDS else None
+        self.codes = VectorMatrix(dtype=self.quantizer.code_dtype) if self.quantizer else None
+        self.lexical_index = BM25Index(BM25_K1, BM25_B) if RETRIEVAL_MODE == "hybrid" else None
+        self.snapshot: IndexSnapshot = None
+        self._versions = itertools.count(1)
+        self._publish()
+
+    @property
+    def index_path(self) -> str:
+        return self.storage.index_dir
+
+    def add_documents(self, docs: Iterable[Document], progress: Optional[Callable] = None):
+        logger.info("Adding documents to vector store")
+        if progress:
+            progress("embedding", 0.3)
+        with self._uploading():
+            hidden = self._append_batches(docs, {}, progress)
+            if not hidden:
+                return
+            if progress:
+                progress("persisting", 0.8)
+            with self._write_lock:
+                self._show_rows(None, hidden)
+                self._save_ann_index()
+                self._publish()
+        logger.info("Added %d documents to vector store", sum(end - start for start, end in hidden))
+
+    def _append_rows(self, embeddings: np.ndarray, docs: List[Document], hidden: bool = False):
+        start = len(self.documents)
+        self.documents.extend(docs)  # snapshots only read their first ``count`` entries
+        self.deleted = np.concatenate([self.deleted, np.full(len(docs), hidden, dtype=bool)])
+        if not hidden:
+            self._register_rows(start, docs)
+        try:
+            self.storage.append(embeddings, docs, hidden=hidden)  # Persist only the new rows
+            if not self._staging and not self.index_dir.is_current(self.storage):
+                self.index_dir.publish(self.storage)
+            logger.info("Appended %d vectors to index: %s", len(docs), self.index_path)
+            persisted = True
+        except Exception:
+            logger.exception("Failed to append to vector index at %s", self.index_path)
+            persisted = False
+
+        if self.quantizer is not None and persisted:
+            # Quantized mode keeps full precision on disk only; it is read back for rescoring
+            self.vectors = VectorMatrix.from_array(self.storage.load_vectors())
+        else:
+            self.vectors.append(embeddings)
+        self._update_codes(embeddings)
+        self._update_ann_index(embeddings)
+        self._update_lexical_index(docs)
+
+    @property
+    def live_count(self) -> int:
+        return self.snapshot.live_count
+
+    def document_hash(self, source: str):
+        entry = self.sources.get(source)
+        return entry["hash"] if entry else None
+
+    def upsert_document(self, source: str, content_hash: str, docs: Iterable[Document],
+                        progress: Optional[Callable] = None) -> str:
+        """Add or replace every chunk of one source document.
+
+        ``docs`` may be a lazy iterator (e.g. ``doc_parser.iter_chunks``): chunks
+        are embedded in batches as they arrive, so embedding overlaps parsing.
+        Returns ``"added"``, ``"replaced"`` or ``"unchanged"`` (same content hash already indexed).
+        Only that document's rows are touched, and queries switch from the old
+        chunks to the new ones in a single snapshot swap.
+        """
+        if self.document_hash(source) == content_hash:
+            logger.info("Document %s unchanged; skipping re-index", source)
+            return "unchanged"
+
+        if progress:
+            progress("embedding", 0.3)
+        with self._uploading():
+            hidden = self._append_batches(docs, {"source": source, "content_hash": content_hash}, progress)
+            if progress:
+                progress("persisting", 0.8)
+            with self._write_lock:
+                previous = self.document_hash(source)
+                self._show_rows(source, hidden)
+                self._save_ann_index()
+        with self._write_lock:
+            if not self._maybe_compact():
+                self._publish()
+        return "replaced" if previous is not None else "added"
+
+    def _append_batches(self, docs: Iterable[Document], metadata: dict,
+                        progress: Optional[Callable] = None) -> List[Tuple[int, int]]:
+        """Embed ``docs`` in ``EMBED_BATCH_SIZE`` batches and append each one as hidden rows.
+
+        Parsing runs on a producer thread at most ``EMBED_PREFETCH`` batches
+        ahead and every batch is persisted as soon as it is embedded, so only a
+        few batches of embeddings are in memory however large the document is.
+        The rows are committed tombstoned and stay invisible, in queries and
+        after a restart, until :meth:`_show_rows`. Every embedded batch is also
+        checkpointed in the chunk embedding cache, so an interrupted indexing
+        run resumes from there. Returns the ``[start, end)`` ranges appended.
+        """
+        ranges, count = [], 0
+        for batch in prefetch_batches(docs, EMBED_BATCH_SIZE, depth=EMBED_PREFETCH):
+            for doc in batch:
+                doc.metadata = {**doc.metadata, **metadata}
+            # Embed outside the lock so queries and other jobs are not held up by inference
+            embeddings = self.embedding_service.embed_documents([doc.page_content for doc in batch])
+            with self._write_lock:
+                start = len(self.documents)
+                self._append_rows(embeddings, batch, hidden=True)
+                ranges.append((start, start + len(batch)))
+            count += len(batch)
+            if progress:
+                progress(f"embedding ({count} chunks)")
+        return ranges
+
+    def _show_rows(self, source: Optional[str], ranges: List[Tuple[int, int]]):
+        """Make the hidden rows in ``ranges`` live, replacing the rows of ``source``, in one manifest write."""
+        old_rows = np.empty(0, dtype=np.int64)
+        if source is not None:
+            self._touch(source)
+            entry = self.sources.pop(source, None)
+            if entry is not None:
+                old_rows = entry["rows"]
+        deleted = self.deleted.copy()  # the published snapshot keeps the old mask
+        deleted[old_rows] = True
+        for start, end in ranges:
+            deleted[start:end] = False
+        self.deleted = deleted
+        for start, end in ranges:
+            self._register_rows(start, self.documents[start:end])
+        try:
+            self.storage.mark_deleted(self._row_ranges(old_rows), restore=ranges)
+        except Exception:
+            logger.exception("Failed to persist the new rows of %s", source)
+        if len(old_rows):
+            logger.info("Replaced %d chunks of %s in vector store", len(old_rows), source)
+
+    @contextmanager
+    def _uploading(self):
+        """Mark an upload with hidden rows in flight; rewrites do not renumber rows meanwhile."""
+        with self._write_lock:
+            while self._rewrites_waiting:
+                self._uploads_changed.wait()
+            self._uploads += 1
+        try:
+            yield
+        finally:
+            with self._write_lock:
+                self._uploads -= 1
+                self._uploads_changed.notify_all()
+
+    def _wait_for_uploads(self):
+        """Called with the write lock held: wait (releasing it) until no upload has hidden rows."""
+        self._rewrites_waiting += 1
+        try:
+            while self._uploads:
+                self._uploads_changed.wait()
+        finally:
+            self._rewrites_waiting -= 1
+            self._uploads_changed.notify_all()
+
+    def delete_document(self, source: str) -> bool:
+        """Tombstone the rows of ``source``. Returns False if it is not indexed."""
+        with self._write_lock:
+            if not self._delete_rows(source):
+                return False
+            if not self._maybe_compact():
+                self._publish()
+            return True
+
+    def _delete_rows(self, source: str) -> bool:
+        self._touch(source)
+        entry = self.sources.pop(source, None)
+        if entry is None:
+            return False
+        rows = entry["rows"]
+        deleted = self.deleted.copy()  # the published snapshot keeps the old mask
+        deleted[rows] = True
+        self.deleted = deleted
+        try:
+            self.storage.mark_deleted(self._row_ranges(rows))
+        except Exception:
+            logger.exception("Failed to persist deletion of %s", source)
+        logger.info("Deleted %d chunks of %s from vector store", len(rows), source)
+        return True
+
+    def compact(self):
+        """Rewrite the live rows into a new generation and swap it in."""
+        with self._write_lock:
+            self._wait_for_uploads()
+            live = np.flatnonzero(~self.deleted)
+            logger.info("Compacting vector store: keeping %d of %d rows", len(live), len(self.documents))
+            vectors = np.asarray(self.vectors.array[live], dtype=np.float32) if len(live) else np.empty((0, 0), dtype=np.float32)
+            documents = [self.documents[i] for i in live]
+
+            storage = self.index_dir.create()
+            lexical_index = None
+            if self.lexical_index is not None:
+                # Written and fsync'd before the manifest commits the new generation
+                lexical_index = BM25Index(self.lexical_index.k1, self.lexical_index.b)
+                try:
+                    lexical_index.add(doc.page_content for doc in documents)
+                    self._persist_lexical_index(lexical_index, storage)
+                except Exception:
+                    logger.exception("Failed to write BM25 index for the compacted generation; it is rebuilt on load")
+            storage.append(vectors, documents)
+            self._switch_storage(storage)
+
+            self.documents = documents
+            self.deleted = np.zeros(len(documents), dtype=bool)
+            self.vectors = VectorMatrix.from_array(storage.load_vectors() if self.quantizer is not None else vectors)
+            if self.ann_index is not None:
+                self.ann_index.reset()
+            if self.quantizer is not None:
+                self.quantizer.reset()
+                self.codes.clear()
+            self._update_codes(self.vectors.array)
+            self._update_ann_index(self.vectors.array)
+            self.lexical_index = lexical_index
+            self._rebuild_sources()
+            self._publish()
+
+    def _maybe_compact(self) -> bool:
+        if self._uploads:
+            return False  # hidden rows count as deleted; compact once the uploads have committed
+        if len(self.documents) and (len(self.documents) - int(self.deleted.sum())) < (1 - self.COMPACT_DELETED_RATIO) * len(self.documents):
+            self.compact()
+            return True
+        return False
+
+    def rebuild(self, build: Callable[["VectorStoreService"], None]):
+        """Build a complete index off to the side, then swap it in atomically.
+
+        ``build`` fills a staging store backed by a fresh, unpublished
+        generation, without holding the write lock: uploads, deletes and
+        clears keep working meanwhile, and the documents they touched are
+        copied from the live index into the staging one just before the swap.
+        Queries keep using the current snapshot until the rebuilt one is
+        published; if ``build`` raises, the staging data is discarded.
+        """
+        with self._rebuild_lock:
+            with self._write_lock:
+                staging = VectorStoreService(self.embedding_service, self.index_dir.root, storage=self.index_dir.create())
+                self._rebuilding, self._rebuild_touched = True, set()
+            try:
+                build(staging)
+            except Exception:
+                logger.exception("Index rebuild failed; keeping the current index")
+                with self._write_lock:
+                    self._rebuilding = False
+                self.index_dir.remove(staging.storage)
+                raise
+            with self._write_lock:
+                self._wait_for_uploads()
+                self._rebuilding = False
+                touched = self._rebuild_touched
+                if touched is None:
+                    touched = set(staging.sources) | set(self.sources)
+                self._copy_sources_to(staging, touched)
+                self._swap_in(staging)
+
+    def _touch(self, source: Optional[str]):
+        if self._rebuilding and self._rebuild_touched is not None and source is not None:
+            self._rebuild_touched.add(source)
+
+    def _copy_sources_to(self, staging: "VectorStoreService", sources: Iterable[str]):
+        """Make ``staging`` hold exactly the live chunks this index has for ``sources``."""
+        for source in sources:
+            staging._delete_rows(source)
+            entry = self.sources.get(source)
+            if entry is not None and len(entry["rows"]):
+                rows = np.sort(entry["rows"])
+                staging._append_rows(np.asarray(self.vectors.array[rows], dtype=np.float32),
+                                     [self.documents[i] for i in rows])
+        if sources:
+            logger.info("Carried %d documents changed during the rebuild into the rebuilt index", len(sources))
+
+    def _swap_in(self, staging: "VectorStoreService"):
+        with self._write_lock:
+            if staging.lexical_index is not None:
+                try:
+                    self._persist_lexical_index(staging.lexical_index, staging.storage)
+                except Exception:
+                    logger.exception("Failed to write BM25 index for the rebuilt generation; it is rebuilt on load")
+            staging._save_ann_index()
+            self._switch_storage(staging.storage)
+            for name in ("vectors", "documents", "deleted", "sources", "ann_index", "quantizer", "codes",
+                         "lexical_index"):
+                setattr(self, name, getattr(staging, name))
+            self._publish()
+            logger.info("Published rebuilt index with %d chunks", self.live_count)
+
+    def _switch_storage(self, storage: IndexStorage):
+        """Make ``storage`` the live generation and retire the previous one."""
+        old_storage, old_generation = self.storage, self.generation
+        if not self._staging:
+            self.index_dir.publish(storage)
+        self.storage = storage
+        self.generation = Generation(os.path.basename(storage.index_dir))
+        # Deleted once the last query pinned to the old generation finishes
+        old_generation.retire(lambda: self.index_dir.remove(old_storage))
 
-    def add_documents(self, docs: List[Document]):
-        logger.info("Adding %d documents to vector store", len(docs))
-        texts = [doc.page_content for doc in docs]
-        embeddings = self.embedding_service.embed(texts)
-        self.vectors.extend(embeddings)
-        self.documents.extend(docs)
-        self.save_index()  # Save after adding
+    def _publish(self):
+        """Swap in a read snapshot of the current writer state."""
+        n = len(self.vectors)
+        quantizer = codes = ann_index = None
+        if self.quantizer is not None and self.quantizer.is_trained and len(self.codes) == n:
+            quantizer, codes = copy.copy(self.quantizer), self.codes.array
+        if self.ann_index is not None and self.ann_index.is_trained and self.ann_index.ntotal == n:
+            ann_index = self.ann_index.frozen()
+        lexical_index = None
+        if self.lexical_index is not None and self.lexical_index.ntotal == n:
+            lexical_index = self.lexical_index.frozen()
+        self.snapshot = IndexSnapshot(self.generation, self.vectors.array, self.documents, self.deleted,
+                                      codes=codes, quantizer=quantizer, ann_index=ann_index,
+                                      rescore_factor=RESCORE_FACTOR, lexical_index=lexical_index,
+                                      hybrid_candidates=HYBRID_CANDIDATES, rrf_k=RRF_K,
+                                      version=next(self._versions))
+
+    def _register_rows(self, start: int, docs: List[Document]):
+        grouped = {}
+        for offset, doc in enumerate(docs):
+            source = doc.metadata.get("source")
+            if source is not None:
+                grouped.setdefault(source, (doc.metadata.get("content_hash"), []))[1].append(start + offset)
+        for source, (content_hash, rows) in grouped.items():
+            self._touch(source)
+            entry = self.sources.setdefault(source, {"hash": content_hash, "rows": np.empty(0, dtype=np.int64)})
+            entry["hash"] = content_hash
+            entry["rows"] = np.concatenate([entry["rows"], np.asarray(rows, dtype=np.int64)])
+
+    def _rebuild_sources(self):
+        self.sources = {}
+        live = [i for i in range(len(self.documents)) if not self.deleted[i]]
+        for i in live:
+            doc = self.documents[i]
+            source = doc.metadata.get("source")
+            if source is None:
+                continue
+            entry = self.sources.setdefault(source, {"hash": doc.metadata.get("content_hash"), "rows": []})
+            entry["rows"].append(i)
+        for entry in self.sources.values():
+            entry["rows"] = np.asarray(entry["rows"], dtype=np.int64)
+
+    @staticmethod
+    def _row_ranges(rows: np.ndarray) -> List[Tuple[int, int]]:
+        """Collapse sorted row ids into ``[start, end)`` ranges."""
+        rows = np.sort(rows)
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        return [(int(run[0]), int(run[-1]) + 1) for run in np.split(rows, breaks) if len(run)]
 
     def similarity_search(self, query: str, k: int = 5) -> List[Document]:
-        if not self.vectors:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """Return the top-k documents for ``query`` with their cosine similarity.
+
+        In ``hybrid`` retrieval mode BM25 keyword matches are fused into the
+        ranking, so exact terms such as part numbers or names surface even
+        when the embedding misses them.
+        """
+        if not self.live_count:
             return []
 
         logger.debug("Performing similarity search for query with k=%d", k)
         query_vec = self.embedding_service.embed_single(query)
-        similarities = np.dot(self.vectors, query_vec)
-        top_k_indices = np.argsort(similarities)[-k:][::-1]
-        return [self.documents[i] for i in top_k_indices]
+        return self.similarity_search_by_vector_with_score(query_vec, k, query)
+
+    def similarity_search_by_vector_with_score(self, query_vec: np.ndarray, k: int = 5,
+                                               query: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Same as :meth:`similarity_search_with_score` for an already embedded query.
+
+        Pass the query text as ``query`` to include keyword matches; without it
+        only the vectors are searched.
+        """
+        snapshot = self.snapshot
+        with snapshot.reading():
+            indices, scores = snapshot.hybrid_search(query_vec, query, k)
+            return [(snapshot.documents[i], float(score)) for i, score in zip(indices, scores)]
+
+    def similarity_search_with_vectors(self, query_vec: np.ndarray, k: int = 5,
+                                       query: Optional[str] = None) -> Tuple[List[Document], np.ndarray, np.ndarray]:
+        """Like :meth:`similarity_search_by_vector_with_score`, also returning the rows' vectors.
+
+        Returns ``(documents, scores, vectors)``; the vectors are full-precision
+        copies, so callers can compare results with each other (e.g. for MMR).
+        """
+        snapshot = self.snapshot
+        with snapshot.reading():
+            indices, scores = snapshot.hybrid_search(query_vec, query, k)
+            vectors = np.asarray(snapshot.vectors[indices], dtype=np.float32) if len(indices) else np.empty((0, 0), dtype=np.float32)
+            return [snapshot.documents[i] for i in indices], np.asarray(scores, dtype=np.float32), vectors
+
+    def _update_codes(self, new_vectors: np.ndarray):
+        """Encode new rows for the coarse scan, refitting the quantizer when needed."""
+        if self.quantizer is None or not len(self.vectors):
+            return
+        try:
+            start = len(self.codes)
+            if self.quantizer.should_retrain(len(self.vectors)) or start + len(new_vectors) != len(self.vectors):
+                self.quantizer.train(self.vectors.array)
+                self.quantizer.save(self.storage.quantizer_path)
+                self.codes.clear()
+                start, new_vectors = 0, self.vectors.array
+            codes = self.quantizer.encode(new_vectors)
+            self.codes.append(codes)
+            self.storage.append_codes(codes, start)
+        except Exception:
+            logger.exception("Failed to update quantized codes; falling back to full-precision search")
+            self.quantizer.reset()
+            self.codes.clear()
+
+    def _load_codes(self):
+        if self.quantizer is None:
+            return
+        self.quantizer.reset()
+        self.codes.clear()
+        if os.path.exists(self.storage.quantizer_path):
+            try:
+                self.quantizer.load(self.storage.quantizer_path)
+                codes = self.storage.load_codes(self.quantizer.code_dtype, self.vectors.dim, len(self.vectors))
+                self.codes = VectorMatrix.from_array(codes, dtype=self.quantizer.code_dtype)
+            except Exception:
+                logger.exception("Failed to load quantized codes from %s; re-encoding", self.storage.codes_path)
+                self.quantizer.reset()
+                self.codes.clear()
+        missing = len(self.vectors) - len(self.codes)
+        if missing:
+            self._update_codes(self.vectors.array[-missing:])
+
+    def _update_ann_index(self, new_vectors: np.ndarray):
+        """Keep the ANN index in step with the vectors.
+
+        New rows are only assigned to cells in memory. The index is written
+        after a retrain and when an upload commits, at compaction or rebuild;
+        rows appended after the last write are re-assigned on load.
+        """
+        if self.ann_index is None or len(self.vectors) < IVF_MIN_TRAIN_SIZE:
+            return
+        try:
+            if self.ann_index.should_retrain(len(self.vectors)) or self.ann_index.ntotal + len(new_vectors) != len(self.vectors):
+                self.ann_index.fit(self.vectors.array)
+                self._save_ann_index()
+            else:
+                self.ann_index.add(new_vectors)
+        except Exception:
+            logger.exception("Failed to update ANN index; falling back to exact search")
+            self.ann_index.reset()
+
+    def _save_ann_index(self):
+        """Write the ANN index into the current generation; a missing or short file is rebuilt on load."""
+        if self.ann_index is None or not self.ann_index.is_trained:
+            return
+        try:
+            os.makedirs(self.storage.index_dir, exist_ok=True)
+            self.ann_index.save(self.storage.ann_path)
+        except Exception:
+            logger.exception("Failed to write ANN index to %s; it is rebuilt on load", self.storage.ann_path)
+
+    def _load_ann_index(self):
+        if self.ann_index is None:
+            return
+        self.ann_index.reset()
+        if os.path.exists(self.storage.ann_path):
+            try:
+                self.ann_index.load(self.storage.ann_path)
+            except Exception:
+                logger.exception("Failed to load ANN index from %s; rebuilding", self.storage.ann_path)
+                self.ann_index.reset()
+        if self.ann_index.ntotal > len(self.vectors):
+            self.ann_index.reset()  # stale: built over rows that are no longer committed
+        missing = len(self.vectors) - self.ann_index.ntotal
+        if missing:
+            self._update_ann_index(self.vectors.array[-missing:])
+
+    def _update_lexical_index(self, new_docs: List[Document]):
+        """Index new rows for keyword search.
+
+        Rows go into the BM25 delta tier in memory. The full posting lists are
+        written when the delta is merged and at compaction or rebuild; rows
+        appended after the last write are re-indexed from the documents on load.
+        """
+        if self.lexical_index is None:
+            return
+        try:
+            if self.lexical_index.ntotal + len(new_docs) != len(self.documents):
+                self.lexical_index.reset()
+                new_docs = self.documents
+            self.lexical_index.add(doc.page_content for doc in new_docs)
+            if self.lexical_index.merge_due:
+                self._persist_lexical_index(self.lexical_index, self.storage)
+        except Exception:
+            logger.exception("Failed to update BM25 index; falling back to dense-only search")
+            self.lexical_index.reset()
+
+    @staticmethod
+    def _persist_lexical_index(lexical_index: BM25Index, storage: IndexStorage):
+        """Merge the delta and write the whole BM25 index into ``storage`` (fsync'd)."""
+        lexical_index.merge()
+        os.makedirs(storage.index_dir, exist_ok=True)
+        lexical_index.save(storage.lexical_path)
+
+    def _load_lexical_index(self):
+        if self.lexical_index is None:
+            return
+        self.lexical_index.reset()
+        if os.path.exists(self.storage.lexical_path):
+            try:
+                self.lexical_index.load(self.storage.lexical_path)
+            except Exception:
+                logger.exception("Failed to load BM25 index from %s; rebuilding", self.storage.lexical_path)
+                self.lexical_index.reset()
+        if self.lexical_index.ntotal > len(self.documents):
+            self.lexical_index.reset()  # stale: built over rows that are no longer committed
+        missing = len(self.documents) - self.lexical_index.ntotal
+        if missing:
+            self._update_lexical_index(self.documents[-missing:])
 
     def save_index(self):
-        data = {
-            "vectors": self.vectors,
-            "documents": self.documents
-        }
+        """Rewrite the whole on-disk index from memory as a new generation."""
         try:
-            with open(self.index_path, "wb") as f:
-                pickle.dump(data, f)
+            self.compact()
             logger.info("Vector index saved: %s", self.index_path)
         except Exception:
             logger.exception("Failed to save vector index to %s", self.index_path)
 
     def load_index(self):
-        if os.path.exists(self.index_path):
-            try:
-                with open(self.index_path, "rb") as f:
-                    data = pickle.load(f)
-                    self.vectors = data.get("vectors", [])
-                    self.documents = data.get("documents", [])
-                logger.info("Loaded %d documents from index.", len(self.documents))
-            except Exception:
-                logger.exception("Failed to load vector index from %s", self.index_path)
-        else:
-            logger.info("No existing index found.")
+        with self._write_lock:
+            self._wait_for_uploads()
+            if os.path.exists(LEGACY_INDEX_PATH):
+                logger.warning("Ignoring legacy pickle index %s; documents will be re-indexed into %s. The old file can be deleted.",
+                               LEGACY_INDEX_PATH, self.index_dir.root)
+
+            storage = self.index_dir.current()
+            self.index_dir.remove_stale()
+            if storage is not None and storage.exists():
+                try:
+                    vectors, documents = storage.load()
+                    self.storage = storage
+                    self.generation = Generation(os.path.basename(storage.index_dir))
+                    self.vectors = VectorMatrix.from_array(vectors)  # read-only mmap, copied on first append
+                    self.documents = documents
+                    self.deleted = np.zeros(len(documents), dtype=bool)
+                    for start, end in self.storage.load_deleted():
+                        self.deleted[start:end] = True
+                    self._rebuild_sources()
+                    self._load_codes()
+                    self._load_ann_index()
+                    self._load_lexical_index()
+                    self._publish()
+                    logger.info("Loaded %d documents from index.", len(self.documents))
+                except Exception:
+                    logger.exception("Failed to load vector index from %s", storage.index_dir)
+            else:
+                logger.info("No existing index found.")
 
     def clear_index(self):
-        self.vectors = []
-        self.documents = []
-        if os.path.exists(self.index_path):
+        """Publish an empty index; the old generation is removed once no query uses it.
+
+        Uploads already in flight finish first, so none of their rows survive the clear.
+        """
+        with self._write_lock:
+            self._wait_for_uploads()
+            if self._rebuilding:
+                self._rebuild_touched = None  # a rebuild in progress must end up matching the cleared index
             try:
-                os.remove(self.index_path)
+                self._switch_storage(self.index_dir.create())
             except Exception:
-                logger.warning("Failed to remove index file: %s", self.index_path)
-        logger.info("Vector store cleared.")
+                logger.warning("Failed to publish empty index generation under %s", self.index_dir.root)
+            self.vectors = VectorMatrix()
+            self.documents = []
+            self.deleted = np.zeros(0, dtype=bool)
+            self.sources = {}
+            if self.ann_index is not None:
+                self.ann_index.reset()
+            if self.quantizer is not None:
+                self.quantizer.reset()
+                self.codes = VectorMatrix(dtype=self.quantizer.code_dtype)
+            if self.lexical_index is not None:
+                self.lexical_index.reset()
+            self._publish()
+            logger.info("Vector store cleared.")
@@ -0,0 +1,61 @@
+"""Recall@k vs latency of the IVF-flat index against the exact scan.
+
+Runs on synthetic clustered, unit-norm vectors shaped like MiniLM embeddings
+so it needs only numpy:
+
+    python benchmarks/ann_recall.py --n 200000 --nprobe 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.ann_index import IVFFlatIndex  # noqa: E402
+from services.vector_matrix import VectorMatrix  # noqa: E402
+
+
+def make_corpus(n, dim, n_topics, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n + args.queries, args.dim, n_topics=max(10, args.n // 500))
+    vectors, queries = corpus[:args.n], corpus[args.n:]
+    matrix = VectorMatrix.from_array(vectors)
+
+    start = time.perf_counter()
+    exact = [matrix.top_k(q, args.k)[0] for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"exact      n={args.n} dim={args.dim}  {exact_ms:7.3f} ms/query  recall@{args.k}=1.000")
+
+    index = IVFFlatIndex(nlist=args.nlist)
+    start = time.perf_counter()
+    index.fit(vectors)
+    print(f"ivf train  nlist={index.centroids.shape[0]}  {time.perf_counter() - start:.1f} s")
+
+    for nprobe in args.nprobe:
+        start = time.perf_counter()
+        approx = [index.search(vectors, q, args.k, nprobe=nprobe)[0] for q in queries]
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+        print(f"ivf        nprobe={nprobe:<3d}  {ivf_ms:7.3f} ms/query  recall@{args.k}={recall:.3f}  speedup={exact_ms / ivf_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
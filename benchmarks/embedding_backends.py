@@ -0,0 +1,85 @@
+"""Embedding throughput and parity of the CPU inference backends against fp32 PyTorch.
+
+Every backend encodes the same texts, in batches (indexing) and one at a time
+(queries); the embeddings are compared with the fp32 ``torch`` reference by
+cosine similarity and nearest-neighbour recall. The texts are synthetic unless
+``--texts`` points to a file with one text per line:
+
+    python benchmarks/embedding_backends.py --model sentence-transformers/all-MiniLM-L6-v2
+    python benchmarks/embedding_backends.py --model ./models/bge-m3 --backends torch-int8,onnx --threads 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.embedding_backends import load_sentence_transformer, parity_report  # noqa: E402
+
+WORDS = ("invoice payment account refund policy delivery order customer support contract warranty "
+         "address schedule office manager report annual budget project team service request").split()
+
+
+def synthetic_texts(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=rng.integers(8, 60))) for _ in range(n)]
+
+
+def encode(model, texts, batch_size):
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def measure(model, texts, queries, batch_size):
+    encode(model, texts[:batch_size], batch_size)  # warm-up
+    start = time.perf_counter()
+    vectors = encode(model, texts, batch_size)
+    batch_tps = len(texts) / (time.perf_counter() - start)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        encode(model, [query], 1)
+        latencies.append(time.perf_counter() - started)
+    return vectors, batch_tps, np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", required=True, help="SentenceTransformer id or path")
+    parser.add_argument("--backends", default="torch-int8,onnx", help="comma-separated backends to compare")
+    parser.add_argument("--texts", default=None, help="file with one text per line")
+    parser.add_argument("--n", type=int, default=1000, help="number of synthetic texts")
+    parser.add_argument("--queries", type=int, default=100, help="single-text encodes to time")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads, 0 = library default")
+    parser.add_argument("--onnx-file", default=None, help="ONNX file inside the model, e.g. a quantized export")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = synthetic_texts(args.n)
+    queries = texts[:args.queries]
+
+    print(f"model={args.model} texts={len(texts)} batch_size={args.batch_size} threads={args.threads or 'default'}")
+    print(f"{'backend':<12}{'batch texts/s':>15}{'query p50 ms':>14}{'query p99 ms':>14}"
+          f"{'mean cos':>10}{'min cos':>10}{f'nn@{args.k}':>8}")
+    reference = None
+    for backend in ["torch"] + [b.strip() for b in args.backends.split(",") if b.strip() and b.strip() != "torch"]:
+        model = load_sentence_transformer(args.model, backend, args.threads, args.onnx_file)
+        vectors, batch_tps, query_ms = measure(model, texts, queries, args.batch_size)
+        if reference is None:
+            reference = vectors
+        parity = parity_report(reference, vectors, args.k)
+        recall = next(v for key, v in parity.items() if key.startswith("neighbour_recall"))
+        print(f"{backend:<12}{batch_tps:>15.1f}{np.percentile(query_ms, 50):>14.2f}{np.percentile(query_ms, 99):>14.2f}"
+              f"{parity['mean_cosine']:>10.4f}{parity['min_cosine']:>10.4f}{recall:>8.3f}")
+        del model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Keyword-match quality and latency of the BM25 index used for hybrid retrieval.
+
+Builds a synthetic corpus where some chunks mention a unique part code
+("XK-48213") among common filler words, then queries each code the way a
+user would. Reports how often the chunk is retrieved and BM25 query latency
+next to a full scan of every chunk, at growing corpus sizes:
+
+    python benchmarks/hybrid_retrieval.py --sizes 10000 100000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.lexical_index import BM25Index  # noqa: E402
+
+WORDS = ("pump valve seal pressure flow motor bearing shaft housing filter inlet outlet gasket torque "
+         "install replace inspect maintenance schedule warranty manual safety operating temperature").split()
+
+
+def make_corpus(n: int, n_codes: int, rng: np.random.Generator):
+    texts = [" ".join(rng.choice(WORDS, size=rng.integers(20, 60))) for _ in range(n)]
+    rows = rng.choice(n, size=n_codes, replace=False)
+    codes = [f"XK-{10000 + i}" for i in range(n_codes)]
+    for row, code in zip(rows, codes):
+        texts[row] += f" part {code}"
+    return texts, dict(zip(codes, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        texts, code_rows = make_corpus(n, args.queries, rng)
+        index = BM25Index()
+        start = time.perf_counter()
+        index.add(texts)
+        build_s = time.perf_counter() - start
+        queries = [(f"which pump uses part {code}?", row) for code, row in code_rows.items()]
+
+        start = time.perf_counter()
+        hits = sum(row in index.search(q, args.k)[0] for q, row in queries)
+        bm25_us = (time.perf_counter() - start) * 1e6 / len(queries)
+        start = time.perf_counter()
+        for code in list(code_rows)[:50]:
+            [i for i, t in enumerate(texts) if code in t]
+        scan_us = (time.perf_counter() - start) * 1e6 / 50
+
+        print(f"n={n:8d} vocab={index.vocabulary_size} build={build_s:.2f}s "
+              f"hit@{args.k}={hits / len(queries):.3f}  bm25={bm25_us:9.1f} us/query  full scan={scan_us:9.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Tail latency and call cost of LLMClient with and without hedged requests, offline.
+
+Two simulated backends answer in ``--latency-ms`` but a ``--slow-share`` of
+calls take ``--slow-ms``, the pattern that dominates p99 for hosted LLMs.
+Requests run ``--concurrency`` at a time:
+
+    python benchmarks/llm_hedging.py --requests 400 --slow-share 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.llm_service import LLMClient, LocalBackend  # noqa: E402
+
+
+def make_backends(args, seed: int):
+    return [LocalBackend(args.latency_ms / 1000, args.slow_share, args.slow_ms / 1000, args.failure_rate, seed=seed + i)
+            for i in range(2)]
+
+
+async def run(client: LLMClient, n_requests: int, concurrency: int) -> np.ndarray:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.agenerate_answer("The pump needs a new seal. Other text.", "what does the pump need?")
+            except Exception:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    return np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--slow-ms", type=float, default=1000)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    for label, quantile in (("failover only", 0.0), ("hedged at p95", 0.95)):
+        backends = make_backends(args, seed=0)
+        # Start from the no-hedge delay an operator would configure before latencies are known
+        client = LLMClient(backends, hedge_quantile=quantile, hedge_delay=4 * args.latency_ms / 1000)
+        ms = asyncio.run(run(client, args.requests, args.concurrency))
+        calls = sum(b.calls for b in backends)
+        print(f"{label:14s} p50={np.percentile(ms, 50):7.1f} ms  p95={np.percentile(ms, 95):7.1f} ms  "
+              f"p99={np.percentile(ms, 99):7.1f} ms  calls/request={calls / args.requests:.3f}  hedges={client.hedges}")
+
+
+if __name__ == "__main__":
+    main()
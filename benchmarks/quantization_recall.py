@@ -0,0 +1,57 @@
+"""Memory, scan latency and recall@k of quantized codes with exact rescoring.
+
+Compares the float32 exact scan with the int8 coarse scan that rescores a
+shortlist against the full-precision vectors:
+
+    python benchmarks/quantization_recall.py --n 200000 --rescore-factor 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.quantization import SUPPORTED_KINDS, ScalarQuantizer  # noqa: E402
+from services.vector_matrix import VectorMatrix  # noqa: E402
+
+from ann_recall import make_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n + args.queries, args.dim, n_topics=max(10, args.n // 500))
+    vectors, queries = corpus[:args.n], corpus[args.n:]
+    matrix = VectorMatrix.from_array(vectors)
+
+    start = time.perf_counter()
+    exact = [matrix.top_k(q, args.k)[0] for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"float32  {matrix.nbytes / 2**20:8.1f} MiB  {exact_ms:7.3f} ms/query  recall@{args.k}=1.000")
+
+    for kind in SUPPORTED_KINDS:
+        quantizer = ScalarQuantizer(kind)
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+
+        start = time.perf_counter()
+        approx = [quantizer.search(codes, vectors, q, args.k, args.rescore_factor)[0] for q in queries]
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+        coarse = np.mean([len(set(np.argsort(-quantizer.scores(codes, q))[:args.k]) & set(e)) / args.k
+                          for q, e in zip(queries[:50], exact[:50])])
+        print(f"{kind:<8s} {codes.nbytes / 2**20:8.1f} MiB  {ms:7.3f} ms/query  recall@{args.k}={recall:.3f}"
+              f"  (coarse only {coarse:.3f}, {matrix.nbytes / codes.nbytes:.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
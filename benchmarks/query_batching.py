@@ -0,0 +1,110 @@
+"""Throughput and latency of query embedding with and without the micro-batcher.
+
+Distinct queries arrive at a fixed average rate as concurrent async requests,
+and every blocking call goes through ``run_blocking`` (the ``CPU_WORKERS``
+executor), as on the serving path. Three variants are compared: one model
+call per query, the batcher's blocking ``submit`` called from the executor
+(batches are capped by its worker count), and the awaitable ``asubmit``.
+By default the encoder is simulated (a fixed per-call cost plus a per-item
+cost, the shape of a transformer forward pass on CPU); pass ``--model`` to
+measure a real SentenceTransformer instead:
+
+    python benchmarks/query_batching.py --rate 200 --queries 1000
+    python benchmarks/query_batching.py --model sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+
+class SimulatedEncoder:
+    """Model calls hold the (simulated) CPU exclusively, as a forward pass using all cores does."""
+
+    def __init__(self, call_ms: float, item_ms: float, dim: int = 384):
+        self.call_s, self.item_s, self.dim = call_ms / 1000, item_ms / 1000, dim
+        self._cpu = threading.Lock()
+
+    def encode(self, texts):
+        with self._cpu:
+            time.sleep(self.call_s + self.item_s * len(texts))
+        return np.zeros((len(texts), self.dim), dtype=np.float32)
+
+
+async def run(embed_one, n_queries: int, rate: float, seed: int = 0):
+    """Open-loop load: queries arrive at ``rate`` per second (Poisson), each as its own task."""
+    arrivals = np.cumsum(np.random.default_rng(seed).exponential(1 / rate, n_queries))
+    latencies = np.empty(n_queries)
+
+    async def one(i, arrival):
+        await embed_one(f"query number {i}")
+        latencies[i] = time.perf_counter() - arrival
+
+    start = time.perf_counter()
+    tasks = []
+    for i, offset in enumerate(arrivals):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i, start + offset)))
+    await asyncio.gather(*tasks)
+    return n_queries / (time.perf_counter() - start), latencies * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=200, help="query arrivals per second")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="CPU_WORKERS threads behind run_blocking")
+    parser.add_argument("--call-ms", type=float, default=8, help="simulated fixed cost per model call")
+    parser.add_argument("--item-ms", type=float, default=0.5, help="simulated cost per query in a batch")
+    parser.add_argument("--model", default=None, help="SentenceTransformer id/path instead of the simulation")
+    args = parser.parse_args()
+
+    os.environ["CPU_WORKERS"] = str(args.workers)  # read when core.concurrency is imported
+    from core.batching import MicroBatcher
+    from core.concurrency import run_blocking
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        encode = lambda texts: model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)  # noqa: E731
+    else:
+        encode = SimulatedEncoder(args.call_ms, args.item_ms).encode
+
+    async def direct(text):
+        return await run_blocking(lambda: encode([text])[0])
+
+    blocking = MicroBatcher(encode, args.max_batch, args.max_wait_ms / 1000, name="blocking")
+    awaited = MicroBatcher(encode, args.max_batch, args.max_wait_ms / 1000, name="awaited")
+
+    async def blocking_submit(text):
+        return await run_blocking(blocking.submit, text)
+
+    results = [
+        ("one call per query", asyncio.run(run(direct, args.queries, args.rate)), None),
+        ("submit in executor", asyncio.run(run(blocking_submit, args.queries, args.rate)), blocking),
+        ("asubmit", asyncio.run(run(awaited.asubmit, args.queries, args.rate)), awaited),
+    ]
+
+    print(f"queries={args.queries} rate={args.rate:.0f}/s workers={args.workers} "
+          f"max_batch={args.max_batch} max_wait={args.max_wait_ms}ms")
+    for label, (qps, ms), batcher in results:
+        line = (f"{label:<20}{qps:8.1f} q/s  p50={np.percentile(ms, 50):7.1f} ms  "
+                f"p99={np.percentile(ms, 99):7.1f} ms")
+        if batcher is not None:
+            stats = batcher.stats()
+            line += f"  avg batch={stats['avg_batch_size']:.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
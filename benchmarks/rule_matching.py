@@ -0,0 +1,100 @@
+"""Matching latency of the compiled RuleEngine against a per-rule regex loop.
+
+Generates a synthetic FAQ rule set (keyword phrases plus a few regex rules
+with mixed priorities) and replays queries where most miss, as in real
+traffic that falls through to the LLM:
+
+    python benchmarks/rule_matching.py --rules 10000 --queries 2000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.chatbot.engine import Rule, RuleEngine  # noqa: E402
+
+WORDS = ("refund policy order status shipping delivery return exchange warranty invoice payment card "
+         "account password login address store hours holiday discount coupon gift size color stock "
+         "cancel track price match loyalty points subscription plan upgrade device repair").split()
+
+
+def make_rules(n_rules: int, n_patterns: int, rng: np.random.Generator):
+    rules = []
+    for i in range(n_rules):
+        phrases = [" ".join(rng.choice(WORDS, size=rng.integers(2, 4))) + f" q{i}" for _ in range(rng.integers(1, 4))]
+        rules.append(Rule(f"faq-{i}", lambda _, i=i: f"answer {i}", keywords=phrases, priority=int(rng.integers(0, 5))))
+    for i in range(n_patterns):
+        rules.append(Rule(f"re-{i}", lambda _, i=i: f"pattern {i}", pattern=rf"\bticket\s*#?{i}\d*\b",
+                          priority=int(rng.integers(0, 5))))
+    return rules
+
+
+def make_queries(rules, n_queries: int, hit_share: float, rng: np.random.Generator):
+    queries = []
+    for _ in range(n_queries):
+        filler = " ".join(rng.choice(WORDS, size=rng.integers(4, 12)))
+        if rng.random() < hit_share:
+            rule = rules[rng.integers(len(rules))]
+            needle = rule.keywords[0] if rule.keywords else f"ticket #{rule.name.split('-')[1]}"
+            queries.append(f"hey, {filler} {needle} please")
+        else:
+            queries.append(f"can you tell me about {filler}")
+    return queries
+
+
+def naive_matcher(rules):
+    """The previous RuleBasedBot approach: try each rule's regex in priority order."""
+    ordered = sorted(rules, key=lambda r: -r.priority)
+    compiled = []
+    for rule in ordered:
+        parts = [r"\b" + re.escape(k).replace(r"\ ", r"\s+") + r"\b" for k in rule.keywords]
+        if rule.pattern:
+            parts.append(rule.pattern)
+        compiled.append((re.compile("|".join(parts), re.IGNORECASE), rule))
+
+    def match(text):
+        for pattern, rule in compiled:
+            if pattern.search(text):
+                return rule
+        return None
+    return match
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--patterns", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--hit-share", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rules = make_rules(args.rules, args.patterns, rng)
+    queries = make_queries(rules, args.queries, args.hit_share, rng)
+
+    start = time.perf_counter()
+    engine = RuleEngine(rules)
+    compile_s = time.perf_counter() - start
+    naive = naive_matcher(rules)
+
+    start = time.perf_counter()
+    expected = [naive(q) for q in queries]
+    naive_us = (time.perf_counter() - start) * 1e6 / len(queries)
+    start = time.perf_counter()
+    got = [engine.match(q) for q in queries]
+    engine_us = (time.perf_counter() - start) * 1e6 / len(queries)
+
+    agree = sum(a is b for a, b in zip(expected, got)) / len(queries)
+    print(f"rules={len(rules)} queries={len(queries)} hits={sum(r is not None for r in got)} "
+          f"compile={compile_s:.2f}s agreement={agree:.3f}")
+    print(f"per-rule loop  {naive_us:10.1f} us/query")
+    print(f"RuleEngine     {engine_us:10.1f} us/query  speedup={naive_us / max(engine_us, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Latency of TranslationService with and without its cache, offline.
+
+Replays a Zipf-distributed stream of phrases (voice queries repeat a lot)
+against a stand-in backend that sleeps to simulate a remote call, so no
+network is needed. Any backend can be measured with ``--backend``:
+
+    python benchmarks/translation_cache.py --requests 2000 --latency-ms 80
+    python benchmarks/translation_cache.py --backend mypkg.offline:MarianBackend --latency-ms 0
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.translator import TranslationBackend, TranslationService, load_backend  # noqa: E402
+
+
+class SimulatedRemoteBackend(TranslationBackend):
+    name = "simulated"
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return f"[{target}] {text}"
+
+
+def make_workload(n_requests: int, n_phrases: int, english_share: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    phrase_ids = np.minimum(rng.zipf(1.3, n_requests), n_phrases) - 1
+    langs = np.where(rng.random(n_requests) < english_share, "en-IN", "ta-IN")
+    return [(f"phrase number {i}", lang) for i, lang in zip(phrase_ids, langs)]
+
+
+def run(service: TranslationService, workload) -> float:
+    start = time.perf_counter()
+    for text, lang in workload:
+        service.translate(text, lang, "en")
+    return (time.perf_counter() - start) * 1000 / len(workload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--phrases", type=int, default=200)
+    parser.add_argument("--english-share", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--cache-size", type=int, default=2048)
+    parser.add_argument("--backend", default=None, help="backend name or module:Class (default: simulated remote)")
+    args = parser.parse_args()
+
+    workload = make_workload(args.requests, args.phrases, args.english_share)
+
+    def backend():
+        return load_backend(args.backend) if args.backend else SimulatedRemoteBackend(args.latency_ms / 1000)
+
+    uncached = TranslationService(backend(), cache_size=0)
+    cached = TranslationService(backend(), cache_size=args.cache_size)
+    uncached_ms = run(uncached, workload)
+    cached_ms = run(cached, workload)
+
+    stats = cached.cache_stats()
+    print(f"requests={len(workload)} distinct phrases={len(set(t for t, _ in workload))} "
+          f"english={args.english_share:.0%}")
+    print(f"no cache   {uncached_ms:8.3f} ms/request")
+    print(f"LRU cache  {cached_ms:8.3f} ms/request  hit rate={stats['hit_rate']:.3f}  "
+          f"speedup={uncached_ms / max(cached_ms, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from services.ann_index import IVFFlatIndex
+from services.vector_matrix import VectorMatrix
+
+
+def clustered(n, dim=32, n_topics=40, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall(index, vectors, queries, k=5, **kwargs):
+    matrix = VectorMatrix.from_array(vectors)
+    hits = 0
+    for query in queries:
+        exact, _ = matrix.top_k(query, k)
+        approx, _ = index.search(vectors, query, k, **kwargs)
+        hits += len(set(exact) & set(approx))
+    return hits / (k * len(queries))
+
+
+@pytest.fixture(scope="module")
+def data():
+    corpus = clustered(5100)
+    return corpus[:5000], corpus[5000:]
+
+
+def test_recall_against_exact_search(data):
+    vectors, queries = data
+    index = IVFFlatIndex(nlist=64, nprobe=8)
+    index.fit(vectors)
+    assert index.ntotal == len(vectors)
+    assert recall(index, vectors, queries) >= 0.9
+    # Probing every cell is an exact search
+    assert recall(index, vectors, queries, nprobe=64) == 1.0
+
+
+def test_returned_scores_are_exact_and_sorted(data):
+    vectors, queries = data
+    index = IVFFlatIndex(nlist=64, nprobe=8)
+    index.fit(vectors)
+    ids, scores = index.search(vectors, queries[0], 10)
+    np.testing.assert_allclose(scores, vectors[ids] @ queries[0], rtol=1e-6)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_added_rows_and_exclusions(data):
+    vectors, queries = data
+    index = IVFFlatIndex(nlist=64, nprobe=64)
+    index.fit(vectors[:4000])
+    index.add(vectors[4000:])
+    assert index.ntotal == len(vectors)
+
+    target = 4500
+    ids, _ = index.search(vectors, vectors[target], 1)
+    assert ids[0] == target
+    exclude = np.zeros(len(vectors), dtype=bool)
+    exclude[target] = True
+    ids, _ = index.search(vectors, vectors[target], 5, exclude=exclude)
+    assert target not in ids
+
+
+def test_frozen_copy_is_not_affected_by_later_adds(data):
+    vectors, _ = data
+    index = IVFFlatIndex(nlist=16)
+    index.fit(vectors[:1000])
+    frozen = index.frozen()
+    index.add(vectors[1000:2000])
+    assert frozen.ntotal == 1000 and index.ntotal == 2000
+
+
+def test_retrain_threshold_and_persistence(tmp_path, data):
+    vectors, queries = data
+    index = IVFFlatIndex(nlist=32)
+    assert index.should_retrain(10)
+    index.fit(vectors[:500])
+    assert not index.should_retrain(500 * IVFFlatIndex.RETRAIN_GROWTH_FACTOR)
+    assert index.should_retrain(500 * IVFFlatIndex.RETRAIN_GROWTH_FACTOR + 1)
+
+    path = str(tmp_path / "ivf.npz")
+    index.save(path)
+    loaded = IVFFlatIndex(nlist=32)
+    loaded.load(path)
+    assert loaded.trained_size == 500 and loaded.ntotal == 500
+    np.testing.assert_array_equal(loaded.search(vectors, queries[0], 5)[0], index.search(vectors, queries[0], 5)[0])
+
+
+def test_add_requires_training():
+    with pytest.raises(RuntimeError):
+        IVFFlatIndex().add(np.ones((1, 4), dtype=np.float32))
@@ -0,0 +1,60 @@
+import numpy as np
+
+from services import answer_cache as answer_cache_module
+from services.answer_cache import SemanticAnswerCache
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+QUESTION = unit(1, 0, 0)
+PARAPHRASE = unit(1, 0.2, 0)  # cosine ~0.98 with QUESTION
+OTHER = unit(0, 1, 0)
+
+
+def test_paraphrases_share_an_answer():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.put(QUESTION, "Check the seals monthly.", version=1, scope=5)
+    assert cache.get(PARAPHRASE, version=1, scope=5) == "Check the seals monthly."
+    assert cache.get(OTHER, version=1, scope=5) is None
+    assert cache.get(PARAPHRASE, version=1, scope=3) is None  # different retrieval depth
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_the_most_similar_entry_wins():
+    cache = SemanticAnswerCache(threshold=0.5)
+    cache.put(unit(1, 0.5, 0), "near", version=1)
+    cache.put(QUESTION, "exact", version=1)
+    assert cache.get(QUESTION, version=1) == "exact"
+
+
+def test_index_changes_invalidate_and_stale_answers_are_not_stored():
+    cache = SemanticAnswerCache()
+    cache.put(QUESTION, "old", version=1)
+    assert cache.get(QUESTION, version=2) is None
+    assert len(cache) == 0
+    cache.put(QUESTION, "computed before the index changed", version=1)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(maxsize=2, threshold=0.99)
+    cache.put(unit(1, 0, 0), "x", version=1)
+    cache.put(unit(0, 1, 0), "y", version=1)
+    cache.get(unit(1, 0, 0), version=1)
+    cache.put(unit(0, 0, 1), "z", version=1)
+    assert cache.get(unit(0, 1, 0), version=1) is None
+    assert cache.get(unit(1, 0, 0), version=1) == "x"
+    assert cache.get(unit(0, 0, 1), version=1) == "z"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [50.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(ttl=30)
+    cache.put(QUESTION, "answer", version=1)
+    now[0] += 31
+    assert cache.get(QUESTION, version=1) is None
+    assert len(cache) == 0
@@ -0,0 +1,33 @@
+from services.answer_router import EXTRACTIVE_CONFIDENT, EXTRACTIVE_OVER_BUDGET, LLM, AnswerRouter
+
+
+def test_extractive_answers_are_off_by_default():
+    router = AnswerRouter()
+    assert router.choose(1.0, 1) == LLM
+
+
+def test_confidence_threshold_is_inclusive():
+    router = AnswerRouter(confidence_threshold=0.8, max_extractive_tokens=64)
+    assert router.choose(0.8, 10) == EXTRACTIVE_CONFIDENT
+    assert router.choose(0.7999, 10) == LLM
+
+
+def test_long_chunks_go_to_the_llm():
+    router = AnswerRouter(confidence_threshold=0.8, max_extractive_tokens=64)
+    assert router.choose(0.95, 64) == EXTRACTIVE_CONFIDENT
+    assert router.choose(0.95, 65) == LLM
+
+
+def test_llm_budget_falls_back_to_extractive():
+    router = AnswerRouter(llm_calls_per_minute=2)
+    assert [router.choose(0.1, 10) for _ in range(3)] == [LLM, LLM, EXTRACTIVE_OVER_BUDGET]
+
+
+def test_stats_count_routes():
+    router = AnswerRouter()
+    router.record(LLM, 0.2)
+    router.record(LLM, 0.4)
+    stats = router.stats()
+    assert stats["total"] == 2
+    assert stats["routes"][LLM]["count"] == 2
+    assert abs(stats["routes"][LLM]["avg_latency_ms"] - 300) < 1e-6
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.api_client import _iter_sse, iter_sentences  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def test_sse_events_are_parsed():
+    response = FakeResponse(['data: {"text": "Hello"}', "", "event: done", 'data: {"source": "llm"}', "", ""])
+    assert list(_iter_sse(response)) == [("message", {"text": "Hello"}), ("done", {"source": "llm"})]
+
+
+def test_pieces_are_regrouped_into_sentences():
+    pieces = ["The seal should be ", "checked monthly. Replace", " it yearly. Ok. Call", " support if it leaks"]
+    assert list(iter_sentences(iter(pieces))) == [
+        "The seal should be checked monthly.",
+        "Replace it yearly. Ok.",  # short sentences are joined up to min_chars
+        "Call support if it leaks",
+    ]
+
+
+def test_closing_the_sentences_closes_the_stream():
+    closed = []
+
+    def pieces():
+        try:
+            yield "First sentence is long enough. "
+            yield "Second one never gets read."
+        finally:
+            closed.append(True)
+
+    sentences = iter_sentences(pieces())
+    assert next(sentences) == "First sentence is long enough."
+    sentences.close()
+    assert closed == [True]
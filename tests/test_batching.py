@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [item.upper() for item in items]
+
+
+def test_concurrent_callers_share_one_batch():
+    gate, busy = threading.Event(), threading.Event()
+    fn = Recorder()
+
+    def blocking(items):
+        if items == ["warm-up"]:
+            busy.set()
+            gate.wait(5)
+        return fn(items)
+
+    batcher = MicroBatcher(blocking, max_batch=8, max_wait=1.0)
+    warm_up = threading.Thread(target=batcher.submit, args=("warm-up",))
+    warm_up.start()
+    assert busy.wait(5)
+
+    async def ask_all():
+        # Queue every request while the worker is busy, then let it collect them
+        tasks = [asyncio.ensure_future(batcher.asubmit(q)) for q in ["a", "b", "a", "c"]]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(ask_all()) == ["A", "B", "A", "C"]
+    warm_up.join()
+    # Identical items are computed once; collection stopped once every caller was in
+    assert fn.batches == [["warm-up"], ["a", "b", "c"]]
+    assert batcher.stats()["items"] == 5 and batcher.stats()["batches"] == 2
+
+
+def test_lone_request_does_not_wait_for_company():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch=8, max_wait=30.0)
+    done = []
+    thread = threading.Thread(target=lambda: done.append(batcher.submit("solo")))
+    thread.start()
+    thread.join(timeout=5)
+    assert done == ["SOLO"]
+
+
+def test_batches_are_capped_at_max_batch():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch=2, max_wait=1.0)
+
+    async def ask_all():
+        return await asyncio.gather(*(batcher.asubmit(str(i)) for i in range(5)))
+
+    assert asyncio.run(ask_all()) == ["0", "1", "2", "3", "4"]
+    assert all(len(batch) <= 2 for batch in fn.batches)
+    assert sum(len(batch) for batch in fn.batches) == 5
+
+
+def test_a_failing_batch_fails_every_caller():
+    batcher = MicroBatcher(Recorder(fail=True), max_batch=4, max_wait=1.0)
+
+    async def ask_all():
+        return await asyncio.gather(*(batcher.asubmit(q) for q in ["a", "b"]), return_exceptions=True)
+
+    results = asyncio.run(ask_all())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # The worker survives and serves the next batch
+    batcher.fn = Recorder()
+    assert batcher.submit("x") == "X"
+
+
+def test_batching_disabled_calls_directly():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch=1)
+    assert batcher.submit("q") == "Q"
+    assert asyncio.run(batcher.asubmit("r")) == "R"
+    assert fn.batches == [["q"], ["r"]]
+    assert batcher._worker is None
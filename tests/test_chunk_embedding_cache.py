@@ -0,0 +1,65 @@
+import numpy as np
+
+from services.chunk_embedding_cache import ChunkEmbeddingCache, content_hash
+
+
+def vectors(n, dim=4, start=0):
+    return np.arange(start * dim, (start + n) * dim, dtype=np.float32).reshape(n, dim)
+
+
+def digests(*texts):
+    return [content_hash(t) for t in texts]
+
+
+def test_put_get_and_reload(tmp_path):
+    cache = ChunkEmbeddingCache(str(tmp_path), "model")
+    cache.put_many(digests("a", "b"), vectors(2))
+    hits, misses = cache.get_many(digests("b", "c", "a"))
+    assert misses == [1]
+    np.testing.assert_array_equal(hits[0], vectors(2)[1])
+    np.testing.assert_array_equal(hits[2], vectors(2)[0])
+
+    reloaded = ChunkEmbeddingCache(str(tmp_path), "model")
+    assert len(reloaded) == 2
+    assert ChunkEmbeddingCache(str(tmp_path), "other-model").get_many(digests("a"))[1] == [0]
+
+
+def test_duplicates_in_one_batch_are_stored_once(tmp_path):
+    cache = ChunkEmbeddingCache(str(tmp_path), "model")
+    cache.put_many(digests("a", "a", "b"), vectors(3))
+    assert len(cache) == 2
+
+
+def test_nothing_is_pruned_below_the_cap(tmp_path):
+    cache = ChunkEmbeddingCache(str(tmp_path), "model", max_entries=10)
+    cache.put_many(digests(*"abcdefghij"), vectors(10))
+    assert len(cache) == 10
+    assert cache.get_many(digests(*"abcdefghij"))[1] == []
+
+
+def test_cap_drops_least_recently_used_entries(tmp_path):
+    cache = ChunkEmbeddingCache(str(tmp_path), "model", max_entries=4)
+    cache.put_many(digests("a", "b", "c", "d"), vectors(4))
+    cache.get_many(digests("a"))  # "a" is now the most recently used
+    cache.put_many(digests("e"), vectors(1, start=4))  # over the cap: keep 3
+
+    hits, misses = cache.get_many(digests("a", "b", "c", "d", "e"))
+    assert sorted(hits) == [0, 3, 4] and misses == [1, 2]
+    np.testing.assert_array_equal(hits[0], vectors(1)[0])
+    np.testing.assert_array_equal(hits[4], vectors(1, start=4)[0])
+
+    # The recency order (d, a, e) survives a reload: d and a are dropped before e
+    reloaded = ChunkEmbeddingCache(str(tmp_path), "model", max_entries=4)
+    reloaded.put_many(digests("f", "g"), vectors(2, start=5))
+    assert reloaded.get_many(digests("d", "e", "a", "f", "g"))[1] == [0, 2]
+
+
+def test_uncommitted_vector_tail_is_ignored(tmp_path):
+    cache = ChunkEmbeddingCache(str(tmp_path), "model")
+    cache.put_many(digests("a"), vectors(1))
+    with open(cache.vectors_path, "ab") as f:
+        f.write(vectors(1, start=1).tobytes())  # a crash after writing vectors, before their keys
+    reloaded = ChunkEmbeddingCache(str(tmp_path), "model")
+    assert len(reloaded) == 1
+    reloaded.put_many(digests("b"), vectors(1, start=2))
+    np.testing.assert_array_equal(reloaded.get_many(digests("b"))[0][0], vectors(1, start=2)[0])
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+from core.concurrency import run_blocking, run_io
+
+
+def test_blocking_stages_run_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def stage(name, seconds=0.2):
+        threads.append(threading.current_thread().name)
+        assert threading.get_ident() != loop_thread
+        time.sleep(seconds)
+        return name
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(run_blocking(stage, "translate"), run_io(stage, "llm"))
+        elapsed = time.perf_counter() - started
+        ticking.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(main())
+    assert results == ["translate", "llm"]
+    assert elapsed < 0.35  # the two stages overlapped
+    assert ticks >= 5  # and the loop kept serving other work meanwhile
+    assert sorted(name.split("_")[0] for name in threads) == ["cpu", "io"]
+
+
+def test_keyword_arguments_are_passed_through():
+    assert asyncio.run(run_blocking(lambda a, b=0: a + b, 1, b=2)) == 3
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document  # noqa: E402
+
+from services.context_packer import ContextPacker, mmr_order  # noqa: E402
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+QUERY = unit(1, 0, 0)
+# Two near-identical chunks about the query and one different, less relevant one
+VECTORS = np.stack([unit(1, 0.1, 0), unit(1, 0.12, 0), unit(0.7, 0, 0.7)])
+
+
+def words(text):
+    return len(text.split())
+
+
+def doc(n_words, name):
+    return Document(page_content=" ".join([name] * n_words), metadata={"name": name})
+
+
+def test_mmr_puts_near_duplicates_last():
+    assert list(mmr_order(QUERY, VECTORS, mmr_lambda=0.5)) == [0, 2, 1]
+    # With lambda 1 it is plain relevance order
+    assert list(mmr_order(QUERY, VECTORS, mmr_lambda=1.0)) == [0, 1, 2]
+    assert list(mmr_order(QUERY, np.empty((0, 3), dtype=np.float32))) == []
+
+
+def test_pack_respects_k_and_the_token_budget():
+    docs = [doc(5, "a"), doc(5, "b"), doc(5, "c")]
+    packer = ContextPacker(words, token_budget=100)
+    assert [d.metadata["name"] for d in packer.pack(QUERY, docs, VECTORS, k=2)] == ["a", "c"]
+
+    # "c" does not fit after "a", the smaller duplicate "b" still does
+    docs = [doc(5, "a"), doc(3, "b"), doc(6, "c")]
+    packer = ContextPacker(words, token_budget=9)
+    assert [d.metadata["name"] for d in packer.pack(QUERY, docs, VECTORS, k=3)] == ["a", "b"]
+
+
+def test_oversized_best_chunk_is_truncated():
+    docs = [doc(50, "a"), doc(40, "b"), doc(60, "c")]
+    packer = ContextPacker(words, token_budget=10, truncate=lambda text, n: " ".join(text.split()[:n]))
+    packed = packer.pack(QUERY, docs, VECTORS, k=3)
+    assert len(packed) == 1
+    assert packed[0].metadata["name"] == "a" and words(packed[0].page_content) == 10
+
+
+def test_token_counts_are_cached_per_text():
+    calls = []
+
+    def count(text):
+        calls.append(text)
+        return words(text)
+
+    packer = ContextPacker(count, token_budget=100)
+    docs = [doc(5, "a"), doc(5, "b"), doc(5, "c")]
+    packer.pack(QUERY, docs, VECTORS, k=3)
+    packer.pack(QUERY, docs, VECTORS, k=3)
+    assert len(calls) == 3
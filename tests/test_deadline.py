@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from core.deadline import Deadline, StageTimeout
+
+
+def test_no_deadline_never_expires():
+    deadline = Deadline(0)
+    assert deadline.remaining() is None and not deadline.expired
+    assert asyncio.run(deadline.run("stage", asyncio.sleep(0.01, result="done"))) == "done"
+
+
+def test_overrunning_stage_is_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    started = time.perf_counter()
+    with pytest.raises(StageTimeout) as error:
+        asyncio.run(Deadline(0.05).run("llm", slow()))
+    assert error.value.stage == "llm"
+    assert cancelled == [True]
+    assert time.perf_counter() - started < 1
+
+
+def test_stage_cap_applies_without_a_deadline():
+    with pytest.raises(StageTimeout):
+        asyncio.run(Deadline().run("translation", asyncio.sleep(5), cap=0.05))
+
+
+def test_budget_is_the_smaller_of_cap_and_time_left():
+    deadline = Deadline(10)
+    assert deadline.budget(2) == 2
+    assert 9 < deadline.budget() <= 10
+    assert Deadline(1).budget(5) <= 1
+
+
+def test_expired_deadline_does_not_start_the_stage():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    stage = asyncio.sleep(0)
+    with pytest.raises(StageTimeout):
+        asyncio.run(deadline.run("retrieval", stage))
+    assert stage.cr_frame is None  # closed, never awaited
+
+
+def test_iterate_stops_the_stream_at_the_deadline_and_marks_it_degraded():
+    closed = []
+
+    async def tokens():
+        try:
+            yield "first"
+            await asyncio.sleep(5)
+            yield "late"
+        finally:
+            closed.append(True)
+
+    async def collect(deadline):
+        return [token async for token in deadline.iterate("llm", tokens())]
+
+    deadline = Deadline(0.05)
+    assert asyncio.run(collect(deadline)) == ["first"]
+    assert deadline.degraded == {"llm": "timeout"}
+    assert closed == [True]
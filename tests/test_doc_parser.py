@@ -0,0 +1,125 @@
+import logging
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("docx")
+pytest.importorskip("nltk")
+pytest.importorskip("langchain")
+
+from core import doc_parser  # noqa: E402
+
+PARAGRAPHS = [f"Paragraph {i} talks about pump maintenance in some detail. It has a second sentence too."
+              for i in range(5)]
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "manual.txt"
+    path.write_text("\n\n".join(PARAGRAPHS) + "\n", encoding="utf-8")
+    return str(path)  # absolute, so it is read from here rather than DOCS_DIR
+
+
+def test_missing_tokenizer_warns_once_and_keeps_text_unsplit(text_file, monkeypatch, caplog):
+    calls = []
+
+    def sent_tokenize(text):
+        calls.append(text)
+        raise LookupError("punkt_tab")
+
+    monkeypatch.setattr(doc_parser, "_sentence_tokenizer_available", None)
+    monkeypatch.setattr(doc_parser, "_find_sentence_tokenizer", lambda: False)
+    monkeypatch.setattr(doc_parser, "NLTK_DOWNLOAD", False)
+    monkeypatch.setattr(doc_parser, "sent_tokenize", sent_tokenize)
+    with caplog.at_level(logging.WARNING, logger=doc_parser.__name__):
+        chunks = doc_parser.extract_text(text_file) + doc_parser.extract_text(text_file)
+
+    assert calls == []
+    assert len([r for r in caplog.records if "punkt_tab" in r.getMessage()]) == 1
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    # One unsplit piece per paragraph, MAX_CHUNK_SENTENCES pieces per chunk
+    assert [chunk.page_content for chunk in chunks] == [" ".join(PARAGRAPHS[:3]), " ".join(PARAGRAPHS[3:])] * 2
+
+
+def test_tokenizer_lost_after_startup_is_only_tried_once(text_file, monkeypatch, caplog):
+    calls = []
+
+    def sent_tokenize(text):
+        calls.append(text)
+        raise LookupError("punkt_tab")
+
+    monkeypatch.setattr(doc_parser, "_sentence_tokenizer_available", True)
+    monkeypatch.setattr(doc_parser, "sent_tokenize", sent_tokenize)
+    with caplog.at_level(logging.WARNING, logger=doc_parser.__name__):
+        chunks = doc_parser.extract_text(text_file)
+
+    assert len(calls) == 1
+    assert len([r for r in caplog.records if "punkt_tab" in r.getMessage()]) == 1
+    assert [chunk.metadata["paragraph"] for chunk in chunks] == [1, 4]
+
+
+def split_on_periods(text):
+    return [sentence if sentence.endswith(".") else sentence + "." for sentence in text.strip().split(". ")]
+
+
+@pytest.fixture
+def sentences(monkeypatch):
+    monkeypatch.setattr(doc_parser, "_sentence_tokenizer_available", True)
+    monkeypatch.setattr(doc_parser, "sent_tokenize", split_on_periods)
+
+
+def test_chunks_stream_in_order_with_their_starting_paragraph(text_file, sentences):
+    chunks = doc_parser.iter_chunks(text_file)
+    first = next(chunks)  # available before the rest of the file is chunked
+    rest = list(chunks)
+    sentences_in_file = [s for paragraph in PARAGRAPHS for s in split_on_periods(paragraph)]
+    assert [len(chunk.page_content.split(". ")) for chunk in [first] + rest] == [3, 3, 3, 1]
+    assert " ".join(chunk.page_content for chunk in [first] + rest) == " ".join(sentences_in_file)
+    assert [chunk.metadata["paragraph"] for chunk in [first] + rest] == [1, 2, 4, 5]
+    assert all(chunk.metadata["source"] == text_file for chunk in [first] + rest)
+
+
+def test_uploaded_content_is_parsed_from_a_temporary_file(tmp_path, sentences, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    chunks = doc_parser.extract_text("upload.txt", content="\n\n".join(PARAGRAPHS[:2]).encode("utf-8"))
+    assert len(chunks) == 2 and chunks[0].metadata == {"source": "upload.txt", "paragraph": 1}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_files_yield_no_chunks(tmp_path, sentences):
+    assert doc_parser.extract_text(str(tmp_path / "gone.txt")) == []
+
+
+def test_parse_documents_keeps_order_and_isolates_failures(tmp_path, sentences, monkeypatch):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(PARAGRAPHS[i], encoding="utf-8")
+        paths.append(str(path))
+    extract_text = doc_parser.extract_text
+
+    def flaky(filename, content=None):
+        if filename.endswith("doc1.txt"):
+            raise ValueError("corrupt file")
+        return extract_text(filename, content)
+
+    monkeypatch.setattr(doc_parser, "extract_text", flaky)
+    results = list(doc_parser.parse_documents(paths, workers=1))
+    assert [name for name, _ in results] == paths
+    assert results[1][1] is None
+    assert [chunk.page_content for chunk in results[2][1]] == [PARAGRAPHS[2]]
+
+
+def test_parse_documents_in_a_process_pool(tmp_path, monkeypatch):
+    # Workers inherit the parent's tokenizer check; unsplit text keeps the chunks predictable
+    monkeypatch.setattr(doc_parser, "_sentence_tokenizer_available", False)
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text("\n\n".join(PARAGRAPHS[i:i + 2]), encoding="utf-8")
+        paths.append(str(path))
+    in_process = [(name, doc_parser.extract_text(name)) for name in paths]
+    pooled = list(doc_parser.parse_documents(paths + [str(tmp_path / "missing.txt")], workers=2))
+    assert [(name, [c.page_content for c in chunks]) for name, chunks in pooled[:3]] == \
+        [(name, [c.page_content for c in chunks]) for name, chunks in in_process]
+    assert pooled[3] == (str(tmp_path / "missing.txt"), [])
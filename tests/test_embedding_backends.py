@@ -0,0 +1,31 @@
+import numpy as np
+
+from services.embedding_backends import parity_report
+
+
+def unit_rows(rows):
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_identical_embeddings_have_full_parity():
+    vectors = unit_rows(np.random.default_rng(0).standard_normal((50, 16)))
+    report = parity_report(vectors, vectors.copy(), k=5)
+    assert report["texts"] == 50
+    assert np.isclose(report["mean_cosine"], 1.0) and np.isclose(report["min_cosine"], 1.0)
+    assert report["neighbour_recall@5"] == 1.0
+
+
+def test_noisy_embeddings_lose_cosine_and_neighbours():
+    rng = np.random.default_rng(0)
+    vectors = unit_rows(rng.standard_normal((200, 16)))
+    noisy = unit_rows(vectors + 0.3 * rng.standard_normal(vectors.shape))
+    report = parity_report(vectors, noisy, k=10)
+    assert 0.5 < report["mean_cosine"] < 0.99
+    assert report["min_cosine"] <= report["mean_cosine"]
+    assert 0.0 < report["neighbour_recall@10"] < 1.0
+
+
+def test_k_is_capped_by_the_number_of_texts():
+    vectors = unit_rows(np.eye(3, dtype=np.float32))
+    assert parity_report(vectors, vectors, k=10)["neighbour_recall@2"] == 1.0
+    assert parity_report(vectors[:1], vectors[:1], k=10)["neighbour_recall@0"] == 1.0
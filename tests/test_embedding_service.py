@@ -0,0 +1,60 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services import embedding_service
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        vectors = np.asarray([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embedding_service, "load_sentence_transformer", lambda *args: model)
+    monkeypatch.setattr(embedding_service, "EMBEDDING_CACHE_DIR", str(tmp_path))
+    return embedding_service.EmbeddingService("fake-model", backend="torch")
+
+
+def test_repeated_queries_skip_the_model(service):
+    first = service.embed_single("How often are seals checked?")
+    again = service.embed_single("  how often are   SEALS checked? ")
+    np.testing.assert_array_equal(first, again)
+    assert len(service.model.calls) == 1
+    assert not again.flags.writeable  # shared between callers
+    assert service.cache_stats()["hits"] == 1
+
+
+def test_async_queries_share_the_cache(service):
+    vector = asyncio.run(service.aembed_single("warranty period"))
+    np.testing.assert_array_equal(service.embed_single("Warranty period"), vector)
+    assert len(service.model.calls) == 1
+
+
+def test_cache_keys_include_the_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_service, "load_sentence_transformer", lambda *args: FakeModel())
+    monkeypatch.setattr(embedding_service, "EMBEDDING_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(embedding_service, "EMBEDDING_ONNX_FILE", "")
+    assert embedding_service.EmbeddingService("m", backend="torch").model_id == "m"
+    assert embedding_service.EmbeddingService("m", backend="onnx").model_id == "m@onnx"
+
+
+def test_unchanged_chunks_reuse_persisted_embeddings(service):
+    first = service.embed_documents(["chunk one", "chunk two"])
+    mixed = service.embed_documents(["chunk two", "chunk three", "chunk one"])
+    assert service.model.calls == [["chunk one", "chunk two"], ["chunk three"]]
+    np.testing.assert_allclose(mixed[[2, 0]], first)
+
+    # A restarted service with the same model id reads them back from disk (same fake model, no new calls)
+    restarted = embedding_service.EmbeddingService("fake-model", backend="torch")
+    restarted.embed_documents(["chunk three", "chunk one"])
+    assert restarted.model.calls == [["chunk one", "chunk two"], ["chunk three"]]
+    assert service.embed_documents([]).shape == (0, 0)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("transformers")
+
+from langchain.schema import Document  # noqa: E402
+
+import services.vector_store_service as vector_store_service  # noqa: E402
+from core.startup import Startup  # noqa: E402
+from services.answer_router import EXTRACTIVE_CONFIDENT, LLM, AnswerRouter  # noqa: E402
+from services.context_packer import ContextPacker  # noqa: E402
+from services.rag_engin import RAGChatbot  # noqa: E402
+
+DENSE_HIT = "Pumps need their seals checked every month."
+KEYWORD_HIT = "Part XK42 ships in a blue box."
+QUERY = "XK42 pumps"
+
+# 2-d unit vectors: the dense hit has cosine 0.75 with the query, the keyword-only hit -0.38
+VECTORS = {
+    QUERY: [1.0, 0.0],
+    DENSE_HIT: [0.75, np.sqrt(1 - 0.75 ** 2)],
+    KEYWORD_HIT: [-0.38, np.sqrt(1 - 0.38 ** 2)],
+}
+
+
+class FixedEmbeddings:
+    def embed_documents(self, texts):
+        return np.asarray([VECTORS[text] for text in texts], dtype=np.float32)
+
+    def embed_single(self, text):
+        return self.embed_documents([text])[0]
+
+
+class WordTokenizer:
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+    def tokenize(self, text):
+        return text.split()
+
+    def convert_tokens_to_string(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store_service, "RETRIEVAL_MODE", "hybrid")
+    store = vector_store_service.VectorStoreService(FixedEmbeddings(), str(tmp_path))
+    store.upsert_document("manual", "h", [Document(page_content=DENSE_HIT, metadata={}),
+                                          Document(page_content=KEYWORD_HIT, metadata={})])
+    return store
+
+
+def chatbot(store, confidence):
+    bot = RAGChatbot.__new__(RAGChatbot)
+    bot.max_tokens = 500
+    bot.startup = Startup("test")
+    bot.startup.add("tokenizer", WordTokenizer)
+    bot.startup.add("embedding", FixedEmbeddings)
+    bot.startup.add("index", lambda: store)
+    bot.startup.add("llm", object)
+    bot.startup.start()
+    bot.router = AnswerRouter(confidence, 64, 0)
+    bot.context_packer = ContextPacker(bot._count_tokens, 200)
+    return bot
+
+
+def test_fused_order_puts_the_keyword_hit_first(store):
+    docs, scores, _ = store.similarity_search_with_vectors(FixedEmbeddings().embed_single(QUERY), 2, QUERY)
+    assert [doc.page_content for doc in docs] == [KEYWORD_HIT, DENSE_HIT]
+    np.testing.assert_allclose(scores, [-0.38, 0.75], atol=1e-6)
+
+
+def test_route_uses_the_closest_chunk_not_fused_rank_one(store):
+    route, text, extractive = chatbot(store, confidence=0.7)._route(QUERY, FixedEmbeddings().embed_single(QUERY), 2)
+    assert route == EXTRACTIVE_CONFIDENT
+    assert text == extractive == DENSE_HIT
+
+
+def test_closest_chunk_below_threshold_goes_to_the_llm(store):
+    route, text, extractive = chatbot(store, confidence=0.8)._route(QUERY, FixedEmbeddings().embed_single(QUERY), 2)
+    assert route == LLM
+    assert extractive == DENSE_HIT
+    assert KEYWORD_HIT in text and DENSE_HIT in text
@@ -0,0 +1,88 @@
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from services.index_snapshot import Generation  # noqa: E402
+from services.vector_store_service import VectorStoreService  # noqa: E402
+from test_vector_store import HashEmbeddings, chunks, live_texts, reloaded  # noqa: E402
+
+
+def test_retired_generation_is_removed_after_its_last_reader():
+    removed = []
+    generation = Generation("gen-1")
+    generation.acquire()
+    generation.acquire()
+    generation.retire(lambda: removed.append("gen-1"))
+    generation.release()
+    assert removed == []
+    generation.release()
+    assert removed == ["gen-1"]
+
+
+def test_idle_generation_is_removed_on_retire():
+    removed = []
+    Generation("gen-1").retire(lambda: removed.append("gen-1"))
+    assert removed == ["gen-1"]
+
+
+def test_query_pins_its_generation_across_a_compaction(tmp_path):
+    store = VectorStoreService(HashEmbeddings(), str(tmp_path))
+    store.upsert_document("a", "h1", chunks("a", 4))
+    store.upsert_document("b", "h1", chunks("b", 4))
+    snapshot = store.snapshot
+    old_dir = store.index_path
+    with snapshot.reading():
+        store.delete_document("a")  # compacts into a new generation
+        assert store.index_path != old_dir
+        assert os.path.exists(old_dir)
+        assert snapshot.live_count == 8  # the pinned snapshot is unchanged
+    assert not os.path.exists(old_dir)
+
+
+def test_rebuild_keeps_an_upsert_made_while_it_builds(tmp_path):
+    store = VectorStoreService(HashEmbeddings(), str(tmp_path))
+    store.upsert_document("a", "h1", chunks("a", 2))
+    store.upsert_document("b", "h1", chunks("b", 2))
+    building, upserted = threading.Event(), threading.Event()
+
+    def build(staging):
+        # A rebuild from the documents as they were when it started
+        staging.upsert_document("a", "h1", chunks("a", 2))
+        staging.upsert_document("b", "h1", chunks("b", 2))
+        building.set()
+        assert upserted.wait(5)
+
+    def upsert():
+        assert building.wait(5)
+        store.upsert_document("b", "h2", chunks("b", 3, version=2))
+        store.upsert_document("c", "h1", chunks("c", 1))
+        store.delete_document("a")
+        upserted.set()
+
+    writer = threading.Thread(target=upsert)
+    writer.start()
+    store.rebuild(build)
+    writer.join()
+
+    expected = ["b v2 chunk 0", "b v2 chunk 1", "b v2 chunk 2", "c v1 chunk 0"]
+    assert live_texts(store) == expected
+    assert live_texts(reloaded(store)) == expected
+    assert store.document_hash("b") == "h2" and store.document_hash("a") is None
+
+
+def test_failed_rebuild_keeps_the_current_index(tmp_path):
+    store = VectorStoreService(HashEmbeddings(), str(tmp_path))
+    store.upsert_document("a", "h1", chunks("a", 2))
+    snapshot = store.snapshot
+
+    def build(staging):
+        staging.upsert_document("x", "h1", chunks("x", 1))
+        raise RuntimeError("embedding model crashed")
+
+    with pytest.raises(RuntimeError):
+        store.rebuild(build)
+    assert store.snapshot is snapshot
+    assert sorted(os.listdir(tmp_path)) == ["CURRENT", os.path.basename(store.index_path)]
@@ -0,0 +1,98 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+from services.index_storage import IndexDirectory, IndexStorage
+
+
+def rows(n, start=0, dim=4):
+    vectors = np.arange(start * dim, (start + n) * dim, dtype=np.float32).reshape(n, dim)
+    documents = [Document(page_content=f"chunk {i}", metadata={"row": i}) for i in range(start, start + n)]
+    return vectors, documents
+
+
+def test_append_reload_round_trip(tmp_path):
+    storage = IndexStorage(str(tmp_path / "gen"))
+    storage.append(*rows(3))
+    storage.append(*rows(2, start=3))
+
+    vectors, documents = IndexStorage(storage.index_dir).load()
+    np.testing.assert_array_equal(vectors, rows(5)[0])
+    assert [doc.metadata["row"] for doc in documents] == [0, 1, 2, 3, 4]
+    assert not vectors.flags.writeable  # memory-mapped read-only
+
+
+def test_uncommitted_tail_is_ignored_and_truncated(tmp_path):
+    storage = IndexStorage(str(tmp_path / "gen"))
+    storage.append(*rows(2))
+    # A crash after writing data but before the manifest leaves a tail behind
+    with open(storage.vectors_path, "ab") as f:
+        f.write(b"\0" * 64)
+    with open(storage.documents_path, "ab") as f:
+        f.write(b'{"page_content": "torn')
+
+    vectors, documents = storage.load()
+    assert vectors.shape == (2, 4) and len(documents) == 2
+
+    storage.append(*rows(1, start=2))
+    vectors, documents = storage.load()
+    np.testing.assert_array_equal(vectors, rows(3)[0])
+    assert documents[-1].page_content == "chunk 2"
+
+
+def test_deleted_and_hidden_ranges(tmp_path):
+    storage = IndexStorage(str(tmp_path / "gen"))
+    storage.append(*rows(4))
+    storage.append(*rows(2, start=4), hidden=True)
+    assert storage.load_deleted() == [[4, 6]]
+
+    # Replacing rows 0-1 with the hidden rows is one manifest write
+    storage.mark_deleted([(0, 2)], restore=[(4, 6)])
+    assert storage.load_deleted() == [[0, 2]]
+    assert len(storage.load_documents()) == 6
+
+
+def test_dimension_and_format_are_checked(tmp_path):
+    storage = IndexStorage(str(tmp_path / "gen"))
+    storage.append(*rows(1))
+    with pytest.raises(ValueError):
+        storage.append(np.zeros((1, 3), dtype=np.float32), [Document(page_content="x")])
+
+    with open(storage.manifest_path) as f:
+        manifest = json.load(f)
+    manifest["format_version"] = 99
+    with open(storage.manifest_path, "w") as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError):
+        storage.load()
+
+
+def test_generations_publish_and_remove_stale(tmp_path):
+    index_dir = IndexDirectory(str(tmp_path))
+    assert index_dir.current() is None
+
+    first = index_dir.create()
+    first.append(*rows(1))
+    index_dir.publish(first)
+    second = index_dir.create()
+    second.append(*rows(2))
+    assert index_dir.is_current(first)
+
+    index_dir.publish(second)
+    assert index_dir.current().index_dir == second.index_dir
+    index_dir.remove_stale()
+    assert not os.path.exists(first.index_dir)
+    assert len(index_dir.current().load_documents()) == 2
+
+
+def test_flat_layout_is_migrated_into_a_generation(tmp_path):
+    IndexStorage(str(tmp_path)).append(*rows(2))
+    storage = IndexDirectory(str(tmp_path)).current()
+    assert os.path.dirname(storage.index_dir) == str(tmp_path)
+    assert len(storage.load_documents()) == 2
+    assert not os.path.exists(tmp_path / "manifest.json")
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from services.job_queue import JobQueue, QueueFullError
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def test_submissions_are_rejected_when_full():
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_pending=2, name="test")
+    running = jobs.submit("running", lambda progress: release.wait(5))
+    wait_until(lambda: running.status == "running")
+
+    queued = [jobs.submit(f"queued-{i}", lambda progress: "ok") for i in range(2)]
+    assert jobs.pending == 2
+    with pytest.raises(QueueFullError):
+        jobs.submit("one too many", lambda progress: "ok")
+    assert len(jobs.list()) == 3  # the rejected job is not tracked
+
+    release.set()
+    wait_until(lambda: all(job.status == "done" for job in queued))
+    jobs.submit("accepted again", lambda progress: "ok")
+
+
+def test_progress_result_and_failure_are_reported():
+    jobs = JobQueue(workers=1, name="test")
+
+    def index(progress):
+        progress("embedding", 0.5)
+        return "added"
+
+    def broken(progress):
+        raise ValueError("unreadable PDF")
+
+    done = jobs.submit("index", index)
+    failed = jobs.submit("broken", broken)
+    wait_until(lambda: failed.finished_at is not None)
+    assert done.to_dict()["status"] == "done" and done.result == "added" and done.progress == 1.0
+    assert failed.status == "failed" and failed.error == "unreadable PDF"
+    assert jobs.get(done.id) is done and jobs.get("unknown") is None
+
+
+def test_finished_jobs_beyond_history_are_forgotten():
+    jobs = JobQueue(workers=1, history=2, name="test")
+    first = [jobs.submit(f"job-{i}", lambda progress: i) for i in range(3)]
+    wait_until(lambda: all(job.status == "done" for job in first))
+    jobs.submit("next", lambda progress: None)
+    assert jobs.get(first[0].id) is None
+    assert len(jobs.list()) <= 3
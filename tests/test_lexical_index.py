@@ -0,0 +1,90 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+TEXTS = [
+    "Replace the XK-42 pump seal every month.",
+    "The pump manual covers installation.",
+    "Invoices are sent at the end of the month.",
+    "Seal kits for the XK-42 and XK-50 ship separately.",
+    "Safety goggles are required in the workshop.",
+]
+
+
+def brute_force_bm25(texts, query, k1=1.2, b=0.75):
+    docs = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_len = sum(lengths) / len(docs)
+    scores = np.zeros(len(docs))
+    for term in set(tokenize(query)):
+        df = sum(1 for doc in docs if term in doc)
+        if not df:
+            continue
+        idf = math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, doc in enumerate(docs):
+            tf = doc[term]
+            scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / avg_len))
+    return scores
+
+
+def test_tokenize_keeps_codes_and_their_parts():
+    assert tokenize("The XK-42 pump, v2.1") == ["xk-42", "xk", "42", "pump", "v2.1", "v2", "1"]
+
+
+def test_rrf_sums_reciprocal_ranks():
+    dense = np.array([10, 11, 12])
+    lexical = np.array([12, 13])
+    # 12 is third and first: 1/63 + 1/61 beats 10's 1/61 alone
+    np.testing.assert_array_equal(reciprocal_rank_fusion([dense, lexical], k=4, rrf_k=60), [12, 10, 11, 13])
+
+
+def test_rrf_ties_go_to_the_first_ranking():
+    np.testing.assert_array_equal(reciprocal_rank_fusion([np.array([1]), np.array([2])], k=2), [1, 2])
+    np.testing.assert_array_equal(reciprocal_rank_fusion([np.array([2]), np.array([1])], k=2), [2, 1])
+    assert reciprocal_rank_fusion([np.array([], dtype=np.int64)], k=3).size == 0
+
+
+def test_search_matches_brute_force_bm25():
+    index = BM25Index()
+    index.add(TEXTS)
+    for query in ("XK-42 seal", "pump month", "goggles"):
+        ids, scores = index.search(query, k=len(TEXTS))
+        expected = brute_force_bm25(TEXTS, query)
+        np.testing.assert_allclose(scores, expected[ids], rtol=1e-5)
+        assert set(ids) == set(np.flatnonzero(expected))
+        assert list(scores) == sorted(scores, reverse=True)
+    assert index.search("unknown words", k=3)[0].size == 0
+
+
+def test_delta_merge_and_reload_give_the_same_results(tmp_path):
+    one_tier = BM25Index()
+    one_tier.add(TEXTS)
+    two_tiers = BM25Index()
+    two_tiers.add(TEXTS[:2])
+    two_tiers.merge()
+    two_tiers.add(TEXTS[2:])
+
+    path = str(tmp_path / "bm25.npz")
+    two_tiers.save(path)
+    loaded = BM25Index()
+    loaded.load(path)
+    for index in (two_tiers, loaded):
+        for query in ("XK-42 seal", "month"):
+            np.testing.assert_array_equal(index.search(query, 5)[0], one_tier.search(query, 5)[0])
+    assert loaded.ntotal == len(TEXTS) and not loaded.merge_due
+
+
+def test_frozen_copy_and_exclusions():
+    index = BM25Index()
+    index.add(TEXTS[:3])
+    frozen = index.frozen()
+    index.add(TEXTS[3:])
+    assert frozen.ntotal == 3
+    assert 3 not in frozen.search("XK-42", 5)[0]
+
+    exclude = np.zeros(len(TEXTS), dtype=bool)
+    exclude[0] = True
+    np.testing.assert_array_equal(index.search("XK-42", 5, exclude=exclude)[0], [3])
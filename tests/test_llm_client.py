@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from core.resilience import CircuitBreaker
+from services.llm_service import LLMClient, LLMUnavailableError, LocalBackend
+
+CONTEXT = "Pumps need their seals checked every month. Other text."
+
+
+def client(*backends, failures=2, reset=60.0, **kwargs):
+    llm = LLMClient(list(backends), **kwargs)
+    for state in llm.states:
+        state.breaker = CircuitBreaker(state.label, failures, reset)
+    return llm
+
+
+def test_fails_over_to_the_next_backend():
+    broken, healthy = LocalBackend(failure_rate=1.0), LocalBackend()
+    llm = client(broken, healthy, hedge_quantile=0)
+    assert llm.generate_answer(CONTEXT, "q") == "Pumps need their seals checked every month."
+    assert asyncio.run(llm.agenerate_answer(CONTEXT, "q")).startswith("Pumps")
+    assert (broken.calls, healthy.calls) == (2, 2)
+    assert [state.failures for state in llm.states] == [2, 0]
+
+
+def test_breaker_opens_and_the_backend_is_skipped():
+    broken, healthy = LocalBackend(failure_rate=1.0), LocalBackend()
+    llm = client(broken, healthy, failures=2, hedge_quantile=0)
+    for _ in range(4):
+        llm.generate_answer(CONTEXT, "q")
+    assert broken.calls == 2  # skipped once its circuit opened
+    assert llm.states[0].breaker.state == CircuitBreaker.OPEN
+    assert llm.stats()["backends"][0]["circuit"] == "open"
+
+
+def test_all_circuits_open_raises_unavailable():
+    llm = client(LocalBackend(failure_rate=1.0), failures=1, hedge_quantile=0, max_attempts=1)
+    with pytest.raises(RuntimeError):
+        llm.generate_answer(CONTEXT, "q")
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(llm.agenerate_answer(CONTEXT, "q"))
+
+
+def test_half_open_trial_closes_the_breaker_on_success():
+    breaker = CircuitBreaker("b", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()  # the one trial request
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_slow_call_is_hedged_and_the_first_answer_wins():
+    slow = LocalBackend(latency=2.0)
+    fast = LocalBackend(latency=0.01)
+    llm = client(slow, fast, hedge_quantile=0.95, hedge_delay=0.05)
+    started = time.perf_counter()
+    assert asyncio.run(llm.agenerate_answer(CONTEXT, "q")).startswith("Pumps")
+    assert time.perf_counter() - started < 1
+    assert llm.hedges == 1
+
+
+def test_stream_fails_over_before_the_first_token():
+    llm = client(LocalBackend(failure_rate=1.0), LocalBackend(), hedge_quantile=0)
+
+    async def collect():
+        return [delta async for delta in llm.astream_answer(CONTEXT, "q")]
+
+    assert asyncio.run(collect()) == ["Pumps need their seals checked every month."]
@@ -0,0 +1,55 @@
+import threading
+
+from core import cache as cache_module
+from core.cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.put("q", "vector")
+    now[0] += 9
+    assert cache.get("q") == "vector"
+    now[0] += 2
+    assert cache.get("q", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_stats_and_disabled_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    disabled = LRUCache(maxsize=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None and len(disabled) == 0
+
+
+def test_concurrent_puts_stay_bounded():
+    cache = LRUCache(maxsize=50)
+
+    def fill(offset):
+        for i in range(500):
+            cache.put((offset, i), i)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=fill, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 50
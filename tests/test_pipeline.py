@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from core.pipeline import prefetch_batches
+
+
+def test_items_are_grouped_in_order():
+    batches = list(prefetch_batches(range(7), batch_size=3))
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(prefetch_batches([], batch_size=3)) == []
+
+
+def test_producer_runs_at_most_depth_batches_ahead():
+    produced = []
+    waited = threading.Event()
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    batches = prefetch_batches(items(), batch_size=1, depth=2)
+    next(batches)
+    waited.wait(0.3)  # give the producer time to run ahead
+    # One batch handed over, ``depth`` queued and one more waiting to be queued
+    assert len(produced) <= 4
+    batches.close()
+
+
+def test_producer_errors_reach_the_consumer():
+    def items():
+        yield 1
+        yield 2
+        raise ValueError("corrupt page")
+
+    batches = prefetch_batches(items(), batch_size=1)
+    assert next(batches) == [1]
+    assert next(batches) == [2]
+    with pytest.raises(ValueError, match="corrupt page"):
+        next(batches)
+
+
+def test_closing_early_stops_the_producer():
+    produced = []
+
+    def items():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+
+    batches = prefetch_batches(items(), batch_size=10, depth=1)
+    next(batches)
+    batches.close()
+    assert not any(thread.name == "batch-producer" and thread.is_alive() for thread in threading.enumerate())
+    assert len(produced) < 100
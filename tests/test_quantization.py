@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.quantization import ScalarQuantizer
+
+
+def corpus(n=2000, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_scores_approximate_dot_products():
+    vectors = corpus()
+    quantizer = ScalarQuantizer("int8")
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.dtype == np.int8 and codes.nbytes * 4 == vectors.nbytes
+    query = vectors[0]
+    np.testing.assert_allclose(quantizer.scores(codes, query), vectors @ query, atol=0.05)
+
+
+def test_rescoring_returns_exact_scores_of_the_true_top_k():
+    vectors = corpus()
+    quantizer = ScalarQuantizer("int8", block_rows=128)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    for query in vectors[:20]:
+        rows, scores = quantizer.search(codes, vectors, query, k=5, rescore_factor=4)
+        exact = vectors @ query
+        assert set(rows) == set(np.argsort(-exact)[:5])
+        np.testing.assert_allclose(scores, exact[rows], rtol=1e-6)
+        assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_excluded_rows_are_never_returned():
+    vectors = corpus(200)
+    quantizer = ScalarQuantizer("int8")
+    quantizer.train(vectors)
+    exclude = np.zeros(len(vectors), dtype=bool)
+    exclude[0] = True
+    rows, _ = quantizer.search(quantizer.encode(vectors), vectors, vectors[0], k=3, exclude=exclude)
+    assert 0 not in rows
+
+
+def test_save_and_load_round_trip(tmp_path):
+    vectors = corpus(100)
+    quantizer = ScalarQuantizer("int8")
+    quantizer.train(vectors)
+    quantizer.save(str(tmp_path / "quantizer.npz"))
+    loaded = ScalarQuantizer("int8")
+    loaded.load(str(tmp_path / "quantizer.npz"))
+    np.testing.assert_array_equal(loaded.encode(vectors), quantizer.encode(vectors))
+
+
+def test_float16_is_not_a_search_mode():
+    with pytest.raises(ValueError):
+        ScalarQuantizer("float16")
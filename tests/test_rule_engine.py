@@ -0,0 +1,37 @@
+from services.chatbot.engine import Rule, RuleEngine
+
+
+def rule(name, pattern=None, keywords=(), priority=0):
+    return Rule(name, lambda _, name=name: name, keywords=keywords, pattern=pattern, priority=priority)
+
+
+def test_duplicate_named_groups_do_not_break_loading():
+    engine = RuleEngine([rule("order", r"order (?P<id>\d+)"), rule("ticket", r"ticket (?P<id>\d+)")])
+    assert engine.match("where is order 42").name == "order"
+    assert engine.match("status of ticket 7").name == "ticket"
+
+
+def test_inline_flag_pattern():
+    engine = RuleEngine([rule("hello", r"(?i)hello there"), rule("bye", r"goodbye")])
+    assert engine.match("HELLO THERE").name == "hello"
+    assert engine.match("goodbye now").name == "bye"
+
+
+def test_backreferences_keep_their_groups():
+    engine = RuleEngine([rule("double-a", r"(a)\1"), rule("double-b", r"(b)\1")])
+    assert engine.match("xbbx").name == "double-b"
+    assert engine.match("xaax").name == "double-a"
+    assert engine.match("abab") is None
+
+
+def test_invalid_pattern_is_skipped():
+    engine = RuleEngine([rule("broken", r"(unclosed"), rule("ok", r"refund")])
+    assert len(engine) == 1
+    assert engine.match("I want a refund").name == "ok"
+
+
+def test_priority_across_gated_and_ungated_patterns():
+    engine = RuleEngine([rule("plain", r"price", priority=1), rule("grouped", r"(price) list", priority=2),
+                         rule("keyword", keywords=["price"], priority=0)])
+    assert engine.match("the price list").name == "grouped"
+    assert engine.match("the price").name == "plain"
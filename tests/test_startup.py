@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from core.startup import ComponentUnavailable, Startup
+
+
+def test_components_wait_for_their_dependencies_and_run_concurrently():
+    order = []
+    both_started = threading.Barrier(2, timeout=5)
+
+    def slow(name):
+        def build():
+            both_started.wait()  # only passes if the two independent components overlap
+            order.append(name)
+            return name
+        return build
+
+    startup = Startup("test")
+    startup.add("tokenizer", slow("tokenizer"))
+    startup.add("embedding", slow("embedding"))
+    startup.add("index", lambda: order.append("index") or "index", after=["embedding"])
+    assert not startup.started
+    startup.start()
+
+    assert startup.get("index", timeout=5) == "index"
+    assert startup.get("tokenizer", timeout=5) == "tokenizer"
+    assert order.index("embedding") < order.index("index")
+    assert startup.ready and not startup.failed
+    assert startup.status()["components"]["index"]["state"] == "ready"
+
+
+def test_failures_propagate_to_dependents_but_not_optional_components():
+    def broken():
+        raise OSError("model download failed")
+
+    startup = Startup("test")
+    startup.add("embedding", broken)
+    startup.add("index", lambda: "index", after=["embedding"])
+    startup.add("sync", broken, required=False)
+    startup.add("llm", lambda: "llm")
+    startup.start()
+
+    with pytest.raises(ComponentUnavailable, match="model download failed"):
+        startup.get("embedding", timeout=5)
+    with pytest.raises(ComponentUnavailable, match="dependency 'embedding' failed"):
+        startup.get("index", timeout=5)
+    assert startup.get("llm", timeout=5) == "llm"
+    assert startup.failed and not startup.ready
+    assert startup.status()["components"]["embedding"]["error"] == "model download failed"
+
+
+def test_get_before_start_or_while_starting():
+    release = threading.Event()
+    startup = Startup("test")
+    startup.add("slow", lambda: release.wait(5) and "slow")
+    with pytest.raises(ComponentUnavailable):
+        startup.get("slow")
+    startup.start()
+    with pytest.raises(ComponentUnavailable, match="still starting"):
+        startup.get("slow", timeout=0.05)
+    assert not startup.ready
+    release.set()
+    assert startup.get("slow", timeout=5) == "slow"
+
+
+def test_registration_errors():
+    startup = Startup("test")
+    startup.add("index", lambda: None, after=["missing"])
+    with pytest.raises(ValueError):
+        startup.start()
+
+    startup = Startup("test")
+    startup.start()
+    with pytest.raises(RuntimeError):
+        startup.add("late", lambda: None)
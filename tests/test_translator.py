@@ -0,0 +1,60 @@
+import pytest
+
+from services.translator import TranslationBackend, TranslationService, normalize_lang
+
+
+class RecordingBackend(TranslationBackend):
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def translate(self, text, source, target):
+        self.calls.append((text, source, target))
+        if self.fail:
+            raise RuntimeError("translation service down")
+        return f"[{source}->{target}] {text}"
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("ta-IN", "ta"),
+    ("hi-IN", "hi"),
+    ("en", "en"),
+    ("zh-CN", "zh-CN"),
+    ("zh-TW", "zh-TW"),
+    ("", "auto"),
+    (None, "auto"),
+])
+def test_normalize_lang_strips_only_the_indian_region(code, expected):
+    assert normalize_lang(code) == expected
+
+
+def test_region_significant_targets_stay_distinct():
+    backend = RecordingBackend()
+    service = TranslationService(backend)
+    service.translate("hello", "en", "zh-CN")
+    service.translate("hello", "en", "zh-TW")
+    assert [call[2] for call in backend.calls] == ["zh-CN", "zh-TW"]
+
+
+def test_same_language_and_blank_text_skip_the_backend():
+    backend = RecordingBackend()
+    service = TranslationService(backend)
+    assert service.translate("hello", "en-IN", "en") == "hello"
+    assert service.translate("  ", "ta-IN", "en") == "  "
+    assert backend.calls == []
+
+
+def test_translations_are_cached():
+    backend = RecordingBackend()
+    service = TranslationService(backend, cache_size=8)
+    assert service.translate("vanakkam", "ta-IN", "en") == "[ta->en] vanakkam"
+    assert service.translate("vanakkam", "ta", "en") == "[ta->en] vanakkam"
+    assert len(backend.calls) == 1
+
+
+def test_failures_fall_back_to_the_original_text_and_are_not_cached():
+    backend = RecordingBackend(fail=True)
+    service = TranslationService(backend)
+    assert service.translate("vanakkam", "ta-IN", "en") == "vanakkam"
+    assert service.translate("vanakkam", "ta-IN", "en") == "vanakkam"
+    assert len(backend.calls) == 2
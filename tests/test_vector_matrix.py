@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.vector_matrix import VectorMatrix, masked_top_k, top_k_indices
+
+
+def test_append_grows_capacity_and_keeps_rows():
+    matrix = VectorMatrix(capacity=2)
+    rows = np.arange(15, dtype=np.float32).reshape(5, 3)
+    for row in rows:
+        matrix.append(row)
+    assert len(matrix) == 5 and matrix.dim == 3
+    assert matrix.capacity == 8
+    np.testing.assert_array_equal(matrix.array, rows)
+
+
+def test_dimension_mismatch_is_rejected():
+    matrix = VectorMatrix()
+    matrix.append(np.ones((2, 4)))
+    with pytest.raises(ValueError):
+        matrix.append(np.ones((1, 3)))
+
+
+def test_from_array_wraps_without_copying_until_the_first_append():
+    base = np.ones((3, 2), dtype=np.float32)
+    base.flags.writeable = False  # as a read-only memory map would be
+    matrix = VectorMatrix.from_array(base)
+    assert np.shares_memory(matrix.array, base)
+    matrix.append(np.zeros((1, 2)))
+    assert not np.shares_memory(matrix.array, base)
+    assert len(matrix) == 4 and base.shape == (3, 2)
+
+
+def test_top_k_matches_a_full_sort_and_skips_excluded_rows():
+    rng = np.random.default_rng(0)
+    matrix = VectorMatrix()
+    matrix.append(rng.standard_normal((500, 8)))
+    query = rng.standard_normal(8)
+    exact = matrix.array @ query.astype(np.float32)
+
+    indices, scores = matrix.top_k(query, 10)
+    np.testing.assert_array_equal(indices, np.argsort(-exact, kind="stable")[:10])
+    np.testing.assert_allclose(scores, exact[indices])
+
+    exclude = np.zeros(500, dtype=bool)
+    exclude[indices[:3]] = True
+    filtered, _ = matrix.top_k(query, 10, exclude=exclude)
+    np.testing.assert_array_equal(filtered, np.argsort(-exact, kind="stable")[3:13])
+
+
+def test_top_k_edge_cases():
+    assert top_k_indices(np.array([0.1, 0.9, 0.5]), 0).size == 0
+    np.testing.assert_array_equal(top_k_indices(np.array([0.1, 0.9, 0.5]), 10), [1, 2, 0])
+    # Excluding everything leaves nothing, not -inf rows
+    assert masked_top_k(np.array([0.3, 0.2]), 2, np.array([True, True])).size == 0
+    indices, scores = VectorMatrix().top_k(np.ones(3), 5)
+    assert indices.size == 0 and scores.size == 0
@@ -0,0 +1,125 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document  # noqa: E402
+
+from services.vector_store_service import VectorStoreService  # noqa: E402
+
+
+class HashEmbeddings:
+    """Deterministic unit vectors, one per distinct text."""
+
+    def embed_documents(self, texts):
+        return np.asarray([self.embed_single(text) for text in texts], dtype=np.float32)
+
+    def embed_single(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+        vector = np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+def chunks(source, n, version=1):
+    return [Document(page_content=f"{source} v{version} chunk {i}", metadata={}) for i in range(n)]
+
+
+def live_texts(store):
+    snapshot = store.snapshot
+    return sorted(doc.page_content for i, doc in enumerate(snapshot.documents[:snapshot.count])
+                  if not snapshot.deleted[i])
+
+
+def reloaded(store):
+    fresh = VectorStoreService(HashEmbeddings(), store.index_dir.root)
+    fresh.load_index()
+    return fresh
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VectorStoreService(HashEmbeddings(), str(tmp_path))
+
+
+def test_upsert_replace_delete_survive_a_reload(store):
+    assert store.upsert_document("a", "h1", chunks("a", 3)) == "added"
+    assert store.upsert_document("b", "h1", chunks("b", 2)) == "added"
+    assert store.upsert_document("a", "h1", chunks("a", 3)) == "unchanged"
+    assert store.upsert_document("a", "h2", chunks("a", 2, version=2)) == "replaced"
+    assert store.delete_document("b")
+    assert not store.delete_document("missing")
+
+    expected = ["a v2 chunk 0", "a v2 chunk 1"]
+    assert live_texts(store) == expected
+    fresh = reloaded(store)
+    assert live_texts(fresh) == expected
+    assert fresh.document_hash("a") == "h2" and fresh.document_hash("b") is None
+
+
+def test_search_sees_only_live_rows(store):
+    store.upsert_document("a", "h1", chunks("a", 3))
+    store.upsert_document("a", "h2", chunks("a", 3, version=2))
+    query = HashEmbeddings().embed_single("a v1 chunk 0")
+    results = store.similarity_search_by_vector_with_score(query, k=10)
+    assert all(" v2 " in doc.page_content for doc, _ in results)
+    assert len(results) == 3
+
+
+def test_compaction_drops_tombstoned_rows(store):
+    store.upsert_document("a", "h1", chunks("a", 4))
+    store.upsert_document("b", "h1", chunks("b", 4))
+    old_dir = store.index_path
+    store.delete_document("a")  # half the rows are tombstoned: past COMPACT_DELETED_RATIO
+
+    assert len(store.documents) == 4 and not store.deleted.any()
+    assert store.index_path != old_dir
+    assert store.sources["b"]["rows"].tolist() == [0, 1, 2, 3]
+    fresh = reloaded(store)
+    assert live_texts(fresh) == [f"b v1 chunk {i}" for i in range(4)]
+    assert fresh.storage.load_deleted() == []
+
+
+def test_add_documents_and_clear(store):
+    store.add_documents(chunks("loose", 2))
+    assert store.live_count == 2
+    store.clear_index()
+    assert store.live_count == 0 and store.sources == {}
+    assert reloaded(store).live_count == 0
+
+
+def test_streamed_rows_stay_hidden_until_the_upload_commits(store, monkeypatch):
+    import services.vector_store_service as vector_store_service
+    monkeypatch.setattr(vector_store_service, "EMBED_BATCH_SIZE", 2)
+    store.upsert_document("a", "h1", chunks("a", 2))
+    seen = []
+    embed_documents = store.embedding_service.embed_documents
+
+    def embed_and_look(texts):
+        seen.append((len(store.documents), live_texts(store)))
+        return embed_documents(texts)
+
+    monkeypatch.setattr(store.embedding_service, "embed_documents", embed_and_look)
+    store.upsert_document("a", "h2", iter(chunks("a", 6, version=2)))
+    # Each batch was appended once embedded, but queries kept seeing the old version
+    assert [appended for appended, _ in seen] == [2, 4, 6]
+    assert all(texts == ["a v1 chunk 0", "a v1 chunk 1"] for _, texts in seen)
+    assert live_texts(store) == [f"a v2 chunk {i}" for i in range(6)]
+
+
+def test_failed_upload_keeps_the_old_version_after_a_reload(store, monkeypatch):
+    import services.vector_store_service as vector_store_service
+    monkeypatch.setattr(vector_store_service, "EMBED_BATCH_SIZE", 2)
+    store.upsert_document("a", "h1", chunks("a", 2))
+
+    def broken():
+        yield from chunks("a", 4, version=2)
+        raise RuntimeError("parser died")
+
+    with pytest.raises(RuntimeError):
+        store.upsert_document("a", "h2", broken())
+    assert live_texts(store) == ["a v1 chunk 0", "a v1 chunk 1"]
+    fresh = reloaded(store)
+    assert live_texts(fresh) == ["a v1 chunk 0", "a v1 chunk 1"]
+    assert fresh.document_hash("a") == "h1"
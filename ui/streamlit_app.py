@@ -1,10 +1,9 @@
 import streamlit as st
 from streamlit_js_eval import streamlit_js_eval          # still needed for Speech‑to‑Text
-from utils.api_client import get_audio_response
+from utils.api_client import iter_sentences, stream_audio_response
 import requests, time, uuid
 from io import BytesIO
 from deep_translator import GoogleTranslator
-from googletrans import Translator
 from gtts import gTTS
 import base64
 
@@ -41,6 +40,51 @@ def get_documents():
         return []
     return []
 
+@st.cache_resource
+def _translator(source, target):
+    # One client per language pair, shared across reruns and sessions
+    return GoogleTranslator(source=source, target=target)
+
+@st.cache_data(max_entries=2048, show_spinner=False)
+def translate_text(text, source, target):
+    """Translate with a same-language short-circuit; results are cached per (text, source, target)."""
+    if not text or not text.strip() or source == target:
+        return text
+    return _translator(source, target).translate(text)
+
+def close_pending_sentences():
+    """Close the answer stream of the previous question, and with it its HTTP response."""
+    close = getattr(st.session_state.get("pending_sentences"), "close", None)
+    if close is not None:
+        close()
+
+def poll_indexing_job():
+    """Check the pending indexing job once and show its stage; returns True while it is still running.
+
+    The job is kept in session_state and polled again on the next rerun, so
+    the script never blocks waiting for indexing to finish.
+    """
+    pending = st.session_state.indexing_job
+    if not pending:
+        return False
+    try:
+        resp = requests.get(f"{API_BASE_URL}/jobs/{pending['id']}", timeout=2)
+        job = resp.json() if resp.status_code != 404 else {"status": "done"}
+    except Exception:
+        job = {}
+    if job.get("status") == "failed":
+        st.sidebar.error(f"❌ Indexing {pending['name']} failed: {job.get('error')}")
+    elif job.get("status") == "done":
+        st.sidebar.success(f"✅ {pending['name']} {job.get('result') or 'uploaded'}.")
+        get_documents.clear()
+    else:
+        st.sidebar.caption(f"⚙️ Indexing {pending['name']}: {job.get('stage', 'queued')} "
+                           f"({int(100 * job.get('progress', 0))}%)")
+        st.sidebar.button("🔄 Refresh status")
+        return True
+    st.session_state.indexing_job = None
+    return False
+
 # ------------------- Session State Initialization -------------------
 default_state = {
     "conversation": [],
@@ -49,6 +93,10 @@ default_state = {
     "speech_key": 0,
     "current_state": "idle",
     "uploaded_filename": None,
+    "pending_sentences": iter(()),
+    "current_clip": None,
+    "clip_index": 0,
+    "indexing_job": None,
     "selected_lang": "en-IN"
 }
 for k, v in default_state.items():
@@ -69,16 +117,22 @@ uploaded_file = st.sidebar.file_uploader(
 
 if uploaded_file is not None and st.sidebar.button("Upload Document"):
     if uploaded_file.name != st.session_state.uploaded_filename:
-        with st.spinner("📤 Uploading and indexing document..."):
+        with st.spinner("📤 Uploading document..."):
             try:
                 resp = requests.post(
                     f"{API_BASE_URL}/upload-document/",
                     files={"file": (uploaded_file.name, uploaded_file, uploaded_file.type)},
                 )
                 st.session_state.uploaded_filename = uploaded_file.name
-                if resp.status_code == 200:
-                    st.sidebar.success(f"✅ {uploaded_file.name} uploaded.")
-                    get_documents.clear()
+                if resp.status_code in (200, 202):
+                    job_id = resp.json().get("job_id")
+                    if job_id:
+                        st.session_state.indexing_job = {"id": job_id, "name": uploaded_file.name}
+                    else:
+                        st.sidebar.success(f"✅ {uploaded_file.name} uploaded.")
+                        get_documents.clear()
+                elif resp.status_code == 429:
+                    st.sidebar.warning("⏳ Indexing queue is full, please retry shortly.")
                 elif resp.status_code == 409:
                     msg = resp.json().get("message", f"{uploaded_file.name} already exists.")
                     st.sidebar.warning(msg)
@@ -89,6 +143,8 @@ if uploaded_file is not None and st.sidebar.button("Upload Document"):
     else:
         st.sidebar.info(f"📂 '{uploaded_file.name}' already uploaded.")
 
+indexing_running = poll_indexing_job()
+
 with st.sidebar.expander("📚 Existing Documents"):
     docs = get_documents()
     if docs:
@@ -103,8 +159,8 @@ if st.session_state.conversation:
     for ex in st.session_state.conversation[-3:]:
         try:
             tgt = st.session_state.selected_lang.split("-")[0]
-            u_text = GoogleTranslator(source="auto", target=tgt).translate(ex["user"])
-            a_text = GoogleTranslator(source="en", target=tgt).translate(ex["assistant"])
+            u_text = translate_text(ex["user"], "auto", tgt)
+            a_text = translate_text(ex["assistant"], "en", tgt)
         except:
             u_text, a_text = ex["user"], ex["assistant"]
 
@@ -121,6 +177,7 @@ with col1:
             st.rerun()
     else:
         if st.button("🔄 Reset", use_container_width=True):
+            close_pending_sentences()
             for k in default_state:
                 st.session_state[k] = default_state[k]
             st.rerun()
@@ -166,42 +223,61 @@ elif st.session_state.current_state == "listening":
 # ------------------- Processing -------------------
 elif st.session_state.current_state == "processing":
     with st.spinner("⚙️ Processing..."):
-        resp = get_audio_response(st.session_state.user_text, st.session_state.selected_lang)
+        # Answer streams in; each sentence is spoken as soon as it is complete.
+        # The stream is kept across reruns until it is exhausted, so an unfinished one is closed here.
+        close_pending_sentences()
+        st.session_state.pending_sentences = iter_sentences(
+            stream_audio_response(st.session_state.user_text, st.session_state.selected_lang)
+        )
+        st.session_state.current_clip = None
         st.session_state.conversation.append(
-            {"user": st.session_state.user_text, "assistant": resp}
+            {"user": st.session_state.user_text, "assistant": ""}
         )
-        st.session_state.assistant_response = resp
         st.session_state.current_state = "speaking"
         st.rerun()
 
 # ------------------- Speaking (via gTTS) -------------------
 elif st.session_state.current_state == "speaking":
     lang_code = st.session_state.selected_lang.split("-")[0]
-    original_resp = st.session_state.conversation[-1]["assistant"]
+    exchange = st.session_state.conversation[-1]
 
-    # 1️⃣ translate assistant reply to the user’s language
-    try:
-        translated = Translator().translate(original_resp, src="en", dest=lang_code).text
-    except Exception as e:
-        translated = original_resp
-        st.warning(f"⚠️ Translation failed: {e}")
+    # 1️⃣ take the next streamed sentence and translate it to the user’s language
+    if st.session_state.current_clip is None:
+        with st.spinner("⚙️ Processing..."):
+            sentence = next(st.session_state.pending_sentences, None)
+        if sentence is None:
+            # stream finished: back to STT
+            st.session_state.assistant_response = exchange["assistant"]
+            st.session_state.current_state = "listening"
+            st.session_state.speech_key += 1
+            st.rerun()
+        exchange["assistant"] = f"{exchange['assistant']} {sentence}".strip()
+        try:
+            translated = translate_text(sentence, "en", lang_code)
+        except Exception as e:
+            translated = sentence
+            st.warning(f"⚠️ Translation failed: {e}")
 
-    st.info(f"🗣️ You said: {st.session_state.conversation[-1]['user']}")
-    st.success(f"🤖 EchoMind ({LANG_OPTIONS[st.session_state.selected_lang]}): {translated}")
+        # 2️⃣ generate MP3 with gTTS
+        tts = gTTS(text=translated, lang=lang_code)
+        buf = BytesIO()
+        tts.write_to_fp(buf)
+        st.session_state.current_clip = {
+            "text": translated,
+            "b64": base64.b64encode(buf.getvalue()).decode(),
+        }
+        st.session_state.clip_index += 1
 
-    # 2️⃣ generate MP3 with gTTS
-    tts = gTTS(text=translated, lang=lang_code)
-    buf = BytesIO()
-    tts.write_to_fp(buf)
-    audio_bytes = buf.getvalue()
-    b64 = base64.b64encode(audio_bytes).decode()
+    clip = st.session_state.current_clip
+    st.info(f"🗣️ You said: {exchange['user']}")
+    st.success(f"🤖 EchoMind ({LANG_OPTIONS[st.session_state.selected_lang]}): {clip['text']}")
 
     # 3️⃣ play it silently & detect when it ends
     result = streamlit_js_eval(
         js_expressions=f"""
             (async () => {{
                 return await new Promise((resolve) => {{
-                    const audio = new Audio("data:audio/mp3;base64,{b64}");
+                    const audio = new Audio("data:audio/mp3;base64,{clip['b64']}");
                     audio.autoplay = true;
                     audio.onended  = () => resolve("done");
                     audio.onerror  = () => resolve("done");
@@ -209,13 +285,12 @@ elif st.session_state.current_state == "speaking":
                 }});
             }})()
         """,
-        key=f"auto_audio_{st.session_state.speech_key}"
+        key=f"auto_audio_{st.session_state.speech_key}_{st.session_state.clip_index}"
     )
 
-    # 4️⃣ once playback is done, jump back to STT
+    # 4️⃣ once playback is done, speak the next sentence
     if result == "done":
-        st.session_state.current_state = "listening"
-        st.session_state.speech_key += 1
+        st.session_state.current_clip = None
         st.rerun()
 
 # ------------------- Idle State Instructions -------------------
@@ -237,3 +312,9 @@ if st.session_state.current_state == "idle" and not st.session_state.conversatio
 
 📄 No documents found. Upload one from the sidebar and then click **Start EchoMind**.
 """)
+
+# Refresh the indexing status while nothing else is going on; during a
+# conversation it updates on the reruns the conversation already makes.
+if indexing_running and st.session_state.current_state == "idle":
+    time.sleep(1)
+    st.rerun()
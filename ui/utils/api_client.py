@@ -1,3 +1,5 @@
+import json
+import re
 import requests
 import time
 try:
@@ -93,4 +95,88 @@ def get_audio_response(text, source_lang):
             return f"Error getting response: {response.status_code}"
     except Exception as e:
         logger.exception("Exception in get_audio_response")
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+
+def stream_audio_response(text, source_lang):
+    """Yield response text pieces from the streaming (SSE) respond endpoint as they arrive.
+
+    Falls back to yielding the error message as a single piece on failure.
+    """
+    if not text or text.isspace():
+        yield "I couldn't hear anything. Could you please speak again?"
+        return
+
+    start_time = time.time()
+    try:
+        with requests.post(f"{API_URL}/respond-audio/stream", json={"text": text, "source_lang": source_lang},
+                           stream=True, timeout=(5, 60)) as response:
+            if response.status_code != 200:
+                logger.error("Audio respond stream error: %s, %s", response.status_code, response.text)
+                yield f"Error getting response: {response.status_code}"
+                return
+            first = True
+            for event, data in _iter_sse(response):
+                if event == "message" and data.get("token"):
+                    if first:
+                        logger.debug("First token after %.2fs", time.time() - start_time)
+                        first = False
+                    yield data["token"]
+                elif event == "error":
+                    logger.error("Audio respond stream failed: %s", data.get("detail"))
+                    yield data.get("detail", "Error getting response.")
+                    return
+                elif event == "done":
+                    logger.debug("Stream finished in %.2fs", time.time() - start_time)
+                    return
+    except Exception as e:
+        logger.exception("Exception in stream_audio_response")
+        yield f"Error: {str(e)}"
+
+
+def _iter_sse(response):
+    """Parse ``(event, data)`` pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def iter_sentences(pieces, min_chars=20):
+    """Regroup streamed text pieces into sentences so each can be spoken as soon as it is complete.
+
+    Closing this generator closes ``pieces`` too, e.g. the HTTP response of
+    :func:`stream_audio_response`.
+    """
+    buffer = ""
+    try:
+        for piece in pieces:
+            buffer += piece
+            parts = _SENTENCE_END.split(buffer)
+            # Everything but the last part ends in sentence punctuation
+            ready, buffer = parts[:-1], parts[-1]
+            sentence = ""
+            for part in ready:
+                sentence = f"{sentence} {part}".strip()
+                if len(sentence) >= min_chars:
+                    yield sentence
+                    sentence = ""
+            if sentence:
+                buffer = f"{sentence} {buffer}"
+    finally:
+        close = getattr(pieces, "close", None)
+        if close is not None:
+            close()
+    if buffer.strip():
+        yield buffer.strip()